@@ -18,6 +18,7 @@ from typing_extensions import NotRequired, TypedDict
 
 import NetUtils
 import Options
+import Profiler
 import Utils
 
 if TYPE_CHECKING:
@@ -76,6 +77,8 @@ class MultiWorld():
     regions: RegionManager
     itempool: List[Item]
     is_race: bool = False
+    stage_workers: int = 1
+    """threads to run generation steps in, for worlds declaring them as slot-isolated, see World.parallel_stages"""
     precollected_items: Dict[int, List[Item]]
     state: CollectionState
 
@@ -651,6 +654,7 @@ class MultiWorld():
                 state.collect(location.item, True, location)
             locations -= sphere
 
+    @Profiler.profiled("phase")
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
         """Check if accessibility rules are fulfilled with current or supplied state."""
         if not state:
@@ -766,6 +770,21 @@ class CollectionState():
         else:
             self._update_reachable_regions_auto_indirect_conditions(player, queue)
 
+    def update_reachable_regions_from(self, player: int, connections: Iterable[Entrance]) -> None:
+        """
+        Search for newly reachable regions only through connections, instead of retrying every blocked connection.
+        Only correct if nothing but these connections changed since reachable regions were last updated. Worlds without
+        explicit indirect conditions get a full update instead.
+        """
+        if not self.multiworld.worlds[player].explicit_indirect_conditions:
+            # any blocked connection may depend on the new regions, so all of them have to be retried
+            self.update_reachable_regions(player)
+            return
+        self.stale[player] = False
+        blocked_connections = self.blocked_connections[player]
+        self._update_reachable_regions_explicit_indirect_conditions(
+            player, deque(connection for connection in connections if connection in blocked_connections))
+
     def _update_reachable_regions_explicit_indirect_conditions(self, player: int, queue: deque):
         reachable_regions = self.reachable_regions[player]
         blocked_connections = self.blocked_connections[player]
@@ -984,8 +1003,9 @@ class CollectionState():
         else:
             # Create the generator, but tell it not to yield anything, so it will run to completion in zero iterations
             # once started, then start and exhaust the generator by attempting to iterate it.
-            for _ in self._sweep_for_advancements_impl(advancements_per_player, False):
-                assert False, "Generator yielded when it should have run to completion without yielding"
+            with Profiler.section("sweep", "sweep_for_advancements"):
+                for _ in self._sweep_for_advancements_impl(advancements_per_player, False):
+                    assert False, "Generator yielded when it should have run to completion without yielding"
             return None
 
     # item name related
@@ -1689,6 +1709,7 @@ class Spoiler:
             self.entrances[(entrance, direction, player)] = \
                 {"player": player, "entrance": entrance, "exit": exit_, "direction": direction}
 
+    @Profiler.profiled("phase")
     def create_playthrough(self, create_paths: bool = True) -> None:
         """Destructive to the multiworld while it is run, damage gets repaired afterwards."""
         from itertools import chain
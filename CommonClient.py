@@ -25,13 +25,15 @@ from MultiServer import CommandProcessor, mark_raw
 from NetUtils import (Endpoint, decode, NetworkItem, encode, JSONtoTextParser, ClientStatus, Permission, NetworkSlot,
                       RawJSONtoTextParser, add_json_text, add_json_location, add_json_item, JSONTypes, HintStatus, SlotType)
 from Utils import Version, stream_input, async_start
-from worlds import network_data_package, AutoWorldRegister
+import worlds
+from worlds import AutoWorldRegister
 import os
 import ssl
 
 if typing.TYPE_CHECKING:
     import kvui
     import argparse
+    from DataPackageCache import DataPackageTables
 
 logger = logging.getLogger("Client")
 
@@ -109,19 +111,20 @@ class ClientCommandProcessor(CommandProcessor):
         checked_count = 0
 
         lookup = self.ctx.location_names[self.ctx.game]
-        for location_id, location in lookup.items():
+        # only the locations of this slot can be missing, no need to go through every location of the game
+        for location_id in sorted(self.ctx.server_locations - self.ctx.locations_checked):
+            location = lookup[location_id]
             if filter_text and filter_text not in location:
                 continue
             if location_id < 0:
                 continue
-            if location_id not in self.ctx.locations_checked:
-                if location_id in self.ctx.missing_locations:
-                    self.output('Missing: ' + location)
-                    count += 1
-                elif location_id in self.ctx.checked_locations:
-                    self.output('Checked: ' + location)
-                    count += 1
-                    checked_count += 1
+            if location_id in self.ctx.missing_locations:
+                self.output('Missing: ' + location)
+                count += 1
+            else:
+                self.output('Checked: ' + location)
+                count += 1
+                checked_count += 1
 
         if count:
             self.output(
@@ -229,6 +232,99 @@ class ClientCommandProcessor(CommandProcessor):
             async_start(self.ctx.send_msgs([{"cmd": "Say", "text": raw}]), name="send Say")
 
 
+ReceivedItemsCallback = typing.Callable[[int, typing.Sequence[NetworkItem]], None]
+
+
+class ReceivedItems(list[NetworkItem]):
+    """
+    The items received from the server, in the order they were sent, keeping a count of each item id.
+
+    Instead of scanning the whole list on every tick, clients can remember `index` and only look at
+    `since(index)`, or subscribe to get each batch of new items as it arrives.
+    """
+    counts: collections.Counter[int]
+    """Number of times each item id was received"""
+    _subscribers: list[ReceivedItemsCallback]
+
+    def __init__(self, items: typing.Iterable[NetworkItem] = ()) -> None:
+        super().__init__(items)
+        self.counts = collections.Counter(item.item for item in self)
+        self._subscribers = []
+
+    @property
+    def index(self) -> int:
+        """Index the next received item will have. Only goes down when the server resends all items."""
+        return len(self)
+
+    def since(self, index: int) -> list[NetworkItem]:
+        """Items received from index onwards."""
+        return self[index:]
+
+    def count_item(self, item_id: int) -> int:
+        return self.counts[item_id]
+
+    def has(self, item_id: int, count: int = 1) -> bool:
+        return self.counts[item_id] >= count
+
+    def subscribe(self, callback: ReceivedItemsCallback) -> None:
+        """
+        Call callback(index, items) with every batch of new items and the index of the first of them.
+        An index of 0 means all items are being received again, so anything counted from earlier items is outdated.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: ReceivedItemsCallback) -> None:
+        self._subscribers.remove(callback)
+
+    def _notify(self, index: int, items: typing.Sequence[NetworkItem]) -> None:
+        for callback in self._subscribers:
+            callback(index, items)
+
+    def append(self, item: NetworkItem) -> None:
+        self.extend((item,))
+
+    def extend(self, items: typing.Iterable[NetworkItem]) -> None:
+        index = len(self)
+        new_items = list(items)
+        super().extend(new_items)
+        self.counts.update(item.item for item in new_items)
+        if new_items:
+            self._notify(index, new_items)
+
+    def __iadd__(self, items: typing.Iterable[NetworkItem]) -> ReceivedItems:  # type: ignore[override, misc]
+        self.extend(items)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self.counts.clear()
+        self._notify(0, [])
+
+    def _recount(self) -> None:
+        self.counts = collections.Counter(item.item for item in self)
+
+    def __setitem__(self, index: typing.Any, value: typing.Any) -> None:
+        super().__setitem__(index, value)
+        self._recount()
+
+    def __delitem__(self, index: typing.Any) -> None:
+        super().__delitem__(index)
+        self._recount()
+
+    def insert(self, index: typing.SupportsIndex, item: NetworkItem) -> None:
+        super().insert(index, item)
+        self.counts[item.item] += 1
+
+    def pop(self, index: typing.SupportsIndex = -1) -> NetworkItem:
+        item = super().pop(index)
+        self.counts[item.item] -= 1
+        return item
+
+    def remove(self, item: NetworkItem) -> None:
+        super().remove(item)
+        self.counts[item.item] -= 1
+
+
 class CommonContext:
     # The following attributes are used to Connect and should be adjusted as needed in subclasses
     tags: typing.Set[str] = {"AP"}
@@ -285,9 +381,13 @@ class CommonContext:
 
         def update_game(self, game: str, name_to_id_lookup_table: typing.Dict[str, int]) -> None:
             """Overrides existing lookup tables for a particular game."""
-            id_to_name_lookup_table = Utils.KeyedDefaultDict(self._unknown_item)
-            id_to_name_lookup_table.update({code: name for name, code in name_to_id_lookup_table.items()})
-            self._game_store[game] = collections.ChainMap(self._archipelago_lookup, id_to_name_lookup_table)
+            self.update_game_lookup(game, {code: name for name, code in name_to_id_lookup_table.items()})
+
+        def update_game_lookup(self, game: str, id_to_name_lookup_table: typing.Mapping[int, str]) -> None:
+            """Overrides existing lookup tables for a particular game with an id -> name mapping, which is used as is,
+            so it can be a lazy mapping like a NameTable of the binary data package cache."""
+            self._game_store[game] = collections.ChainMap(self._archipelago_lookup, id_to_name_lookup_table,
+                                                          Utils.KeyedDefaultDict(self._unknown_item))
             if game == "Archipelago":
                 # Keep track of the Archipelago data package separately so if it gets updated in a custom datapackage,
                 # it updates in all chain maps automatically.
@@ -354,7 +454,7 @@ class CommonContext:
     Local container of location ids scouted to signal that LocationScouts should be resent after reconnecting
     to be used to ensure that a LocationScouts packet does not get lost when disconnected
     """
-    items_received: list[NetworkItem]
+    items_received: ReceivedItems
     """List of NetworkItems recieved from the server"""
     missing_locations: set[int]
     """Container of Locations that are unchecked per server state"""
@@ -403,7 +503,7 @@ class CommonContext:
 
         self.locations_checked = set()  # local state
         self.locations_scouted = set()
-        self.items_received = []
+        self.items_received = ReceivedItems()
         self.missing_locations = set()  # server state
         self.checked_locations = set()  # server state
         self.server_locations = set()  # all locations the server knows of, missing_location | checked_locations
@@ -426,9 +526,16 @@ class CommonContext:
 
         self.jsontotextparser = JSONtoTextParser(self)
         self.rawjsontotextparser = RawJSONtoTextParser(self)
-        if self.game:
-            self.checksums[self.game] = network_data_package["games"][self.game]["checksum"]
-        self.update_data_package(network_data_package)
+        if worlds.lazy_world_loading:
+            # other games are looked up once the server tells which are in use
+            for game in ("Archipelago", self.game):
+                game_package = worlds.get_game_data_package(game) if game else None
+                if game_package:
+                    self.update_game(game_package, game)
+        else:
+            if self.game:
+                self.checksums[self.game] = worlds.network_data_package["games"][self.game]["checksum"]
+            self.update_data_package(worlds.network_data_package)
 
         # execution
         self.keep_alive_task = asyncio.create_task(keep_alive(self), name="Bouncy")
@@ -458,7 +565,7 @@ class CommonContext:
         self.auth = None
         self.slot = None
         self.team = None
-        self.items_received = []
+        self.items_received.clear()
         self.locations_info = {}
         self.server_version = Version(0, 0, 0)
         self.generator_version = Version(0, 0, 0)
@@ -662,10 +769,16 @@ class CommonContext:
             cached_checksum: typing.Optional[str] = self.checksums.get(game)
             # no action required if cached version is new enough
             if remote_checksum != cached_checksum:
-                local_checksum: typing.Optional[str] = network_data_package["games"].get(game, {}).get("checksum")
+                local_package = worlds.get_game_data_package(game) or {}
+                local_checksum: typing.Optional[str] = local_package.get("checksum")
                 if remote_checksum == local_checksum:
-                    self.update_game(network_data_package["games"][game], game)
+                    self.update_game(local_package, game)
                 else:
+                    # binary tables of the cached package only decode the names that get looked up
+                    cached_tables = Utils.load_data_package_tables_for_checksum(game, remote_checksum)
+                    if cached_tables:
+                        self.update_game_tables(cached_tables, game, remote_checksum)
+                        continue
                     cached_game = Utils.load_data_package_for_checksum(game, remote_checksum)
                     cache_checksum: typing.Optional[str] = cached_game.get("checksum")
                     # download remote version if cache is not new enough
@@ -681,6 +794,11 @@ class CommonContext:
         self.location_names.update_game(game, game_package["location_name_to_id"])
         self.checksums[game] = game_package.get("checksum")
 
+    def update_game_tables(self, tables: DataPackageTables, game: str, checksum: str):
+        self.item_names.update_game_lookup(game, tables.item_names)
+        self.location_names.update_game_lookup(game, tables.location_names)
+        self.checksums[game] = checksum
+
     def update_data_package(self, data_package: dict):
         for game, game_data in data_package["games"].items():
             self.update_game(game_data, game)
@@ -1047,7 +1165,7 @@ async def process_server_cmd(ctx: CommonContext, args: dict):
         start_index = args["index"]
 
         if start_index == 0:
-            ctx.items_received = []
+            ctx.items_received.clear()
         elif start_index != len(ctx.items_received):
             sync_msg = [{'cmd': 'Sync'}]
             if ctx.locations_checked:
@@ -1055,8 +1173,7 @@ async def process_server_cmd(ctx: CommonContext, args: dict):
                                  "locations": list(ctx.locations_checked)})
             await ctx.send_msgs(sync_msg)
         if start_index == len(ctx.items_received):
-            for item in args['items']:
-                ctx.items_received.append(NetworkItem(*item))
+            ctx.items_received.extend(NetworkItem(*item) for item in args['items'])
         ctx.watcher_event.set()
 
     elif cmd == 'LocationInfo':
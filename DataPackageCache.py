@@ -0,0 +1,154 @@
+"""
+Binary cache format of data packages, for clients that only need to turn ids into names.
+
+A data package is cached as JSON, which is also what is sent over the network. Parsing the JSON of 100+ games and
+building reverse dicts of all their names takes seconds at every connect, so next to the JSON a binary copy of the
+name to id tables is stored, which is memory-mapped and only decodes the names that actually get looked up.
+
+The file consists of a header, then a table for items followed by one for locations. Each table has
+ * the ids, sorted ascending,
+ * the end offset of each name in the name blob, in the order of the ids,
+ * the positions of the names in the order of their UTF-8 encoding, to look up ids by name,
+ * the UTF-8 encoded names, padded to 8 bytes.
+All numbers are little-endian 64-bit integers.
+"""
+from __future__ import annotations
+
+import bisect
+import mmap
+import struct
+import sys
+import typing
+
+__all__ = ["NameTable", "DataPackageTables", "dump_data_package_tables", "load_data_package_tables"]
+
+MAGIC = b"APDP"
+FORMAT_VERSION = 1
+_header = struct.Struct("<4sIQQ")
+
+
+def _padding(length: int) -> bytes:
+    return bytes(-length % 8)
+
+
+def _dump_table(name_to_id: typing.Mapping[str, int]) -> bytes:
+    encoded = sorted(((code, name.encode("utf-8")) for name, code in name_to_id.items()), key=lambda row: row[0])
+    name_ends: list[int] = []
+    end = 0
+    for _, name in encoded:
+        end += len(name)
+        name_ends.append(end)
+    name_order = sorted(range(len(encoded)), key=lambda index: encoded[index][1])
+    names = b"".join(name for _, name in encoded)
+    count = len(encoded)
+    return b"".join((struct.pack(f"<{count}q", *(code for code, _ in encoded)),
+                     struct.pack(f"<{count}q", *name_ends),
+                     struct.pack(f"<{count}q", *name_order),
+                     names, _padding(len(names))))
+
+
+def dump_data_package_tables(package: typing.Mapping[str, typing.Any]) -> bytes:
+    """Binary tables of the item and location names of a game's data package."""
+    items: typing.Mapping[str, int] = package["item_name_to_id"]
+    locations: typing.Mapping[str, int] = package["location_name_to_id"]
+    return b"".join((_header.pack(MAGIC, FORMAT_VERSION, len(items), len(locations)),
+                     _dump_table(items), _dump_table(locations)))
+
+
+class NameTable(typing.Mapping[int, str]):
+    """Read-only id -> name lookup of one table, decoding names when they are first looked up."""
+    _ids: memoryview
+    _name_ends: memoryview
+    _name_order: memoryview
+    _names: memoryview
+    _decoded: dict[int, str]
+
+    def __init__(self, buffer: memoryview, count: int) -> None:
+        numbers = buffer[:count * 24].cast("q")
+        self._ids = numbers[:count]
+        self._name_ends = numbers[count:count * 2]
+        self._name_order = numbers[count * 2:]
+        names_length = self._name_ends[-1] if count else 0
+        self._names = buffer[count * 24:count * 24 + names_length]
+        if len(self._names) != names_length:
+            raise ValueError("Data package tables file is incomplete")
+        self._decoded = {}
+
+    @property
+    def size(self) -> int:
+        """Bytes taken by this table in the buffer."""
+        return len(self._ids) * 24 + len(self._names) + len(_padding(len(self._names)))
+
+    def _get_name_bytes(self, index: int) -> memoryview:
+        start = self._name_ends[index - 1] if index else 0
+        return self._names[start:self._name_ends[index]]
+
+    def _get_name(self, index: int) -> str:
+        return str(self._get_name_bytes(index), "utf-8")
+
+    def __getitem__(self, code: int) -> str:
+        name = self._decoded.get(code)
+        if name is None:
+            # with duplicate ids, the last name wins like it would when reversing the name to id dict
+            index = bisect.bisect_right(self._ids, code) - 1
+            if index < 0 or self._ids[index] != code:
+                raise KeyError(code)
+            name = self._decoded[code] = self._get_name(index)
+        return name
+
+    def __iter__(self) -> typing.Iterator[int]:
+        previous: int | None = None
+        for code in self._ids:
+            if code != previous:
+                yield code
+                previous = code
+
+    def __len__(self) -> int:
+        return len(set(self._ids))
+
+    def get_id(self, name: str) -> int | None:
+        """Look up the id of a name, None if it is not in the table."""
+        encoded = name.encode("utf-8")
+        order = self._name_order
+        index = bisect.bisect_left(order, encoded, key=lambda position: bytes(self._get_name_bytes(position)))
+        if index < len(order) and self._get_name_bytes(order[index]) == encoded:
+            return self._ids[order[index]]
+        return None
+
+    def name_to_id(self) -> dict[str, int]:
+        """Decode the whole table into a name to id dict, like in the data package."""
+        return {self._get_name(index): code for index, code in enumerate(self._ids)}
+
+
+class DataPackageTables:
+    """Item and location NameTables of a game, backed by a buffer like a memory-mapped cache file."""
+    item_names: NameTable
+    location_names: NameTable
+
+    def __init__(self, buffer: typing.Any) -> None:
+        self._buffer = buffer
+        view = memoryview(buffer)
+        try:
+            magic, version, item_count, location_count = _header.unpack_from(view)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError("Not a data package tables file of a supported version")
+            offset = _header.size
+            self.item_names = NameTable(view[offset:], item_count)
+            offset += self.item_names.size
+            self.location_names = NameTable(view[offset:], location_count)
+            offset += self.location_names.size
+        except (struct.error, TypeError, IndexError) as e:  # truncated file
+            raise ValueError(f"Data package tables file is incomplete: {e}") from e
+        if offset != len(view):
+            raise ValueError("Data package tables file has an unexpected size")
+
+
+def load_data_package_tables(path: str) -> DataPackageTables:
+    """Memory-map the tables written by dump_data_package_tables to path. Raises OSError or ValueError if they can't
+    be read."""
+    if sys.byteorder != "little":
+        raise ValueError("Data package tables can only be mapped on little-endian machines")
+    with open(path, "rb") as f:
+        # the map stays valid after the file is closed
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return DataPackageTables(buffer)
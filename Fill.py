@@ -6,6 +6,7 @@ from collections import Counter, deque
 
 from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, PlandoItemBlock
 from Options import Accessibility
+from Profiler import profiled
 
 from worlds.AutoWorld import call_all
 from worlds.generic.Rules import add_item_rule
@@ -33,6 +34,7 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+@profiled("fill", "name")
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -254,6 +256,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     item_pool.extend(unplaced_items)
 
 
+@profiled("fill", "name")
 def remaining_fill(multiworld: MultiWorld,
                    locations: typing.List[Location],
                    itempool: typing.List[Item],
@@ -485,6 +488,7 @@ def distribute_early_items(multiworld: MultiWorld,
     return fill_locations, itempool
 
 
+@profiled("phase")
 def distribute_items_restrictive(multiworld: MultiWorld,
                                  panic_method: typing.Literal["swap", "raise", "start_inventory"] = "swap") -> None:
     assert all(item.location is None for item in multiworld.itempool), (
@@ -669,6 +673,7 @@ def distribute_items_restrictive(multiworld: MultiWorld,
             )
 
 
+@profiled("phase")
 def flood_items(multiworld: MultiWorld) -> None:
     # get items to distribute
     multiworld.random.shuffle(multiworld.itempool)
@@ -730,6 +735,7 @@ def flood_items(multiworld: MultiWorld) -> None:
                 break
 
 
+@profiled("balancing")
 def balance_multiworld_progression(multiworld: MultiWorld) -> None:
     # A system to reduce situations where players have no checks remaining, popularly known as "BK mode."
     # Overall progression balancing algorithm:
@@ -1088,6 +1094,7 @@ def resolve_early_locations_for_planned(multiworld: MultiWorld):
             multiworld.plando_item_blocks[player].remove(block)
 
 
+@profiled("phase")
 def distribute_planned_blocks(multiworld: MultiWorld, plando_blocks: list[PlandoItemBlock]):
     def warn(warning: str, force: bool | str) -> None:
         if isinstance(force, bool):
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import copy
 import logging
 import os
@@ -11,7 +12,7 @@ import urllib.parse
 import urllib.request
 from collections import Counter
 from itertools import chain
-from typing import Any
+from typing import Any, Callable
 
 import ModuleUpdate
 
@@ -54,6 +55,12 @@ def mystery_argparse(argv: list[str] | None = None):
     parser.add_argument("--skip_output", action="store_true",
                         help="Skips generation assertion and output stages and skips multidata and spoiler output. "
                              "Intended for debugging and testing purposes.")
+    parser.add_argument("--yaml_workers", default=defaults.yaml_workers, type=int,
+                        help="Number of processes to read player files and roll their options with, "
+                             "0 for one per CPU core.")
+    parser.add_argument("--profile", nargs="?", const="report", choices=("report", "cprofile"),
+                        help="Write a JSON report of the time taken by each generation step, world, fill and "
+                             "sweep to the output folder. \"cprofile\" also writes cProfile stats of the main thread.")
     parser.add_argument("--spoiler_only", action="store_true",
                         help="Skips generation assertion and multidata, outputting only a spoiler log. "
                              "Intended for debugging and testing purposes.")
@@ -122,26 +129,34 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
     player_id: int = 1
     player_files: dict[int, str] = {}
     player_errors: list[str] = []
+    player_file_names: list[str] = []
     for file in os.scandir(args.player_files_path):
         fname = file.name
         if file.is_file() and not fname.startswith(".") and not fname.lower().endswith(".ini") and \
                 os.path.join(args.player_files_path, fname) not in {args.meta_file_path, args.weights_file_path}:
-            path = os.path.join(args.player_files_path, fname)
-            try:
-                weights_for_file = []
-                for doc_idx, yaml in enumerate(read_weights_yamls(path)):
-                    if yaml is None:
-                        logging.warning(f"Ignoring empty yaml document #{doc_idx + 1} in {fname}")
-                    else:
-                        weights_for_file.append(yaml)
-                weights_cache[fname] = tuple(weights_for_file)
-                        
-            except Exception as e:
-                logging.exception(f"Exception reading weights in file {fname}")
-                player_errors.append(
-                    f"{len(player_errors) + 1}. "
-                    f"File {fname} is invalid. Please fix your yaml.\n{Utils.get_all_causes(e)}"
-                )
+            player_file_names.append(fname)
+
+    read_results = run_in_processes(read_weights_yamls,
+                                    [(os.path.join(args.player_files_path, fname),) for fname in player_file_names],
+                                    args.yaml_workers)
+    for fname, read_result in zip(player_file_names, read_results):
+        try:
+            if isinstance(read_result, Exception):
+                raise read_result
+            weights_for_file = []
+            for doc_idx, yaml in enumerate(read_result):
+                if yaml is None:
+                    logging.warning(f"Ignoring empty yaml document #{doc_idx + 1} in {fname}")
+                else:
+                    weights_for_file.append(yaml)
+            weights_cache[fname] = tuple(weights_for_file)
+
+        except Exception as e:
+            logging.exception(f"Exception reading weights in file {fname}")
+            player_errors.append(
+                f"{len(player_errors) + 1}. "
+                f"File {fname} is invalid. Please fix your yaml.\n{Utils.get_all_causes(e)}"
+            )
 
     # sort dict for consistent results across platforms:
     weights_cache = {key: value for key, value in sorted(weights_cache.items(), key=lambda k: k[0].casefold())}
@@ -207,9 +222,16 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
 
     settings_cache: dict[str, tuple[argparse.Namespace, ...]] = {fname: None for fname in weights_cache}
     if args.sameoptions:
+        rolled_files = roll_settings_in_processes(
+            [(yaml, args.plando) for yamls in weights_cache.values() for yaml in yamls], args.yaml_workers)
         for fname, yamls in weights_cache.items():
             try:
-                settings_cache[fname] = tuple(roll_settings(yaml, args.plando) for yaml in yamls)
+                file_settings = tuple(rolled_files[:len(yamls)])
+                del rolled_files[:len(yamls)]
+                for rolled in file_settings:
+                    if isinstance(rolled, Exception):
+                        raise rolled
+                settings_cache[fname] = file_settings
             except Exception as e:
                 logging.exception(f"Exception reading settings in file {fname}")
                 player_errors.append(
@@ -228,6 +250,22 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
     name_counter = Counter()
     args.player_options = {}
 
+    # roll all players first, so it can happen in parallel, then go through them in the same order as the results
+    roll_players: list[int] = []
+    roll_jobs: list[tuple[dict, PlandoOptions]] = []
+    player = 1
+    while player <= args.multi:
+        path = player_path_cache[player]
+        if path:
+            for yaml in weights_cache[path]:
+                if not settings_cache[path]:
+                    roll_players.append(player)
+                    roll_jobs.append((yaml, args.plando))
+                player += 1
+        else:
+            player += 1
+    rolled_players = dict(zip(roll_players, roll_settings_in_processes(roll_jobs, args.yaml_workers)))
+
     player = 1
     while player <= args.multi:
         path = player_path_cache[player]
@@ -239,14 +277,16 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
         for doc_index, yaml in enumerate(weights_cache[path]):
             name = yaml.get("name")
             try:
-                # Use the cached settings object if it exists, otherwise roll settings within the try-catch
+                # Use the cached settings object if it exists, otherwise the settings rolled for this player
                 # Invariant: settings_cache[path] and weights_cache[path] have the same length
                 settingsObject: argparse.Namespace = (
                     settings_cache[path][doc_index]
                     if settings_cache[path]
-                    else roll_settings(yaml, args.plando)
+                    else rolled_players[player]
                 )
-                
+                if isinstance(settingsObject, Exception):
+                    raise settingsObject
+
                 for k, v in vars(settingsObject).items():
                     if v is not None:
                         try:
@@ -317,6 +357,60 @@ def read_weights_yamls(path) -> tuple[Any, ...]:
         raise ex
 
 
+def run_in_processes(function: Callable[..., Any], jobs: list[tuple[Any, ...]], workers: int) -> list[Any]:
+    """
+    Call function with the arguments of each job, spread over up to workers processes, 0 for one per CPU core.
+    Returns results in the order of jobs, with the exception in place of the result for jobs that failed.
+    Jobs failing in another process are run again in this one, so exceptions are the same as without processes.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    pool: concurrent.futures.ProcessPoolExecutor | None = None
+    futures: list[concurrent.futures.Future] = []
+    if workers > 1:
+        pool = concurrent.futures.ProcessPoolExecutor(workers)
+        futures = [pool.submit(function, *job) for job in jobs]
+    results: list[Any] = []
+    try:
+        for job_index, job in enumerate(jobs):
+            if futures:
+                try:
+                    results.append(futures[job_index].result())
+                    continue
+                except Exception:
+                    pass  # run it again here
+            try:
+                results.append(function(*job))
+            except Exception as e:
+                results.append(e)
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+    return results
+
+
+def roll_settings_seeded(weights: dict, plando_options: PlandoOptions, seed: int) -> argparse.Namespace:
+    """roll_settings from its own seed, so its results don't depend on which other weights were rolled before."""
+    random.seed(seed)
+    return roll_settings(weights, plando_options)
+
+
+def roll_settings_in_processes(jobs: list[tuple[dict, PlandoOptions]], workers: int) -> list[Any]:
+    """
+    roll_settings for the weights and plando options of each job, see run_in_processes.
+    With a single worker, jobs are rolled one after another from random, the same as calling roll_settings for each.
+    Otherwise each job is rolled from its own seed, taken from random in order of jobs,
+    so results are the same for any amount of workers above one.
+    """
+    if workers == 1:
+        return run_in_processes(roll_settings, jobs, workers)
+    seeded_jobs = [(weights, plando_options, random.getrandbits(64)) for weights, plando_options in jobs]
+    random_state = random.getstate()
+    try:
+        return run_in_processes(roll_settings_seeded, seeded_jobs, workers)
+    finally:
+        random.setstate(random_state)
+
+
 def interpret_on_off(value) -> bool:
     return {"on": True, "off": False}.get(value, value)
 
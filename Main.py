@@ -2,12 +2,16 @@ import collections
 from collections.abc import Mapping
 import concurrent.futures
 import logging
+import multiprocessing
+import multiprocessing.connection
 import os
+import signal
 import tempfile
+import threading
 import time
-from typing import Any
+import traceback
+from typing import Any, NamedTuple
 import zipfile
-import zlib
 
 import worlds
 from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
@@ -15,15 +19,226 @@ from Fill import FillError, balance_multiworld_progression, distribute_items_res
     parse_planned_blocks, distribute_planned_blocks, resolve_early_locations_for_planned
 from NetUtils import convert_to_base_types
 from Options import StartInventoryPool
+import Profiler
 from Utils import __version__, output_path, restricted_dumps, version_tuple
 from settings import get_settings
 from worlds import AutoWorld
+from worlds.Files import get_compressed_container_endings
 from worlds.generic.Rules import exclusion_rules, locality_rules
 
 __all__ = ["main"]
 
 
+class ForkServer(NamedTuple):
+    process: multiprocessing.Process
+    commands: multiprocessing.connection.Connection
+    """sends the player to fork an output process for, or None to exit"""
+    lock: threading.Lock
+    """held while sending commands, as they are sent from output threads"""
+
+
+class OutputScheduler:
+    """Runs generate_output of worlds, at most `workers` at a time and, going by the output_memory worlds declare,
+    within memory_budget bytes. Worlds that are fork_safe_output run in forked processes if `fork` is set."""
+    fork_timeout: float = 60 * 60
+    """seconds after which a forked output process gets killed"""
+
+    def __init__(self, multiworld: MultiWorld, output_directory: str, workers: int, memory_budget: int = 0,
+                 fork: bool = False) -> None:
+        self.multiworld = multiworld
+        self.output_directory = output_directory
+        self.workers = max(1, workers)
+        self.memory_budget = memory_budget
+        # daemonic processes, like WebHost generators, are not allowed to have children
+        self.fork = fork and "fork" in multiprocessing.get_all_start_methods() \
+            and not multiprocessing.current_process().daemon
+        self.fork_server: ForkServer | None = None
+        self.forked: dict[int, multiprocessing.connection.Connection] | None = None
+        """by player, receives the pid of its output process, then the formatted exception if output failed, else None"""
+        self.timings: dict[int, float] = {}
+        """seconds the output of each player took"""
+
+    def get_memory(self, player: int) -> int:
+        return self.multiworld.worlds[player].output_memory
+
+    def fork_outputs(self, players: list[int]) -> None:
+        """
+        Start a fork server for the fork_safe_output worlds of players, which forks a process for a world's output
+        once run gets to it, so output processes are only created within the worker and memory limits.
+        Forking a process that runs other threads may deadlock the child, so this has to be called before any
+        threads are started, and does not fork if there are threads already. The fork server stays single-threaded.
+        """
+        self.forked = {}
+        fork_players = [player for player in players if self.multiworld.worlds[player].fork_safe_output]
+        if not self.fork or not fork_players:
+            return
+        if threading.active_count() > 1:
+            logging.getLogger().debug("Creating output in this process, as other threads are already running.")
+            return
+        context = multiprocessing.get_context("fork")
+        command_receiver, command_sender = context.Pipe(duplex=False)
+        result_senders: dict[int, multiprocessing.connection.Connection] = {}
+        for player in fork_players:
+            self.forked[player], result_senders[player] = context.Pipe(duplex=False)
+        process = context.Process(target=self._serve_forks, args=(command_receiver, result_senders),
+                                  daemon=True, name="Output fork server")
+        process.start()
+        command_receiver.close()
+        for sender in result_senders.values():
+            sender.close()
+        self.fork_server = ForkServer(process, command_sender, threading.Lock())
+
+    def run(self, players: list[int]) -> None:
+        """Create output of players, in order. Stops starting new output after the first failure and raises it."""
+        if self.forked is None:
+            self.fork_outputs(players)
+        logger = logging.getLogger()
+        pending = collections.deque(players)
+        running: dict[concurrent.futures.Future[None], int] = {}
+        used_memory = 0
+        done_count = 0
+        try:
+            with concurrent.futures.ThreadPoolExecutor(self.workers) as pool:
+                while pending or running:
+                    while pending and len(running) < self.workers:
+                        memory = self.get_memory(pending[0])
+                        if running and self.memory_budget and used_memory + memory > self.memory_budget:
+                            break  # wait for memory to free up, but always allow one at a time
+                        player = pending.popleft()
+                        used_memory += memory
+                        running[pool.submit(self.run_player, player)] = player
+                    done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        used_memory -= self.get_memory(running.pop(future))
+                        future.result()
+                        done_count += 1
+                        if done_count % 10 == 0 or done_count == len(players):
+                            logger.info(f"Generating output files of worlds ({done_count}/{len(players)}).")
+        finally:
+            self._stop_fork_server()
+
+    def run_player(self, player: int) -> None:
+        start = time.perf_counter()
+        result = self.forked.pop(player, None) if self.forked else None
+        if result:
+            # only wall time is meaningful here, as the work happens in another process
+            with Profiler.section("world", "generate_output", player):
+                self.run_forked(player, result)
+        else:
+            AutoWorld.call_single(self.multiworld, "generate_output", player, self.output_directory)
+        self.timings[player] = time.perf_counter() - start
+
+    def run_forked(self, player: int, result: multiprocessing.connection.Connection) -> None:
+        assert self.fork_server
+        try:
+            with self.fork_server.lock:
+                self.fork_server.commands.send(player)
+            error = self._wait_for_forked(result)
+        finally:
+            result.close()
+        if error is not None:
+            raise Exception(f"Error in generate_output of {self.multiworld.get_player_name(player)} "
+                            f"({self.multiworld.game[player]}):\n{error}")
+
+    def _wait_for_forked(self, result: multiprocessing.connection.Connection) -> str | None:
+        # the fork server and the output process hold the only other ends of result, so it ends if either dies
+        deadline = time.monotonic() + self.fork_timeout
+        pid: int | None = None
+        try:
+            while result.poll(max(0.0, deadline - time.monotonic())):
+                if pid is None:
+                    pid = result.recv()
+                else:
+                    return result.recv()
+        except EOFError:
+            return "Output process ended unexpectedly."
+        if pid is not None:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        return f"Output process did not finish within {self.fork_timeout} seconds."
+
+    def _stop_fork_server(self) -> None:
+        """Let the fork server exit, without creating the output it did not get to."""
+        if self.forked:
+            for result in self.forked.values():
+                result.close()
+            self.forked.clear()
+        if not self.fork_server:
+            return
+        try:
+            self.fork_server.commands.send(None)
+        except OSError:
+            pass
+        self.fork_server.commands.close()
+        self.fork_server.process.join()
+        self.fork_server = None
+
+    def _serve_forks(self, commands: multiprocessing.connection.Connection,
+                     results: dict[int, multiprocessing.connection.Connection]) -> None:
+        # nobody waits for the output processes, so let the system clean them up once they exit
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        while True:
+            try:
+                player = commands.recv()
+            except EOFError:
+                return
+            if player is None:
+                return
+            result = results.pop(player)
+            if os.fork() == 0:
+                commands.close()
+                for other_result in results.values():
+                    other_result.close()
+                self._forked_output(player, result)
+            result.close()
+
+    def _forked_output(self, player: int, result: multiprocessing.connection.Connection) -> None:
+        """Create the output of player in a process forked by the fork server, then exit the process."""
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)  # output may run subprocesses and wait for them
+        try:
+            result.send(os.getpid())
+            AutoWorld.call_single(self.multiworld, "generate_output", player, self.output_directory)
+            result.send(None)
+        except BaseException:
+            try:
+                result.send(traceback.format_exc())
+            finally:
+                os._exit(1)
+        os._exit(0)
+
+    def log_timings(self, count: int = 5) -> None:
+        """Log the output timings of all worlds at debug level and the slowest at info level."""
+        logger = logging.getLogger()
+        ranked = sorted(self.timings.items(), key=lambda timing: timing[1], reverse=True)
+        for index, (player, seconds) in enumerate(ranked):
+            logger.log(logging.INFO if index < count else logging.DEBUG,
+                       f"Output of {self.multiworld.get_player_name(player)} ({self.multiworld.game[player]}) "
+                       f"took {seconds:.2f} seconds.")
+
+
 def main(args, seed=None, baked_server_options: dict[str, object] | None = None):
+    profile: str | None = getattr(args, "profile", None)
+    if not profile:
+        return _main(args, seed, baked_server_options)
+
+    profiler = Profiler.GenerationProfiler(use_cprofile=profile == "cprofile")
+    multiworld: MultiWorld | None = None
+    try:
+        with profiler:
+            multiworld = _main(args, seed, baked_server_options)
+    finally:
+        # also write the report of failed generations, named after the seed number instead
+        file_base = output_path(f"AP_{multiworld.seed_name if multiworld else seed}_profile")
+        profiler.write_report(f"{file_base}.json", multiworld.player_name if multiworld else None)
+        if profiler.cprofile:
+            profiler.write_cprofile(f"{file_base}.prof")
+        logging.getLogger().info(f"Wrote generation profile to {file_base}.json")
+    return multiworld
+
+
+def _main(args, seed=None, baked_server_options: dict[str, object] | None = None):
     if not baked_server_options:
         baked_server_options = get_settings().server_options.as_dict()
     assert isinstance(baked_server_options, dict)
@@ -38,6 +253,7 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     logger = logging.getLogger()
     multiworld.set_seed(seed, args.race, str(args.outputname) if args.outputname else None)
     multiworld.plando_options = args.plando
+    multiworld.stage_workers = get_settings().generator.stage_workers or os.cpu_count() or 1
     multiworld.game = args.game.copy()
     multiworld.player_name = args.name.copy()
     multiworld.sprite = args.sprite.copy()
@@ -51,16 +267,18 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     multiworld.state = CollectionState(multiworld)
     logger.info('Archipelago Version %s  -  Seed: %s\n', __version__, multiworld.seed)
 
-    logger.info(f"Found {len(AutoWorld.AutoWorldRegister.world_types)} World Types:")
-    longest_name = max(len(text) for text in AutoWorld.AutoWorldRegister.world_types)
+    # with lazy world loading, only list the imported worlds instead of importing all of them
+    loaded_world_types = AutoWorld.get_loaded_world_types()
+    logger.info(f"Found {len(loaded_world_types)} World Types:")
+    longest_name = max((len(text) for text in loaded_world_types), default=0)
 
-    world_classes = AutoWorld.AutoWorldRegister.world_types.values()
+    world_classes = loaded_world_types.values()
 
     version_count = max(len(cls.world_version.as_simple_string()) for cls in world_classes)
     item_count = len(str(max(len(cls.item_names) for cls in world_classes)))
     location_count = len(str(max(len(cls.location_names) for cls in world_classes)))
 
-    for name, cls in AutoWorld.AutoWorldRegister.world_types.items():
+    for name, cls in loaded_world_types.items():
         if not cls.hidden and len(cls.item_names) > 0:
             logger.info(f" {name:{longest_name}}: "
                         f"v{cls.world_version.as_simple_string():{version_count}} | "
@@ -230,19 +448,23 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     with output as temp_dir:
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
                           is not multiworld.worlds[player].generate_output.__code__]
-        with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
+        generator_settings = get_settings().generator
+        output_scheduler = OutputScheduler(multiworld, temp_dir,
+                                           generator_settings.output_workers or os.cpu_count() or 1,
+                                           generator_settings.output_memory_budget * 1024 * 1024,
+                                           bool(generator_settings.fork_output))
+        output_scheduler.fork_outputs(output_players)
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
             check_accessibility_task = pool.submit(multiworld.fulfills_accessibility)
 
-            output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir)]
-            for player in output_players:
-                # skip starting a thread for methods that say "pass".
-                output_file_futures.append(
-                    pool.submit(AutoWorld.call_single, multiworld, "generate_output", player, temp_dir))
+            output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir),
+                                   pool.submit(output_scheduler.run, output_players)]
 
             # collect ER hint info
             er_hint_data: dict[int, dict[int, str]] = {}
             AutoWorld.call_all(multiworld, 'extend_hint_information', er_hint_data)
 
+            @Profiler.profiled("phase")
             def write_multidata():
                 import NetUtils
                 from NetUtils import HintStatus
@@ -309,10 +531,10 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
                 # embedded data package
                 data_package = {
-                    game_world.game: worlds.network_data_package["games"][game_world.game]
+                    game_world.game: worlds.get_game_data_package(game_world.game)
                     for game_world in multiworld.worlds.values()
                 }
-                data_package["Archipelago"] = worlds.network_data_package["games"]["Archipelago"]
+                data_package["Archipelago"] = worlds.get_game_data_package("Archipelago")
 
                 checks_in_area: dict[int, dict[str, int | list[int]]] = {}
 
@@ -350,10 +572,11 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                 for key in ("slot_data", "er_hint_data"):
                     multidata[key] = convert_to_base_types(multidata[key])
 
-                serialized_multidata = zlib.compress(restricted_dumps(multidata), 9)
+                serialized_multidata = NetUtils.compress_multidata(restricted_dumps(multidata),
+                                                                   generator_settings.multidata_compression,
+                                                                   generator_settings.multidata_compression_level)
 
                 with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
                     f.write(serialized_multidata)
 
             output_file_futures.append(pool.submit(write_multidata))
@@ -364,10 +587,9 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                     logger.warning("Location Accessibility requirements not fulfilled.")
 
             # retrieve exceptions via .result() if they occurred.
-            for i, future in enumerate(concurrent.futures.as_completed(output_file_futures), start=1):
-                if i % 10 == 0 or i == len(output_file_futures):
-                    logger.info(f'Generating output files ({i}/{len(output_file_futures)}).')
+            for future in concurrent.futures.as_completed(output_file_futures):
                 future.result()
+            output_scheduler.log_timings()
 
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
@@ -378,10 +600,14 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
         zipfilename = output_path(f"AP_{multiworld.seed_name}.zip")
         logger.info(f"Creating final archive at {zipfilename}")
-        with zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED,
-                             compresslevel=9) as zf:
+        with Profiler.section("phase", "archive"), \
+                zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+            compressed_endings = {".archipelago", *get_compressed_container_endings()}
             for file in os.scandir(temp_dir):
-                zf.write(file.path, arcname=file.name)
+                # multidata and patch containers are compressed already, deflating them again only takes time
+                already_compressed = os.path.splitext(file.name)[1] in compressed_endings
+                zf.write(file.path, arcname=file.name,
+                         compress_type=zipfile.ZIP_STORED if already_compressed else None)
 
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
     return multiworld
@@ -3,13 +3,15 @@ from __future__ import annotations
 from collections.abc import Mapping, Sequence
 import typing
 import enum
+import lzma
 import warnings
+import zlib
 from json import JSONEncoder, JSONDecoder
 
 if typing.TYPE_CHECKING:
     from websockets import WebSocketServerProtocol as ServerConnection
 
-from Utils import ByValue, Version
+from Utils import ByValue, Version, VersionException
 
 
 class HintStatus(ByValue, enum.IntEnum):
@@ -510,6 +512,33 @@ class MultiData(typing.TypedDict):
     race_mode: int
 
 
+class MultiDataFormat(enum.IntEnum):
+    """Version byte at the start of a multidata (.archipelago) file, telling how the pickled rest is compressed."""
+    ZLIB = 3
+    LZMA = 4
+
+
+def compress_multidata(data: bytes, codec: str = "zlib", level: int = 9) -> bytes:
+    """Compress pickled multidata with codec "zlib" or "lzma" and prefix it with its MultiDataFormat.
+    Levels go from 0, fastest, to 9, smallest."""
+    multidata_format = MultiDataFormat[codec.upper()]
+    if multidata_format == MultiDataFormat.LZMA:
+        compressed = lzma.compress(data, preset=level)
+    else:
+        compressed = zlib.compress(data, level)
+    return bytes([multidata_format]) + compressed
+
+
+def decompress_multidata(data: bytes) -> bytes:
+    """Decompress a multidata file to the pickled multidata."""
+    format_version = data[0]
+    if format_version <= MultiDataFormat.ZLIB:  # earlier versions only differ in their content
+        return zlib.decompress(data[1:])
+    if format_version == MultiDataFormat.LZMA:
+        return lzma.decompress(data[1:])
+    raise VersionException("Incompatible multidata.")
+
+
 if typing.TYPE_CHECKING:  # type-check with pure python implementation until we have a typing stub
     LocationStore = _LocationStore
 else:
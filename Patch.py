@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import os
 import sys
-from typing import Tuple, Optional, TypedDict
+from typing import Iterable, List, Tuple, Optional, Type, TypedDict, cast
 
 if __name__ == "__main__":
     import ModuleUpdate
@@ -29,7 +29,43 @@ def create_rom_file(patch_file: str) -> Tuple[RomMeta, str]:
     raise NotImplementedError(f"No Handler for {patch_file} found.")
 
 
+def _get_target(patch_file: str) -> str:
+    auto_handler = AutoPatchRegister.get_handler(patch_file)
+    if not auto_handler:
+        raise NotImplementedError(f"No Handler for {patch_file} found.")
+    handler_type = cast(Type[APAutoPatchInterface], auto_handler)
+    return os.path.splitext(patch_file)[0] + handler_type.result_file_ending
+
+
+def create_rom_files(patch_files: Iterable[str], processes: Optional[int] = None) -> List[Tuple[RomMeta, str]]:
+    """
+    Patches many files in a pool of `processes` processes, in the order given.
+    Each process loads every base file it needs only once. Raises ValueError if several patches would write the same
+    file, before patching anything.
+    """
+    import concurrent.futures
+    import multiprocessing
+
+    patch_files = list(patch_files)
+    targets = [_get_target(patch_file) for patch_file in patch_files]
+    duplicates = {target for target in targets if targets.count(target) > 1}
+    if duplicates:
+        raise ValueError(f"Several patches would be written to {', '.join(sorted(duplicates))}.")
+    if not patch_files:
+        return []
+
+    processes = min(processes or os.cpu_count() or 1, len(patch_files))
+    # spawn, so workers don't inherit state like open windows or event loops from the caller
+    with concurrent.futures.ProcessPoolExecutor(processes, multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(create_rom_file, patch_files))
+
+
 if __name__ == "__main__":
-    for file in sys.argv[1:]:
-        meta_data, result_file = create_rom_file(file)
+    import multiprocessing
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 2:
+        results = create_rom_files(sys.argv[1:])
+    else:
+        results = [create_rom_file(file) for file in sys.argv[1:]]
+    for meta_data, result_file in results:
         print(f"Patch with meta-data {meta_data} was written to {result_file}")
@@ -0,0 +1,149 @@
+"""
+Structured timing of generation, turned on by Generate's --profile.
+
+Code that wants to show up in the report wraps itself in `section(kind, name, player)` or decorates itself with
+`profiled`, which do nothing unless a GenerationProfiler is active. Sections are aggregated by kind, name and player
+and their times are inclusive, so the time of a step contains the time of its worlds.
+"""
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import functools
+import inspect
+import json
+import sys
+import threading
+import time
+import typing
+from dataclasses import asdict, dataclass
+
+__all__ = ["GenerationProfiler", "Timing", "section", "profiled", "get_profiler"]
+
+
+@dataclass
+class Timing:
+    calls: int = 0
+    wall: float = 0
+    """seconds passed"""
+    cpu: float = 0
+    """CPU seconds used by the thread that ran the section"""
+    allocated_blocks: int = 0
+    """net change in memory blocks allocated by the interpreter, a rough measure of allocations kept alive"""
+
+
+class GenerationProfiler:
+    """Collects Timings of sections and optionally a cProfile of the thread that started it."""
+
+    def __init__(self, use_cprofile: bool = False) -> None:
+        self.timings: dict[tuple[str, str, int], Timing] = {}
+        self.lock = threading.Lock()
+        self.cprofile = cProfile.Profile() if use_cprofile else None
+        self.start_wall = 0.0
+        self.start_cpu = 0.0
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def __enter__(self) -> GenerationProfiler:
+        global _profiler
+        assert _profiler is None, "Another GenerationProfiler is already active"
+        _profiler = self
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        if self.cprofile:
+            self.cprofile.enable()
+        return self
+
+    def __exit__(self, *args: typing.Any) -> None:
+        global _profiler
+        if self.cprofile:
+            self.cprofile.disable()
+        self.wall = time.perf_counter() - self.start_wall
+        self.cpu = time.process_time() - self.start_cpu
+        _profiler = None
+
+    def add(self, kind: str, name: str, player: int, wall: float, cpu: float, allocated_blocks: int) -> None:
+        with self.lock:
+            timing = self.timings.get((kind, name, player))
+            if timing is None:
+                timing = self.timings[kind, name, player] = Timing()
+            timing.calls += 1
+            timing.wall += wall
+            timing.cpu += cpu
+            timing.allocated_blocks += allocated_blocks
+
+    def get_report(self, player_names: typing.Mapping[int, str] | None = None) -> dict[str, typing.Any]:
+        """Timings as JSON compatible data, slowest first within each kind."""
+        sections = []
+        with self.lock:
+            for (kind, name, player), timing in self.timings.items():
+                entry: dict[str, typing.Any] = {"kind": kind, "name": name}
+                if player:
+                    entry["player"] = player
+                    if player_names and player in player_names:
+                        entry["player_name"] = player_names[player]
+                entry.update(asdict(timing))
+                sections.append(entry)
+        sections.sort(key=lambda entry: (entry["kind"], -entry["wall"]))
+        return {"wall": self.wall, "cpu": self.cpu, "sections": sections}
+
+    def write_report(self, path: str, player_names: typing.Mapping[int, str] | None = None) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.get_report(player_names), f, indent=1)
+
+    def write_cprofile(self, path: str) -> None:
+        """Write cProfile stats in the pstats format, to be viewed with pstats, snakeviz or similar tools."""
+        assert self.cprofile, "GenerationProfiler was created without cProfile"
+        self.cprofile.dump_stats(path)
+
+
+_profiler: GenerationProfiler | None = None
+_F = typing.TypeVar("_F", bound=typing.Callable[..., typing.Any])
+
+
+def get_profiler() -> GenerationProfiler | None:
+    return _profiler
+
+
+@contextlib.contextmanager
+def _section(profiler: GenerationProfiler, kind: str, name: str, player: int) -> typing.Iterator[None]:
+    blocks = sys.getallocatedblocks()
+    cpu = time.thread_time()
+    wall = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.add(kind, name, player, time.perf_counter() - wall, time.thread_time() - cpu,
+                     sys.getallocatedblocks() - blocks)
+
+
+def section(kind: str, name: str, player: int = 0) -> typing.ContextManager[None]:
+    """Time the contained code as section name of kind, optionally for a player, if a profiler is active."""
+    profiler = _profiler
+    if profiler is None:
+        return contextlib.nullcontext()
+    return _section(profiler, kind, name, player)
+
+
+def profiled(kind: str, name_parameter: str | None = None) -> typing.Callable[[_F], _F]:
+    """Decorator to time calls of a function as a section of kind, named after the function or the value of its
+    argument name_parameter."""
+    def decorator(function: _F) -> _F:
+        signature = inspect.signature(function) if name_parameter else None
+
+        @functools.wraps(function)
+        def wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            profiler = _profiler
+            if profiler is None:
+                return function(*args, **kwargs)
+            name = function.__name__
+            if signature:
+                arguments = signature.bind(*args, **kwargs)
+                arguments.apply_defaults()
+                name = str(arguments.arguments[name_parameter])
+            with _section(profiler, kind, name, 0):
+                return function(*args, **kwargs)
+
+        return typing.cast(_F, wrapper)
+
+    return decorator
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import bisect
 import sys
 import threading
 import time
@@ -515,47 +516,102 @@ async def snes_recv_loop(ctx: SNIContext) -> None:
             ctx.snes_autoreconnect_task = asyncio.create_task(snes_autoreconnect(ctx), name="snes auto-reconnect")
 
 
-async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional[bytes]:
-    try:
-        await ctx.snes_request_lock.acquire()
+async def _snes_get_addresses(ctx: SNIContext, ranges: typing.Sequence[typing.Tuple[int, int]]) \
+        -> typing.Optional[bytes]:
+    """Send a GetAddress request for each (address, size) in ranges, then receive all of their data in order.
+    Has to be called while holding snes_request_lock."""
+    if (
+        ctx.snes_state != SNESState.SNES_ATTACHED or
+        ctx.snes_socket is None or
+        not ctx.snes_socket.open or
+        ctx.snes_socket.closed
+    ):
+        return None
 
-        if (
-            ctx.snes_state != SNESState.SNES_ATTACHED or
-            ctx.snes_socket is None or
-            not ctx.snes_socket.open or
-            ctx.snes_socket.closed
-        ):
-            return None
+    try:
+        # send all requests before waiting for data, so there is only one round trip
+        for address, size in ranges:
+            GetAddress_Request: SNESRequest = {
+                "Opcode": "GetAddress",
+                "Space": "SNES",
+                "Operands": [hex(address)[2:], hex(size)[2:]]
+            }
+            await ctx.snes_socket.send(dumps(GetAddress_Request))
+    except ConnectionClosed:
+        return None
 
-        GetAddress_Request: SNESRequest = {
-            "Opcode": "GetAddress",
-            "Space": "SNES",
-            "Operands": [hex(address)[2:], hex(size)[2:]]
-        }
+    total_size = sum(size for _, size in ranges)
+    data: bytes = bytes()
+    while len(data) < total_size:
         try:
-            await ctx.snes_socket.send(dumps(GetAddress_Request))
-        except ConnectionClosed:
-            return None
+            data += await asyncio.wait_for(ctx.snes_recv_queue.get(), 5)
+        except asyncio.TimeoutError:
+            break
 
-        data: bytes = bytes()
-        while len(data) < size:
-            try:
-                data += await asyncio.wait_for(ctx.snes_recv_queue.get(), 5)
-            except asyncio.TimeoutError:
-                break
-
-        if len(data) != size:
-            snes_logger.error('Error reading %s, requested %d bytes, received %d' % (hex(address), size, len(data)))
-            if len(data):
-                snes_logger.error(str(data))
-                snes_logger.warning('Communication Failure with SNI')
-            if ctx.snes_socket is not None and not ctx.snes_socket.closed:
-                await ctx.snes_socket.close()
-            return None
+    if len(data) != total_size:
+        snes_logger.error('Error reading %s, requested %d bytes, received %d' %
+                          (", ".join(hex(address) for address, _ in ranges), total_size, len(data)))
+        if len(data):
+            snes_logger.error(str(data))
+            snes_logger.warning('Communication Failure with SNI')
+        if ctx.snes_socket is not None and not ctx.snes_socket.closed:
+            await ctx.snes_socket.close()
+        return None
 
-        return data
-    finally:
-        ctx.snes_request_lock.release()
+    return data
+
+
+async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional[bytes]:
+    async with ctx.snes_request_lock:
+        return await _snes_get_addresses(ctx, ((address, size),))
+
+
+def merge_read_ranges(ranges: typing.Iterable[typing.Tuple[int, int]], max_gap: int = 0x10) \
+        -> typing.List[typing.Tuple[int, int]]:
+    """Merge (address, size) ranges that overlap or are at most max_gap bytes apart, sorted by address.
+    Reading a few bytes too many is cheaper than another request."""
+    merged: typing.List[typing.Tuple[int, int]] = []
+    for address, size in sorted(ranges):
+        if merged and address <= merged[-1][0] + merged[-1][1] + max_gap:
+            start, previous_size = merged[-1]
+            merged[-1] = (start, max(previous_size, address + size - start))
+        else:
+            merged.append((address, size))
+    return merged
+
+
+async def snes_read_ranges(ctx: SNIContext, ranges: typing.Sequence[typing.Tuple[int, int]],
+                           max_gap: int = 0x10) -> typing.Optional[typing.List[bytes]]:
+    """
+    Read many (address, size) ranges at once, for game watchers that poll lots of separate values.
+    Ranges close to each other are read together and all requests are sent in one go, while holding the request lock
+    once, so it takes a single round trip instead of one per range.
+
+    :param ranges: The (address, size) ranges to read.
+    :param max_gap: Up to how many bytes apart ranges are merged into one read.
+    :return: The data of each range, in the order of ranges, or None if reading failed.
+    """
+    merged = merge_read_ranges(ranges, max_gap)
+    if not merged:
+        return []
+    async with ctx.snes_request_lock:
+        data = await _snes_get_addresses(ctx, merged)
+    if data is None:
+        return None
+
+    # find each range's data in the merged read that contains it
+    offsets: typing.List[int] = []
+    offset = 0
+    for _, size in merged:
+        offsets.append(offset)
+        offset += size
+    starts = [address for address, _ in merged]
+    results: typing.List[bytes] = []
+    for address, size in ranges:
+        index = bisect.bisect_right(starts, address) - 1
+        start = offsets[index] + address - starts[index]
+        results.append(data[start:start + size])
+    return results
 
 
 async def snes_write(ctx: SNIContext, write_list: typing.List[typing.Tuple[int, bytes]]) -> bool:
@@ -275,7 +275,7 @@ async def process_undertale_cmd(ctx: UndertaleContext, cmd: str, args: dict):
         start_index = args["index"]
 
         if start_index == 0:
-            ctx.items_received = []
+            ctx.items_received.clear()
         elif start_index != len(ctx.items_received):
             sync_msg = [{"cmd": "Sync"}]
             if ctx.locations_checked:
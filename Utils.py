@@ -32,6 +32,7 @@ if typing.TYPE_CHECKING:
     import tkinter
     import pathlib
     from BaseClasses import Region
+    from DataPackageCache import DataPackageTables
     import multiprocessing
 
 
@@ -385,6 +386,49 @@ def store_data_package_for_checksum(game: str, data: typing.Dict[str, Any]) -> N
                 json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
         except Exception as e:
             logging.debug(f"Could not store data package: {e}")
+        _store_data_package_tables(os.path.join(game_folder, f"{checksum}.apdp"), data)
+
+
+def _store_data_package_tables(path: str, data: typing.Dict[str, Any]) -> None:
+    from DataPackageCache import dump_data_package_tables
+    try:
+        tables = dump_data_package_tables(data)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(tables)
+        # replace, so a client that has the tables mapped never sees them half written
+        os.replace(temp_path, path)
+    except Exception as e:
+        logging.debug(f"Could not store data package tables: {e}")
+
+
+def load_data_package_tables_for_checksum(game: str, checksum: typing.Optional[str]) -> Optional[DataPackageTables]:
+    """
+    Memory-mapped id -> name tables of a cached data package, to look up names without loading the whole package.
+    Tables missing next to a cached JSON data package get created from it. Returns None if nothing is cached.
+    """
+    from DataPackageCache import load_data_package_tables
+    if not checksum or not game:
+        return None
+    if checksum != get_file_safe_name(checksum):
+        raise ValueError(f"Bad symbols in checksum: {checksum}")
+    path = cache_path("datapackage", get_file_safe_name(game), f"{checksum}.apdp")
+    if os.path.exists(path):
+        try:
+            return load_data_package_tables(path)
+        except (OSError, ValueError) as e:
+            logging.debug(f"Could not load data package tables: {e}")
+
+    # (re)create the tables from the JSON data package
+    package = load_data_package_for_checksum(game, checksum)
+    if package.get("checksum") != checksum:
+        return None
+    _store_data_package_tables(path, package)
+    try:
+        return load_data_package_tables(path)
+    except (OSError, ValueError) as e:
+        logging.debug(f"Could not load data package tables: {e}")
+        return None
 
 
 def get_default_adjuster_settings(game_name: str) -> Namespace:
@@ -36,6 +36,12 @@ app.config["MAX_FORM_MEMORY_SIZE"] = 2 * 1024 * 1024  # 2 MB, needed for large o
 # custom config
 app.config["SELFHOST"] = True  # application process is in charge of running the websites
 app.config["GENERATORS"] = 8  # maximum concurrent world gens
+# additional generator processes reserved for expensive gens, so they don't block small ones. 0 disables the lane.
+app.config["LARGE_GENERATORS"] = 1
+# estimated cost above which a gen is run on the large lane, roughly the amount of average sized worlds
+app.config["LARGE_GENERATION_COST"] = 30
+# relative cost per slot of specific games used for estimating, None uses built-in defaults
+app.config["GENERATION_GAME_COSTS"] = None
 app.config["HOSTERS"] = 8  # maximum concurrent room hosters
 app.config["SELFLAUNCH"] = True  # application process is in charge of launching Rooms.
 app.config["SELFLAUNCHCERT"] = None  # can point to a SSL Certificate to encrypt Room websocket connections
@@ -58,6 +64,9 @@ app.config["PONY"] = {
     'create_db': True
 }
 app.config["MAX_ROLL"] = 20
+# memory in bytes for keeping patch files with rewritten server address, per process
+app.config["PATCH_CACHE_SIZE"] = 64 * 1024 * 1024
+# SimpleCache is per process, configure a shared backend to let multiple web workers reuse rendered trackers
 app.config["CACHE_TYPE"] = "SimpleCache"
 app.config["HOST_ADDRESS"] = ""
 app.config["ASSET_RIGHTS"] = False
@@ -3,13 +3,14 @@ from uuid import UUID
 
 from flask import request, session, url_for
 from markupsafe import Markup
-from pony.orm import commit
+from pony.orm import commit, count
 
 from Utils import restricted_dumps
 from WebHostLib import app
 from WebHostLib.check import get_yaml_data, roll_options
 from WebHostLib.generate import get_meta
-from WebHostLib.models import Generation, STATE_QUEUED, Seed, STATE_ERROR
+from WebHostLib.models import Generation, STATE_QUEUED, STATE_STARTED, Seed, STATE_ERROR
+from WebHostLib.scheduler import get_scheduler
 from . import api_endpoints
 
 
@@ -83,3 +84,14 @@ def wait_seed_api(seed: UUID):
     elif generation.state == STATE_ERROR:
         return {"text": "Generation failed"}, 500
     return {"text": "Generation running"}, 202
+
+
+@api_endpoints.route('/generation_queue')
+def generation_queue_api():
+    scheduler = get_scheduler()
+    return {
+        "queued": count(generation for generation in Generation if generation.state == STATE_QUEUED),
+        "running": count(generation for generation in Generation if generation.state == STATE_STARTED),
+        # lane metrics are only known to the process running autogen
+        "lanes": scheduler.get_metrics() if scheduler else {},
+    }
@@ -1,14 +1,14 @@
 from datetime import datetime, timezone
-from typing import Any, TypedDict
+from typing import Any, Callable, TypedDict
 from uuid import UUID
 
-from flask import abort
+from flask import Response, abort, request
 
 from NetUtils import ClientStatus, Hint, NetworkItem, SlotType
-from WebHostLib import cache
+from WebHostLib import app, cache
 from WebHostLib.api import api_endpoints
 from WebHostLib.models import Room
-from WebHostLib.tracker import TrackerData
+from WebHostLib.tracker import TrackerData, get_static_tracker_etag, get_tracker_etag
 
 
 class PlayerAlias(TypedDict):
@@ -64,9 +64,30 @@ class PlayerGame(TypedDict):
     game: str
 
 
+def _get_room(tracker: UUID) -> Room:
+    room: Room | None = Room.get(tracker=tracker)
+    if not room:
+        abort(404)
+    return room
+
+
+def _conditional_json_response(key: str, etag: str, timeout: int, build: Callable[[], Any]) -> Response:
+    """Answers with 304 if the client already has the current version, else with the serialized result of build.
+    The serialized json is stored in the cache under key, so it is only built once per version and cache backend."""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        data: str | None = cache.get(key)
+        if data is None:
+            data = app.json.dumps(build())
+            cache.set(key, data, timeout)
+        response = Response(data, mimetype=app.json.mimetype)
+    response.set_etag(etag)
+    return response
+
+
 @api_endpoints.route("/tracker/<suuid:tracker>")
-@cache.memoize(timeout=60)
-def tracker_data(tracker: UUID) -> dict[str, Any]:
+def tracker_data(tracker: UUID) -> Response:
     """
     Outputs json data to <root_path>/api/tracker/<id of current session tracker>.
 
@@ -74,10 +95,12 @@ def tracker_data(tracker: UUID) -> dict[str, Any]:
 
     :return: Tracking data for all players in the room. Typing and docstrings describe the format of each value.
     """
-    room: Room | None = Room.get(tracker=tracker)
-    if not room:
-        abort(404)
+    room = _get_room(tracker)
+    etag = get_tracker_etag(room)
+    return _conditional_json_response(f"api_tracker_{tracker}_{etag}", etag, 300, lambda: _get_tracker_data(room))
+
 
+def _get_tracker_data(room: Room) -> dict[str, Any]:
     tracker_data = TrackerData(room)
 
     all_players: dict[int, list[int]] = tracker_data.get_all_players()
@@ -179,8 +202,7 @@ class PlayerSlotData(TypedDict):
 
 
 @api_endpoints.route("/static_tracker/<suuid:tracker>")
-@cache.memoize(timeout=300)
-def static_tracker_data(tracker: UUID) -> dict[str, Any]:
+def static_tracker_data(tracker: UUID) -> Response:
     """
     Outputs json data to <root_path>/api/static_tracker/<id of current session tracker>.
 
@@ -188,9 +210,13 @@ def static_tracker_data(tracker: UUID) -> dict[str, Any]:
 
     :return: Static tracking data for all players in the room. Typing and docstrings describe the format of each value.
     """
-    room: Room | None = Room.get(tracker=tracker)
-    if not room:
-        abort(404)
+    room = _get_room(tracker)
+    etag = get_static_tracker_etag(room)
+    return _conditional_json_response(f"api_static_tracker_{tracker}_{etag}", etag, 300,
+                                      lambda: _get_static_tracker_data(room))
+
+
+def _get_static_tracker_data(room: Room) -> dict[str, Any]:
     tracker_data = TrackerData(room)
 
     all_players: dict[int, list[int]] = tracker_data.get_all_players()
@@ -232,8 +258,7 @@ def static_tracker_data(tracker: UUID) -> dict[str, Any]:
 
 # It should be exceedingly rare that slot data is needed, so it's separated out.
 @api_endpoints.route("/slot_data_tracker/<suuid:tracker>")
-@cache.memoize(timeout=300)
-def tracker_slot_data(tracker: UUID) -> list[PlayerSlotData]:
+def tracker_slot_data(tracker: UUID) -> Response:
     """
     Outputs json data to <root_path>/api/slot_data_tracker/<id of current session tracker>.
 
@@ -241,9 +266,13 @@ def tracker_slot_data(tracker: UUID) -> list[PlayerSlotData]:
 
     :return: Slot data for all players in the room. Typing completely arbitrary per game.
     """
-    room: Room | None = Room.get(tracker=tracker)
-    if not room:
-        abort(404)
+    room = _get_room(tracker)
+    etag = get_static_tracker_etag(room)
+    return _conditional_json_response(f"api_slot_data_tracker_{tracker}_{etag}", etag, 300,
+                                      lambda: _get_tracker_slot_data(room))
+
+
+def _get_tracker_slot_data(room: Room) -> list[PlayerSlotData]:
     tracker_data = TrackerData(room)
 
     all_players: dict[int, list[int]] = tracker_data.get_all_players()
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import contextlib
+import functools
 import json
 import logging
 import multiprocessing
@@ -13,6 +15,7 @@ from pony.orm import db_session, select, commit, PrimaryKey
 
 from Utils import restricted_loads
 from .locker import Locker, AlreadyRunningException
+from .scheduler import GenerationScheduler, Lane, set_scheduler
 
 _stop_event = Event()
 
@@ -52,7 +55,18 @@ def _mp_gen_game(
         setproctitle(f"Generator (idle)")
 
 
-def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation, timeout: int|None) -> None:
+def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation, timeout: int|None,
+                     on_done: typing.Callable[[], None] | None = None) -> None:
+    def success(seed_id) -> None:
+        if on_done:
+            on_done()
+        handle_generation_success(seed_id)
+
+    def failure(result: BaseException) -> None:
+        if on_done:
+            on_done()
+        handle_generation_failure(result)
+
     try:
         meta = json.loads(generation.meta)
         options = restricted_loads(generation.options)
@@ -66,10 +80,12 @@ def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation, ti
                 "owner": generation.owner,
                 "timeout": timeout,
             },
-            handle_generation_success,
-            handle_generation_failure,
+            success,
+            failure,
         )
     except Exception as e:
+        if on_done:
+            on_done()
         generation.state = STATE_ERROR
         commit()
         logging.exception(e)
@@ -97,6 +113,7 @@ def init_generator(config: dict[str, Any]) -> None:
 
     pony_config = config["PONY"]
     db.bind(**pony_config)
+    add_missing_columns()
     db.generate_mapping()
 
 
@@ -105,10 +122,13 @@ def cleanup():
     with db_session:
         # >>> bool(uuid.UUID(int=0))
         # True
+        room_ids = select(room.id for room in Room if room.owner == UUID(int=0))[:]
         rooms = Room.select(lambda room: room.owner == UUID(int=0)).delete(bulk=True)
         seeds = Seed.select(lambda seed: seed.owner == UUID(int=0) and not seed.rooms).delete(bulk=True)
         slots = Slot.select(lambda slot: not slot.seed).delete(bulk=True)
         # Command gets deleted by ponyorm Cascade Delete, as Room is Required
+    for room_id in room_ids:
+        remove_events(room_id)
     if rooms or seeds or slots:
         logging.info(f"{rooms} Rooms, {seeds} Seeds and {slots} Slots have been deleted.")
 
@@ -119,6 +139,7 @@ def autohost(config: dict):
         try:
             with Locker("autohost"):
                 cleanup()
+                backfill_game_statistics()
                 hosters = []
                 for x in range(config["HOSTERS"]):
                     hoster = MultiworldInstance(config, x)
@@ -145,36 +166,50 @@ def autogen(config: dict):
     def keep_running():
         stop_event = _stop_event
         try:
-            with Locker("autogen"):
+            with Locker("autogen"), contextlib.ExitStack() as pools:
+                def create_pool(processes: int) -> multiprocessing.pool.Pool:
+                    return pools.enter_context(multiprocessing.Pool(processes, initializer=init_generator,
+                                                                    initargs=(config,), maxtasksperchild=10))
+
+                job_time = config["JOB_TIME"]
+                lanes = [Lane("fast", create_pool(config["GENERATORS"]), config["GENERATORS"],
+                              config["LARGE_GENERATION_COST"] if config["LARGE_GENERATORS"] else float("inf"))]
+                if config["LARGE_GENERATORS"]:
+                    lanes.append(Lane("large", create_pool(config["LARGE_GENERATORS"]), config["LARGE_GENERATORS"]))
+                scheduler = GenerationScheduler(lanes, job_time, config["GENERATION_GAME_COSTS"])
+                set_scheduler(scheduler)
+
+                def launch(lane: Lane, generation: Generation) -> None:
+                    launch_generator(lane.pool, generation, timeout=job_time,
+                                     on_done=functools.partial(scheduler.finish, lane, generation.id))
+
+                with db_session:
+                    to_start = select(generation for generation in Generation if generation.state == STATE_STARTED)
+
+                    if to_start:
+                        logging.info("Resuming generation")
+                        for generation in to_start:
+                            sid = Seed.get(id=generation.id)
+                            if sid:
+                                generation.delete()
+                            else:
+                                launch(scheduler.resume(generation), generation)
+
+                        commit()
+                    select(generation for generation in Generation if generation.state == STATE_ERROR).delete()
 
-                with multiprocessing.Pool(config["GENERATORS"], initializer=init_generator,
-                                          initargs=(config,), maxtasksperchild=10) as generator_pool:
-                    job_time = config["JOB_TIME"]
+                while not stop_event.wait(0.1):
                     with db_session:
-                        to_start = select(generation for generation in Generation if generation.state == STATE_STARTED)
-
-                        if to_start:
-                            logging.info("Resuming generation")
-                            for generation in to_start:
-                                sid = Seed.get(id=generation.id)
-                                if sid:
-                                    generation.delete()
-                                else:
-                                    launch_generator(generator_pool, generation, timeout=job_time)
-
-                            commit()
-                        select(generation for generation in Generation if generation.state == STATE_ERROR).delete()
-
-                    while not stop_event.wait(0.1):
-                        with db_session:
-                            # for update locks the database row(s) during transaction, preventing writes from elsewhere
-                            to_start = select(
-                                generation for generation in Generation
-                                if generation.state == STATE_QUEUED).for_update()
-                            for generation in to_start:
-                                launch_generator(generator_pool, generation, timeout=job_time)
+                        # for update locks the database row(s) during transaction, preventing writes from elsewhere
+                        to_start = select(
+                            generation for generation in Generation
+                            if generation.state == STATE_QUEUED).for_update()
+                        for lane, generation in scheduler.schedule(to_start):
+                            launch(lane, generation)
         except AlreadyRunningException:
             logging.info("Autogen reports as already running, not starting another.")
+        finally:
+            set_scheduler(None)
 
     Thread(target=keep_running, name="AP_Autogen").start()
 
@@ -225,6 +260,8 @@ class MultiworldInstance():
         self.process = None
 
 
-from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
+from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot, add_missing_columns
 from .customserver import run_server_process, get_static_server_data
+from .events import remove_events
 from .generate import gen_game
+from .stats import backfill_game_statistics
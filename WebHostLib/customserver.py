@@ -19,11 +19,13 @@ from pony.orm import commit, db_session, select
 
 import Utils
 
+from NetUtils import NetworkItem
 from MultiServer import (
     Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert,
     server_per_message_deflate_factory,
 )
 from Utils import restricted_loads, cache_argsless
+from .events import publish_event, remove_events
 from .locker import Locker
 from .models import Command, GameDataPackage, Room, db
 
@@ -83,6 +85,24 @@ class WebHostContext(Context):
         except ImportError:
             self.logger.debug("Context destroyed")
 
+    def on_location_checks(self, team: int, slot: int, new_locations: typing.Set[int]):
+        super().on_location_checks(team, slot, new_locations)
+        publish_event(self.room_id, "check", {"team": team, "player": slot, "locations": sorted(new_locations),
+                                              "checked": len(self.location_checks[team, slot])})
+
+    def on_items_received(self, team: int, slot: int, items: typing.Sequence[NetworkItem]):
+        super().on_items_received(team, slot, items)
+        publish_event(self.room_id, "received", {"team": team, "player": slot, "items": items})
+
+    def on_changed_hints(self, team: int, slot: int):
+        super().on_changed_hints(team, slot)
+        publish_event(self.room_id, "hints", {"team": team, "player": slot, "hints": len(self.hints[team, slot])})
+
+    def on_client_status_change(self, team: int, slot: int):
+        super().on_client_status_change(team, slot)
+        publish_event(self.room_id, "status",
+                      {"team": team, "player": slot, "status": self.client_game_state[team, slot]})
+
     def _load_game_data(self):
         for key, value in self.static_server_data.items():
             # NOTE: attributes are mutable and shared, so they will have to be copied before being modified
@@ -165,6 +185,7 @@ class WebHostContext(Context):
         room = Room.get(id=self.room_id)
         # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
         room.multisave = pickle.dumps(self.get_save())
+        room.save_version += 1
         # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
         if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
             room.last_activity = datetime.datetime.utcnow()
@@ -280,6 +301,7 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
         with Locker(f"RoomLocker {room_id}"):
             try:
                 logger = set_up_logging(room_id)
+                remove_events(room_id)  # left behind if the previous run of the room crashed
                 ctx = WebHostContext(static_server_data, logger)
                 ctx.load(room_id)
                 ctx.init_save()
@@ -349,6 +371,7 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                         room.last_activity = datetime.datetime.utcnow() - \
                                              datetime.timedelta(minutes=1, seconds=room.timeout)
                     del room
+                    remove_events(room_id)
                     logging.info(f"Shutting down room {room_id} on {name}.")
                 finally:
                     await asyncio.sleep(5)
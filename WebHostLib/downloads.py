@@ -1,6 +1,10 @@
+import copy
 import json
+import threading
 import zipfile
+from collections import OrderedDict
 from io import BytesIO
+from typing import BinaryIO
 
 from flask import send_file, Response, render_template
 from pony.orm import select
@@ -10,6 +14,89 @@ from . import app, cache
 from .models import Slot, Room, Seed
 
 
+def replace_zip_member(source: BinaryIO, target: BinaryIO, name: str, data: bytes) -> None:
+    """Write a copy of the zip in source to target, with the contents of member name replaced by data.
+    All other members are copied verbatim, without decompressing and recompressing them."""
+    with zipfile.ZipFile(source, "r") as source_zip, zipfile.ZipFile(target, "w") as target_zip:
+        infos = sorted(source_zip.infolist(), key=lambda info: info.header_offset)
+        # a member's local header, data and data descriptor span until the next member or the central directory
+        ends = [info.header_offset for info in infos[1:]] + [source_zip.start_dir]
+        for info, end in zip(infos, ends):
+            if info.filename == name:
+                continue
+            source.seek(info.header_offset)
+            copied_info = copy.copy(info)
+            copied_info.header_offset = target.tell()
+            remaining = end - info.header_offset
+            while remaining:
+                chunk = source.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    raise zipfile.BadZipFile(f"Truncated member {info.filename}")
+                target.write(chunk)
+                remaining -= len(chunk)
+            target_zip.filelist.append(copied_info)
+            target_zip.NameToInfo[copied_info.filename] = copied_info
+            target_zip.start_dir = target.tell()
+        target_zip.writestr(name, data, zipfile.ZIP_DEFLATED)
+
+
+class PatchCache:
+    """Small LRU cache of patch files with their server address rewritten, keyed by (slot id, port)."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self.entries: OrderedDict[tuple[int, int], tuple[bytes, str]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple[int, int]) -> tuple[bytes, str] | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple[int, int], data: bytes, patch_file_ending: str) -> None:
+        if len(data) > self.max_size:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old:
+                self.size -= len(old[0])
+            self.entries[key] = data, patch_file_ending
+            self.size += len(data)
+            while self.size > self.max_size:
+                _, (evicted, _) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+patch_cache = PatchCache(app.config["PATCH_CACHE_SIZE"])
+
+
+def get_patch_with_server(patch: Slot, last_port: int) -> tuple[bytes, str] | None:
+    """Returns the patch file of a slot pointing at the room's server and its file ending,
+    or None for patches older than version 3."""
+    cached = patch_cache.get((patch.id, last_port))
+    if cached:
+        return cached
+    filelike = BytesIO(patch.data)
+    if not zipfile.is_zipfile(filelike):
+        return None
+    with zipfile.ZipFile(filelike) as zf:
+        with zf.open("archipelago.json", "r") as f:
+            manifest = json.load(f)
+    manifest["server"] = f"{app.config['HOST_ADDRESS']}:{last_port}" if last_port else None
+    if "patch_file_ending" in manifest:
+        patch_file_ending = manifest["patch_file_ending"]
+    else:
+        patch_file_ending = AutoPatchRegister.patch_types[patch.game].patch_file_ending
+    new_file = BytesIO()
+    replace_zip_member(filelike, new_file, "archipelago.json", json.dumps(manifest).encode("utf-8"))
+    data = new_file.getvalue()
+    patch_cache.put((patch.id, last_port), data, patch_file_ending)
+    return data, patch_file_ending
+
+
 @app.route("/dl_patch/<suuid:room_id>/<int:patch_id>")
 def download_patch(room_id, patch_id):
     patch = Slot.get(id=patch_id)
@@ -17,30 +104,12 @@ def download_patch(room_id, patch_id):
         return "Patch not found"
     else:
         room = Room.get(id=room_id)
-        last_port = room.last_port
-        filelike = BytesIO(patch.data)
-        greater_than_version_3 = zipfile.is_zipfile(filelike)
-        if greater_than_version_3:
-            # Python's zipfile module cannot overwrite/delete files in a zip, so we recreate the whole thing in ram
-            new_file = BytesIO()
-            with zipfile.ZipFile(filelike, "a") as zf:
-                with zf.open("archipelago.json", "r") as f:
-                    manifest = json.load(f)
-                manifest["server"] = f"{app.config['HOST_ADDRESS']}:{last_port}" if last_port else None
-                with zipfile.ZipFile(new_file, "w") as new_zip:
-                    for file in zf.infolist():
-                        if file.filename == "archipelago.json":
-                            new_zip.writestr("archipelago.json", json.dumps(manifest))
-                        else:
-                            new_zip.writestr(file.filename, zf.read(file), file.compress_type, 9)
-            if "patch_file_ending" in manifest:
-                patch_file_ending = manifest["patch_file_ending"]
-            else:
-                patch_file_ending = AutoPatchRegister.patch_types[patch.game].patch_file_ending
+        result = get_patch_with_server(patch, room.last_port)
+        if result:
+            data, patch_file_ending = result
             fname = f"P{patch.player_id}_{patch.player_name}_{app.jinja_env.filters['suuid'](room_id)}" \
                     f"{patch_file_ending}"
-            new_file.seek(0)
-            return send_file(new_file, as_attachment=True, download_name=fname)
+            return send_file(BytesIO(data), as_attachment=True, download_name=fname)
         else:
             return "Old Patch file, no longer compatible."
 
@@ -0,0 +1,163 @@
+"""Live room events, published by the room server and polled by trackers and the room page."""
+import json
+import logging
+import os
+from typing import Any, Optional
+from uuid import UUID
+
+from flask import Response, abort, jsonify, request, session
+
+from Utils import user_path
+from . import app
+from .models import Room
+
+# bytes after which the room server starts a new event file, pollers of the previous one get told to reset
+EVENTS_FILE_SIZE_LIMIT = 1024 * 1024
+
+
+def get_events_path(room_id: UUID) -> str:
+    return user_path("logs", f"{room_id}.events.txt")
+
+
+def get_log_path(room_id: UUID) -> str:
+    return user_path("logs", f"{room_id}.txt")
+
+
+def publish_event(room_id: UUID, event: str, data: Any) -> None:
+    """Append an event to the room's event file, to be picked up by all pollers of the room."""
+    path = get_events_path(room_id)
+    try:
+        if _stat(path)[1] >= EVENTS_FILE_SIZE_LIMIT:
+            # replace instead of unlinking, so the new file can't reuse the inode identifying the previous one
+            with open(path + ".tmp", "w"):
+                pass
+            os.replace(path + ".tmp", path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"event": event, "data": data}, separators=(",", ":")) + "\n")
+    except OSError as e:
+        # live events are a nicety, never let them take down the room
+        logging.warning(f"Could not publish {event} event for room {room_id}: {e}")
+
+
+def remove_events(room_id: UUID) -> None:
+    """Delete the room's event file, as its events are only of interest while the room is running."""
+    try:
+        os.unlink(get_events_path(room_id))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logging.warning(f"Could not remove events of room {room_id}: {e}")
+
+
+def _read_new_lines(path: str, offset: int) -> Optional[tuple[list[bytes], int]]:
+    """
+    Read complete lines after offset, returning them and the offset after the last complete line.
+    Returns None if offset is not at the start of a line.
+    """
+    try:
+        with open(path, "rb") as f:
+            if offset:
+                f.seek(offset - 1)
+                if f.read(1) != b"\n":
+                    return None
+            data = f.read()
+    except FileNotFoundError:
+        return [], offset
+    end = data.rfind(b"\n") + 1
+    return data[:end].splitlines(), offset + end
+
+
+def _stat(path: str) -> tuple[int, int]:
+    """The inode, which changes when the room server starts a new file, and the size of a file."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return 0, 0
+    return stat.st_ino, stat.st_size
+
+
+def _get_log_offset(path: str, offset: int) -> int:
+    """Turn an offset into the log as served by display_log, which skips the BOM, into a file offset."""
+    try:
+        with open(path, "rb") as f:
+            return offset + (3 if f.read(3) == b"\xEF\xBB\xBF" else 0)
+    except FileNotFoundError:
+        return 0
+
+
+def _poll_events(room: Room, include_log: bool) -> Response:
+    """
+    Events of the room published after the cursor argument, which is the cursor returned by the previous poll.
+    The ETag is the cursor after all current events, so polling with If-None-Match costs a stat call per file
+    while nothing happens. If events were lost, because the room restarted or its event file reached
+    EVENTS_FILE_SIZE_LIMIT, the response has reset set and contains the events of the new file.
+    With include_log, new lines of the room's log are included as log events.
+    """
+    events_path = get_events_path(room.id)
+    log_path = get_log_path(room.id)
+    generation, size = _stat(events_path)
+    current = [generation, size]
+    if include_log:
+        current.append(_stat(log_path)[1])
+    etag = "-".join(map(str, current))
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    try:
+        cursor = [int(value) for value in request.args["cursor"].split("-")]
+    except (KeyError, ValueError):
+        cursor = []
+    reset = False
+    if len(cursor) != len(current):
+        # new poller, only send what happens from now on, or from where the room page's rendered log ended
+        offset = size
+        log_offset = current[-1] if include_log else 0
+        log_start = request.args.get("log_offset", type=int)
+        if include_log and log_start is not None:
+            log_offset = _get_log_offset(log_path, log_start)
+    else:
+        offset = cursor[1]
+        log_offset = cursor[-1]
+        if cursor[0] != generation or not 0 <= offset <= size:
+            reset = True
+            offset = 0
+
+    lines = _read_new_lines(events_path, offset)
+    if lines is None:
+        reset = True
+        lines = _read_new_lines(events_path, 0)
+        assert lines is not None
+    events_lines, offset = lines
+    events = [json.loads(line) for line in events_lines]
+    cursor = [generation, offset]
+    if include_log:
+        # the log is never replaced, so a cursor into the middle of a line just resyncs to its end
+        log_lines, log_offset = _read_new_lines(log_path, log_offset) or ([], current[-1])
+        events.extend({"event": "log", "data": line.decode("utf-8-sig", errors="replace")} for line in log_lines)
+        cursor.append(log_offset)
+
+    cursor_text = "-".join(map(str, cursor))
+    response = jsonify(cursor=cursor_text, reset=reset, events=events)
+    response.headers["Cache-Control"] = "no-cache"
+    response.set_etag(cursor_text)
+    return response
+
+
+@app.route("/room/<suuid:room>/events")
+def room_events(room: UUID) -> Response:
+    """Events of the room, including its log lines for the room's owner."""
+    room = Room.get(id=room)
+    if room is None:
+        abort(404)
+    return _poll_events(room, room.owner == session["_id"])
+
+
+@app.route("/tracker/<suuid:tracker>/events")
+def tracker_events(tracker: UUID) -> Response:
+    """Events of the room belonging to a tracker."""
+    room = Room.get(tracker=tracker)
+    if room is None:
+        abort(404)
+    return _poll_events(room, False)
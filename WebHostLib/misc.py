@@ -13,6 +13,7 @@ from worlds.AutoWorld import AutoWorldRegister, World
 from . import app, cache
 from .markdown import render_markdown
 from .models import Seed, Room, Command, UUID, uuid4
+from .stats import add_room_statistics
 from Utils import title_sorted
 
 class WebWorldTheme(StrEnum):
@@ -170,7 +171,9 @@ def new_room(seed: UUID):
         abort(404)
     room = Room(seed=seed, owner=session["_id"], tracker=uuid4())
     commit()
-    return redirect(url_for("host_room", room=room.id))
+    room_id = room.id
+    add_room_statistics(room)
+    return redirect(url_for("host_room", room=room_id))
 
 
 def _read_log(log: IO[Any], offset: int = 0) -> Iterator[bytes]:
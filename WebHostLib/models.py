@@ -1,6 +1,8 @@
-from datetime import datetime
+import logging
+from datetime import date, datetime
 from uuid import UUID, uuid4
-from pony.orm import Database, PrimaryKey, Required, Set, Optional, buffer, LongStr
+from pony.orm import (Database, DatabaseError, PrimaryKey, Required, Set, Optional, buffer, LongStr, commit,
+                      db_session, rollback)
 
 db = Database()
 
@@ -31,6 +33,8 @@ class Room(db.Entity):
     tracker = Optional(UUID, index=True)
     # Port special value -1 means the server errored out. Another attempt can be made with a page refresh
     last_port = Optional(int, default=lambda: 0)
+    # counts saves of multisave, used to tell if tracker data changed without loading it
+    save_version = Required(int, default=0)
 
 
 class Seed(db.Entity):
@@ -61,3 +65,43 @@ class Generation(db.Entity):
 class GameDataPackage(db.Entity):
     checksum = PrimaryKey(str)
     data = Required(bytes)
+
+
+class GamePlayStatistic(db.Entity):
+    """Slots per game in rooms created on a day, maintained for the stats page."""
+    day = Required(date)
+    game = Required(str)
+    count = Required(int, default=0)
+    PrimaryKey(day, game)
+
+
+# columns added to existing tables, as (table, column, SQL column definition)
+ADDED_COLUMNS: list[tuple[str, str, str]] = [
+    ("Room", "save_version", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+
+def add_missing_columns() -> None:
+    """
+    Add ADDED_COLUMNS to tables created before them, as generate_mapping only creates missing tables.
+    Has to be called after binding db and before generating its mapping.
+    """
+    quote = db.provider.quote_name
+    with db_session:
+        for table, column, definition in ADDED_COLUMNS:
+            if not db.provider.table_exists(db.get_connection(), table):
+                continue  # generate_mapping creates the table with all its columns
+            try:
+                # qualified, as sqlite reads an unknown quoted column name as a string
+                db.execute(f"SELECT {quote(table)}.{quote(column)} FROM {quote(table)} WHERE 1 = 0")
+                continue
+            except DatabaseError:
+                rollback()
+            try:
+                db.execute(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(column)} {definition}")
+                commit()
+                logging.info(f"Added column {column} to table {table}.")
+            except DatabaseError:
+                # another process may have added it in the meantime
+                rollback()
+                db.execute(f"SELECT {quote(table)}.{quote(column)} FROM {quote(table)} WHERE 1 = 0")
@@ -0,0 +1,159 @@
+"""Cost-aware scheduling of queued Generations onto lanes of generator processes."""
+from __future__ import annotations
+
+import logging
+import multiprocessing.pool
+import threading
+import time
+import typing
+from collections import deque
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from Utils import restricted_loads
+
+if typing.TYPE_CHECKING:
+    from .models import Generation
+
+# relative cost of a single slot of a game, compared to an average world
+default_game_costs: dict[str, float] = {
+    "A Link to the Past": 2.0,
+    "Ocarina of Time": 4.0,
+    "Starcraft 2": 4.0,
+    "Stardew Valley": 3.0,
+    "The Witness": 3.0,
+}
+DEFAULT_GAME_COST = 1.0
+
+
+def estimate_generation_cost(options: dict[str, dict[str, typing.Any]],
+                             game_costs: dict[str, float] | None = None) -> float:
+    """Estimate the relative cost of a Generation from its rolled options, as stored in Generation.options.
+    Each slot costs its game's weight, scaled up by player count, as fill and balancing grow faster than linear."""
+    if game_costs is None:
+        game_costs = default_game_costs
+    slot_cost = sum(game_costs.get(player_options.get("game"), DEFAULT_GAME_COST)
+                    for player_options in options.values())
+    return slot_cost * (1 + len(options) / 100)
+
+
+@dataclass
+class Lane:
+    name: str
+    pool: multiprocessing.pool.Pool
+    capacity: int
+    max_cost: float = float("inf")
+    running: set[UUID] = field(default_factory=set)
+    wait_times: deque[float] = field(default_factory=lambda: deque(maxlen=100))
+    """wait times in seconds of the most recently started Generations"""
+
+    @property
+    def free(self) -> int:
+        return self.capacity - len(self.running)
+
+
+@dataclass
+class QueuedGeneration:
+    id: UUID
+    cost: float
+    lane: Lane
+    queued_at: float
+
+
+class GenerationScheduler:
+    """Keeps track of queued Generations and hands them out to lanes as processes free up.
+    Within a lane the cheapest Generation goes first, unless one has waited longer than max_wait seconds."""
+
+    def __init__(self, lanes: list[Lane], max_wait: float | None = None,
+                 game_costs: dict[str, float] | None = None) -> None:
+        assert lanes, "GenerationScheduler needs at least one lane"
+        self.lanes = sorted(lanes, key=lambda lane: lane.max_cost)
+        self.max_wait = max_wait
+        self.game_costs = game_costs
+        self.queued: dict[UUID, QueuedGeneration] = {}
+        self.lock = threading.Lock()
+
+    def lane_for(self, cost: float) -> Lane:
+        for lane in self.lanes:
+            if cost <= lane.max_cost:
+                return lane
+        return self.lanes[-1]
+
+    def estimate(self, generation: Generation) -> float:
+        try:
+            return estimate_generation_cost(restricted_loads(generation.options), self.game_costs)
+        except Exception as e:
+            # launching will fail the same way and mark it as errored, so let that happen quickly
+            logging.warning(f"Could not estimate cost of Generation {generation.id}: {e}")
+            return 0
+
+    def schedule(self, generations: typing.Iterable[Generation]) -> list[tuple[Lane, Generation]]:
+        """Register newly queued Generations and return those that should be launched now, with their lane."""
+        now = time.monotonic()
+        by_id = {generation.id: generation for generation in generations}
+        to_launch: list[tuple[Lane, Generation]] = []
+        with self.lock:
+            for gen_id in self.queued.keys() - by_id.keys():
+                del self.queued[gen_id]  # got deleted or started elsewhere
+            for gen_id, generation in by_id.items():
+                if gen_id not in self.queued:
+                    cost = self.estimate(generation)
+                    self.queued[gen_id] = QueuedGeneration(gen_id, cost, self.lane_for(cost), now)
+
+            for lane in self.lanes:
+                free = lane.free
+                if free <= 0:
+                    continue
+                candidates = sorted((queued for queued in self.queued.values() if queued.lane is lane),
+                                    key=lambda queued: (not self._overdue(queued, now), queued.cost, queued.queued_at))
+                for queued in candidates[:free]:
+                    del self.queued[queued.id]
+                    lane.running.add(queued.id)
+                    lane.wait_times.append(now - queued.queued_at)
+                    to_launch.append((lane, by_id[queued.id]))
+        return to_launch
+
+    def resume(self, generation: Generation) -> Lane:
+        """Assign an already started Generation to a lane, regardless of free capacity."""
+        lane = self.lane_for(self.estimate(generation))
+        with self.lock:
+            lane.running.add(generation.id)
+        return lane
+
+    def finish(self, lane: Lane, gen_id: UUID) -> None:
+        """Free up the lane slot of a Generation. Called from the pool's result handler thread."""
+        with self.lock:
+            lane.running.discard(gen_id)
+
+    def _overdue(self, queued: QueuedGeneration, now: float) -> bool:
+        return self.max_wait is not None and now - queued.queued_at > self.max_wait
+
+    def get_metrics(self) -> dict[str, dict[str, typing.Any]]:
+        now = time.monotonic()
+        with self.lock:
+            metrics = {}
+            for lane in self.lanes:
+                queued = [now - queued.queued_at for queued in self.queued.values() if queued.lane is lane]
+                metrics[lane.name] = {
+                    "capacity": lane.capacity,
+                    "max_cost": lane.max_cost if lane.max_cost != float("inf") else None,
+                    "running": len(lane.running),
+                    "queued": len(queued),
+                    "longest_wait": max(queued, default=0),
+                    "average_start_wait": sum(lane.wait_times) / len(lane.wait_times) if lane.wait_times else 0,
+                    "max_start_wait": max(lane.wait_times, default=0),
+                }
+            return metrics
+
+
+_scheduler: GenerationScheduler | None = None
+
+
+def get_scheduler() -> GenerationScheduler | None:
+    """Scheduler of this process' autogen, if it is running here."""
+    return _scheduler
+
+
+def set_scheduler(scheduler: GenerationScheduler | None) -> None:
+    global _scheduler
+    _scheduler = scheduler
@@ -15,7 +15,21 @@ window.addEventListener('load', () => {
         return sleepSeconds || 60;
     };
 
+    // Only reload once the room reported events for this slot
+    const tracker = document.getElementById('player-tracker');
+    const team = parseInt(tracker.getAttribute('data-team'));
+    const player = parseInt(tracker.getAttribute('data-player'));
+    let changed = false;
+    pollRoomEvents(tracker.getAttribute('data-events'), (events) => {
+        if (events === null || events.some((event) => isSlotEvent(event, team, player))) {
+            changed = true;
+        }
+    });
+
     let updateTracker = () => {
+        updater = setTimeout(updateTracker, getSleepTimeSeconds() * 1000);
+        if (!changed) { return; }
+        changed = false;
         const ajax = new XMLHttpRequest();
         ajax.onreadystatechange = () => {
             if (ajax.readyState !== 4) { return; }
@@ -37,7 +51,6 @@ window.addEventListener('load', () => {
         };
         ajax.open('GET', url);
         ajax.send();
-        updater = setTimeout(updateTracker, getSleepTimeSeconds() * 1000);
     };
     window.updater = setTimeout(updateTracker, getSleepTimeSeconds() * 1000);
 });
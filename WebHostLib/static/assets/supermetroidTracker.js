@@ -1,7 +1,19 @@
 window.addEventListener('load', () => {
   // Reload tracker every 15 seconds
   const url = window.location;
+  // Only reload once the room reported events for this slot
+  const wrapper = document.getElementById('player-tracker-wrapper');
+  const team = parseInt(wrapper.getAttribute('data-team'));
+  const player = parseInt(wrapper.getAttribute('data-player'));
+  let changed = false;
+  pollRoomEvents(wrapper.getAttribute('data-events'), (events) => {
+    if (events === null || events.some((event) => isSlotEvent(event, team, player))) {
+      changed = true;
+    }
+  });
   setInterval(() => {
+    if (!changed) { return; }
+    changed = false;
     const ajax = new XMLHttpRequest();
     ajax.onreadystatechange = () => {
       if (ajax.readyState !== 4) { return; }
@@ -132,12 +132,143 @@ window.addEventListener('load', () => {
         return sleepSeconds || 60;
     }
 
+    // Trackers poll for room events and patch what they show in place. Events they can't patch make the next update
+    // reload the page. Player trackers have data-team and data-player, multiworld trackers have rows with them.
+    const wrapper = document.getElementById('tracker-wrapper');
+    const events_url = wrapper.getAttribute('data-events');
+    const slot_team = parseInt(wrapper.getAttribute('data-team'));
+    const slot_player = parseInt(wrapper.getAttribute('data-player'));
+    const shows_items = wrapper.hasAttribute('data-shows-items');
+    const status_names = {0: "Disconnected", 5: "Connected", 10: "Ready", 20: "Playing", 30: "Goal Completed"};
+    let changed = !events_url;
+    let last_tick = Date.now();
+
+    const findRow = (attribute, value) => tables.rows().nodes().toArray().find(
+        (row) => row.getAttribute(attribute) === String(value));
+
+    const findSlotRow = (data) => tables.rows().nodes().toArray().find(
+        (row) => row.dataset.team === String(data.team) && row.dataset.player === String(data.player));
+
+    const setCellText = (cell, text) => {
+        cell.innerText = text;
+        tables.cell(cell).invalidate('dom');
+    };
+
+    const updateFooter = (row) => {
+        const table = $(row).closest('table');
+        const footer = table.find('tfoot>tr')[0];
+        if (!footer)
+            return;
+        let done = 0, total = 0, completed = 0;
+        const rows = table.DataTable().rows().nodes().toArray();
+        rows.forEach((team_row) => {
+            const [row_done, row_total] = team_row.querySelector('.checks').innerText.split('/')
+                .map((value) => parseInt(value));
+            done += row_done;
+            total += row_total;
+            if (team_row.querySelector('.status').innerText.trim() === status_names[30])
+                completed++;
+        });
+        footer.querySelector('.status').innerText = `${completed}/${rows.length} Complete`;
+        footer.querySelector('.checks').innerText = `${done}/${total}`;
+        footer.querySelector('.percentage').innerText = total ? (done / total * 100).toFixed(2) : '100';
+    };
+
+    // Returns whether the event could be shown on a multiworld tracker without reloading the page.
+    const patchMultiworldEvent = ({event, data}) => {
+        if (event === 'hints')
+            return false;
+        const row = findSlotRow(data);
+        if (!row)
+            return true;  // the slot is not shown on this tracker
+        if (event === 'received')
+            return !shows_items;
+        if (event === 'check') {
+            const checks = row.querySelector('.checks');
+            const total = parseInt(checks.innerText.split('/')[1]);
+            checks.setAttribute('data-sort', data.checked);
+            setCellText(checks, `${data.checked}/${total}`);
+            setCellText(row.querySelector('.percentage'),
+                total ? (data.checked / total * 100).toFixed(2) : '100.00');
+            tables.cell(row.querySelector('.activity')).data(0);
+        } else if (event === 'status') {
+            setCellText(row.querySelector('.status'), status_names[data.status] || "Unknown State");
+        } else {
+            return false;
+        }
+        updateFooter(row);
+        return true;
+    };
+
+    // Returns whether the event could be shown on a player tracker without reloading the page.
+    const patchPlayerEvent = (room_event) => {
+        const {event, data} = room_event;
+        if (!isSlotEvent(room_event, slot_team, slot_player) || event === 'status')
+            return true;  // hints of other slots arrive as hints events of this slot when they concern it
+        if (event === 'check') {
+            for (const location of data.locations) {
+                const row = findRow('data-location', location);
+                if (!row)
+                    return false;
+                setCellText(row.querySelector('.checked'), '✔');
+            }
+            return true;
+        }
+        if (event === 'received') {
+            const table = document.getElementById('received-table');
+            let order = parseInt(table.getAttribute('data-received'));
+            for (const [item] of data.items) {
+                const row = findRow('data-item', item);
+                if (!row)
+                    return false;
+                const amount = row.querySelector('.amount');
+                setCellText(amount, parseInt(amount.innerText) + 1);
+                setCellText(row.querySelector('.order'), order++);
+            }
+            table.setAttribute('data-received', order);
+            return true;
+        }
+        return false;
+    };
+
+    const patchEvent = isNaN(slot_player) ? patchMultiworldEvent : patchPlayerEvent;
+
+    // Rendered activity is the time since the page was rendered, so it keeps counting while the page is patched.
+    const tickActivity = () => {
+        const seconds = (Date.now() - last_tick) / 1000;
+        last_tick = Date.now();
+        tables.cells('.activity').every(function () {
+            if (this.data() !== "None")
+                this.data(parseFloat(this.data()) + seconds);
+        });
+        tables.draw(false);
+    };
+
+    if (events_url) {
+        pollRoomEvents(events_url, (events) => {
+            if (events === null) {
+                changed = true;
+                return;
+            }
+            events.forEach((event) => {
+                if (!patchEvent(event))
+                    changed = true;
+            });
+            tables.draw(false);
+        });
+    }
+
     let update_on_view = false;
     const update = () => {
         if (document.hidden) {
             console.log("Document reporting as not visible, not updating Tracker...");
             update_on_view = true;
+        } else if (!changed) {
+            console.log("No events since last update, not updating Tracker...");
+            tickActivity();
         } else {
+            changed = !events_url;
+            last_tick = Date.now();
             update_on_view = false;
             const target = $("<div></div>");
             console.log("Updating Tracker...");
@@ -150,6 +281,10 @@ window.addEventListener('load', () => {
                         const topscroll = $(old_table.settings()[0].nScrollBody).scrollTop();
                         const leftscroll = $(old_table.settings()[0].nScrollBody).scrollLeft();
                         old_table.clear();
+                        if (new_table.hasAttribute('data-received')) {
+                            old_table.table().node().setAttribute('data-received',
+                                new_table.getAttribute('data-received'));
+                        }
                         if (footer_tr.length) {
                             $(old_table.table).find("tfoot").html(footer_tr);
                         }
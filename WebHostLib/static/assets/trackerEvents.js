@@ -0,0 +1,68 @@
+/**
+ * Poll the events of a room and pass each batch of new events to onEvents. Polling pauses while the page is hidden.
+ * If events may have been missed, e.g. because the room restarted, onEvents is called with null first.
+ * @param {string} url events url of the room or tracker
+ * @param {function(Array<{event: string, data: *}>|null): void} onEvents
+ * @param {Object} [options]
+ * @param {function(): Number} [options.getSeconds] seconds until the next poll
+ * @param {Number} [options.logOffset] where the rendered log ended, to get log lines from there on
+ * @returns {function(): void} polls as soon as the current poll, if any, is done
+ */
+const pollRoomEvents = (url, onEvents, {getSeconds = () => 5, logOffset = null} = {}) => {
+    let cursor = null;
+    let etag = null;
+    let timeout = null;
+    let polling = false;
+    let pollAgain = false;
+
+    const poll = () => {
+        clearTimeout(timeout);
+        if (polling) {
+            pollAgain = true;
+            return;
+        }
+        if (document.hidden) {
+            timeout = setTimeout(poll, getSeconds() * 1000);
+            return;
+        }
+        polling = true;
+        const query = new URLSearchParams();
+        if (cursor !== null)
+            query.set('cursor', cursor);
+        else if (logOffset !== null)
+            query.set('log_offset', logOffset);
+        fetch(`${url}?${query}`, {cache: 'no-store', headers: etag ? {'If-None-Match': etag} : {}})
+            .then((response) => {
+                if (response.status === 304)
+                    return;
+                if (!response.ok)
+                    throw new Error(`Polling events failed with status ${response.status}`);
+                etag = response.headers.get('ETag');
+                return response.json().then((body) => {
+                    cursor = body.cursor;
+                    if (body.reset)
+                        onEvents(null);
+                    if (body.events.length)
+                        onEvents(body.events);
+                });
+            })
+            .catch((error) => console.log(error))
+            .finally(() => {
+                polling = false;
+                timeout = setTimeout(poll, pollAgain ? 0 : getSeconds() * 1000);
+                pollAgain = false;
+            });
+    };
+
+    poll();
+    return poll;
+};
+
+/**
+ * Whether a room event is about a slot.
+ * @param {{event: string, data: *}} event
+ * @param {Number} team
+ * @param {Number} player
+ * @returns {boolean}
+ */
+const isSlotEvent = ({data}, team, player) => data.team === team && data.player === player;
@@ -9,30 +9,77 @@ from bokeh.models import HoverTool
 from bokeh.plotting import figure, ColumnDataSource
 from bokeh.resources import INLINE
 from flask import render_template
-from pony.orm import select
+from pony.orm import (OptimisticCheckError, TransactionIntegrityError, commit, count, db_session, delete, rollback,
+                      select)
 
 from . import app, cache
-from .models import Room
+from .models import GamePlayStatistic, Room, Slot
 
 PLOT_WIDTH = 600
+# days shown on the stats page, older GamePlayStatistic rows get pruned
+STATISTIC_DAYS = 30
+# attempts at updating a GamePlayStatistic row that concurrent room creations compete for
+STATISTIC_RETRIES = 5
 
 
 def get_db_data(known_games: set[str]) -> tuple[Counter[str], defaultdict[date, dict[str, int]]]:
     games_played: defaultdict[date, dict[str, int]] = defaultdict(Counter)
     total_games: Counter[str] = Counter()
-    cutoff = date.today() - timedelta(days=30)
-    room: Room
-    for room in select(room for room in Room if room.creation_time >= cutoff):
-        for slot in room.seed.slots:
-            if slot.game in known_games:
-                current_game = slot.game
-            else:
-                current_game = "Other"
-            total_games[current_game] += 1
-            games_played[room.creation_time.date()][current_game] += 1
+    cutoff = date.today() - timedelta(days=STATISTIC_DAYS)
+    for day, game, played in select((stat.day, stat.game, stat.count) for stat in GamePlayStatistic
+                                    if stat.day >= cutoff):
+        if game in known_games:
+            current_game = game
+        else:
+            current_game = "Other"
+        total_games[current_game] += played
+        games_played[day][current_game] += played
     return total_games, games_played
 
 
+def add_room_statistics(room: Room) -> None:
+    """
+    Count the slots of a newly created room towards its day's GamePlayStatistic.
+    Commits each game separately and retries when another request created or changed the same row concurrently.
+    """
+    day = room.creation_time.date()
+    seed_id = room.seed.id
+    for game, played in select((slot.game, count(slot)) for slot in Slot if slot.seed.id == seed_id)[:]:
+        for attempt in range(STATISTIC_RETRIES):
+            stat = GamePlayStatistic.get(day=day, game=game)
+            if stat:
+                stat.count += played
+            else:
+                GamePlayStatistic(day=day, game=game, count=played)
+            try:
+                commit()
+            except (TransactionIntegrityError, OptimisticCheckError):
+                rollback()
+                if attempt == STATISTIC_RETRIES - 1:
+                    raise
+            else:
+                break
+
+
+def backfill_game_statistics(days: int = STATISTIC_DAYS) -> None:
+    """
+    Prune GamePlayStatistic rows older than days and, if none are left, fill them in from the existing rooms.
+    Only the initial fill reads rooms, as cleaned up rooms would otherwise drop out of already counted days.
+    """
+    cutoff = date.today() - timedelta(days=days)
+    games_played: Counter[tuple[date, str]] = Counter()
+    with db_session:
+        delete(stat for stat in GamePlayStatistic if stat.day < cutoff)
+        if GamePlayStatistic.select().exists():
+            return
+        for _, creation_time, game, played in select(
+                (room.id, room.creation_time, slot.game, count(slot))
+                for room in Room for slot in Slot if slot.seed == room.seed and room.creation_time >= cutoff):
+            games_played[creation_time.date(), game] += played
+        for (day, game), played in games_played.items():
+            GamePlayStatistic(day=day, game=game, count=played)
+
+
 def get_color_palette(colors_needed: int) -> list[RGB]:
     colors = []
     # colors_needed +1 to prevent first and last color being too close to each other
@@ -108,11 +155,11 @@ def stats():
         "end_angles": [],
     }
     current_angle = 0
-    for i, (game, count) in enumerate(total_games.most_common()):
+    for i, (game, played) in enumerate(total_games.most_common()):
         data["games"].append(game)
-        data["count"].append(count)
+        data["count"].append(played)
         data["start_angles"].append(current_angle)
-        angle = count / total * tau
+        angle = played / total * tau
         current_angle += angle
         data["end_angles"].append(current_angle)
 
@@ -1,5 +1,6 @@
 import datetime
 import collections
+import time
 from dataclasses import dataclass
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
 from uuid import UUID
@@ -10,7 +11,7 @@ from werkzeug.exceptions import abort
 
 from MultiServer import Context, get_saving_second
 from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType
-from Utils import restricted_loads, KeyedDefaultDict
+from Utils import restricted_loads, KeyedDefaultDict, __version__
 from . import app, cache
 from .models import GameDataPackage, Room
 
@@ -317,24 +318,52 @@ def _process_if_request_valid(incoming_request: Request, room: Optional[Room]) -
     return None
 
 
-@app.route("/tracker/<suuid:tracker>/<int:tracked_team>/<int:tracked_player>")
-def get_player_tracker(tracker: UUID, tracked_team: int, tracked_player: int, generic: bool = False) -> Response:
-    key = f"{tracker}_{tracked_team}_{tracked_player}_{generic}"
-    response: Optional[Response] = cache.get(key)
-    if response:
+def get_tracker_etag(room: Room) -> str:
+    """ETag for data depending on the room's multisave, changing every time the room server saves."""
+    return f"{__version__}-{room.save_version}"
+
+
+def get_tracker_page_etag(room: Room) -> str:
+    """
+    ETag for rendered tracker pages. These show time passed since players' last activity,
+    so the ETag also changes every TRACKER_CACHE_TIMEOUT_IN_SECONDS to keep those from going stale.
+    """
+    return f"{get_tracker_etag(room)}-{int(time.time()) // TRACKER_CACHE_TIMEOUT_IN_SECONDS}"
+
+
+def get_static_tracker_etag(room: Room) -> str:
+    """ETag for data depending only on the room's seed, which never changes."""
+    return f"{__version__}-{room.seed.id.hex}"
+
+
+def _not_modified(incoming_request: Request, etag: str) -> Optional[Response]:
+    if incoming_request.if_none_match.contains(etag):
+        response = make_response("", 304)
+        response.set_etag(etag)
         return response
+    return None
+
 
+@app.route("/tracker/<suuid:tracker>/<int:tracked_team>/<int:tracked_player>")
+def get_player_tracker(tracker: UUID, tracked_team: int, tracked_player: int, generic: bool = False) -> Response:
     # Room must exist.
     room = Room.get(tracker=tracker)
+    if not room:
+        abort(404)
 
-    response = _process_if_request_valid(request, room)
+    etag = get_tracker_page_etag(room)
+    response = _not_modified(request, etag) or _process_if_request_valid(request, room)
     if response:
         return response
 
-    timeout, last_modified, tracker_page = get_timeout_and_player_tracker(room, tracked_team, tracked_player, generic)
+    key = f"{tracker}_{tracked_team}_{tracked_player}_{generic}_{etag}"
+    tracker_page: Optional[str] = cache.get(key)
+    if tracker_page is None:
+        timeout, _, tracker_page = get_timeout_and_player_tracker(room, tracked_team, tracked_player, generic)
+        cache.set(key, tracker_page, timeout)
     response = make_response(tracker_page)
-    response.last_modified = last_modified
-    cache.set(key, response, timeout)
+    response.last_modified = room.last_activity
+    response.set_etag(etag)
     return response
 
 
@@ -361,22 +390,24 @@ def get_generic_game_tracker(tracker: UUID, tracked_team: int, tracked_player: i
 @app.route("/tracker/<suuid:tracker>", defaults={"game": "Generic"})
 @app.route("/tracker/<suuid:tracker>/<game>")
 def get_multiworld_tracker(tracker: UUID, game: str) -> Response:
-    key = f"{tracker}_{game}"
-    response: Optional[Response] = cache.get(key)
-    if response:
-        return response
-
     # Room must exist.
     room = Room.get(tracker=tracker)
+    if not room:
+        abort(404)
 
-    response = _process_if_request_valid(request, room)
+    etag = get_tracker_page_etag(room)
+    response = _not_modified(request, etag) or _process_if_request_valid(request, room)
     if response:
         return response
 
-    timeout, last_modified, tracker_page = get_timeout_and_multiworld_tracker(room, game)
+    key = f"{tracker}_{game}_{etag}"
+    tracker_page: Optional[str] = cache.get(key)
+    if tracker_page is None:
+        timeout, _, tracker_page = get_timeout_and_multiworld_tracker(room, game)
+        cache.set(key, tracker_page, timeout)
     response = make_response(tracker_page)
-    response.last_modified = last_modified
-    cache.set(key, response, timeout)
+    response.last_modified = room.last_activity
+    response.set_etag(etag)
     return response
 
 
@@ -430,6 +461,7 @@ def render_generic_tracker(tracker_data: TrackerData, team: int, player: int) ->
         locations=tracker_data.get_player_locations(player),
         checked_locations=tracker_data.get_player_checked_locations(team, player),
         received_items=received_items_in_order,
+        received_count=len(starting_inventory) + len(tracker_data.get_player_received_items(team, player)),
         saving_second=tracker_data.get_room_saving_second(),
         game=game,
         games=tracker_data.get_room_games(),
@@ -14,6 +14,7 @@ from cpython cimport PyObject
 from typing import Any, Dict, Iterable, Iterator, Generator, Sequence, Tuple, TypeVar, Union, Set, List, TYPE_CHECKING
 from cymem.cymem cimport Pool
 from libc.stdint cimport int64_t, uint32_t
+from libc.string cimport memcpy, memmove, memset
 from collections import defaultdict
 
 cdef extern from *:
@@ -376,3 +377,90 @@ cdef class PlayerLocationProxy:
         count = self._store.sender_index[self._player].count
         for entry in self._store.entries[start:start+count]:
             yield entry.location, (entry.item, entry.receiver, entry.flags)
+
+
+cdef inline uint32_t _read_u32(const unsigned char[:] data, size_t position) noexcept:
+    return (data[position] | (<uint32_t>data[position + 1] << 8) | (<uint32_t>data[position + 2] << 16) |
+            (<uint32_t>data[position + 3] << 24))
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def apply_compact_tokens(bytearray rom, const unsigned char[:] tokens) -> None:
+    """Applies a compact token binary onto rom in place, see worlds.Files._apply_compact_tokens."""
+    cdef size_t size = tokens.shape[0]
+    cdef size_t position, index, count, offset, length, value, end, copy_end = 0, copy_source = 0
+    cdef unsigned char token_type
+    cdef unsigned char* data
+    if size < 9 or bytes(tokens[:4]) != b"APTK" or tokens[4] != 1:
+        raise ValueError("Not a compact token file of a supported version")
+    count = _read_u32(tokens, 5)
+
+    # validate everything and find the size of the result before changing anything
+    end = len(rom)
+    position = 9
+    for index in range(count):
+        if position + 5 > size:
+            raise ValueError("Compact token file is incomplete")
+        token_type = tokens[position]
+        offset = _read_u32(tokens, position + 1)
+        position += 5
+        if token_type == 0:  # WRITE
+            if position + 4 > size:
+                raise ValueError("Compact token file is incomplete")
+            length = _read_u32(tokens, position)
+            position += 4 + length
+        elif token_type == 1 or token_type == 2:  # COPY, RLE
+            if position + 8 > size:
+                raise ValueError("Compact token file is incomplete")
+            length = _read_u32(tokens, position)
+            value = _read_u32(tokens, position + 4)
+            if token_type == 2 and value > 0xFF:
+                raise ValueError(f"RLE value {value} does not fit in a byte")
+            if token_type == 1 and value + length > copy_end:
+                copy_end = value + length
+                copy_source = value
+            position += 8
+        elif token_type <= 5:  # AND_8, OR_8, XOR_8
+            length = 1
+            position += 1
+        else:
+            raise ValueError(f"Unknown token type {token_type}")
+        if position > size:
+            raise ValueError("Compact token file is incomplete")
+        if offset + length > end:
+            end = offset + length
+    if position != size:
+        raise ValueError("Compact token file has trailing data")
+    if copy_end > end:
+        raise ValueError(f"COPY from {copy_source:#x} reads past the end of the file")
+
+    if end > <size_t>len(rom):
+        rom.extend(bytes(end - len(rom)))
+    data = <unsigned char*><char*>rom
+    position = 9
+    for index in range(count):
+        token_type = tokens[position]
+        offset = _read_u32(tokens, position + 1)
+        position += 5
+        if token_type == 0:
+            length = _read_u32(tokens, position)
+            if length:
+                memcpy(data + offset, &tokens[position + 4], length)
+            position += 4 + length
+        elif token_type == 1:
+            length = _read_u32(tokens, position)
+            value = _read_u32(tokens, position + 4)
+            memmove(data + offset, data + value, length)
+            position += 8
+        elif token_type == 2:
+            memset(data + offset, _read_u32(tokens, position + 4), _read_u32(tokens, position))
+            position += 8
+        else:
+            if token_type == 3:
+                data[offset] &= tokens[position]
+            elif token_type == 4:
+                data[offset] |= tokens[position]
+            else:
+                data[offset] ^= tokens[position]
+            position += 1
@@ -20,7 +20,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 ]]
 
-local SCRIPT_VERSION = 1
+local SCRIPT_VERSION = 2
 
 -- Set to log incoming requests
 -- Will cause lag due to large console output
@@ -37,6 +37,24 @@ field `type`. The value of `type` determines what other fields may exist.
 To get the script version, instead of JSON, send "VERSION" to get the script
 version directly (e.g. "2").
 
+### Binary Frames
+
+Since version 2, sending "BINARY" switches the connection to binary frames,
+which the script acknowledges with "BINARY". From then on, every message in
+both directions is a frame with a 12 byte header of three little-endian
+unsigned 32-bit integers:
+
+- a request id, which the response frame repeats, so a client can send more
+frames before the previous ones are answered
+- the size of the JSON part
+- the size of the data part
+
+The header is followed by the JSON list of requests or responses, and then the
+data part, which holds the memory contents of the messages as raw bytes.
+Instead of a base64 string, the fields `expected_data` of `GUARD`, `value` of
+`WRITE` and `value` of `READ_RESPONSE` contain the number of bytes they take up
+in the data part, in the order of the requests or responses.
+
 #### Ex. 1
 
 Request: `[{"type": "PING"}]`
@@ -311,6 +329,20 @@ local locked = false
 
 local rom_hash = nil
 
+local binary_mode = false
+local receive_buffer = ""
+local frame_header = nil
+
+local unpack = table.unpack or unpack
+
+-- Request and response fields with memory contents, which are base64 strings
+-- in JSON messages and sizes of raw bytes in binary frames
+local DATA_FIELDS = {
+    ["GUARD"] = "expected_data",
+    ["WRITE"] = "value",
+    ["READ_RESPONSE"] = "value",
+}
+
 function queue_push (self, value)
     self[self.right] = value
     self.right = self.right + 1
@@ -344,6 +376,83 @@ function unlock ()
     client_socket:settimeout(0)
 end
 
+function encode_u32 (n)
+    return string.char(n % 256, math.floor(n / 256) % 256, math.floor(n / 65536) % 256, math.floor(n / 16777216) % 256)
+end
+
+function decode_u32 (s, i)
+    local a, b, c, d = string.byte(s, i, i + 3)
+    return a + b * 256 + c * 65536 + d * 16777216
+end
+
+-- Converts between byte arrays and strings in chunks, to stay below the
+-- maximum number of arguments of a function
+function bytes_to_string (bytes)
+    local parts = {}
+    for i = 1, #bytes, 4096 do
+        parts[#parts + 1] = string.char(unpack(bytes, i, math.min(i + 4095, #bytes)))
+    end
+    return table.concat(parts)
+end
+
+function string_to_bytes (s, first, last)
+    local bytes = {}
+    for i = first, last, 4096 do
+        for _, byte in ipairs({string.byte(s, i, math.min(i + 4095, last))}) do
+            bytes[#bytes + 1] = byte
+        end
+    end
+    return bytes
+end
+
+function send_all (data)
+    -- A large frame may not fit into the socket's buffer at once
+    client_socket:settimeout(2)
+    local _, err = client_socket:send(data)
+    if locked then
+        client_socket:settimeout(2)
+    else
+        client_socket:settimeout(0)
+    end
+    return err
+end
+
+-- Receives exactly n bytes, keeping what arrived so far if they are
+-- incomplete, to continue on the next call
+function receive_bytes (n)
+    local needed = n - #receive_buffer
+    if needed > 0 then
+        local data, err, partial = client_socket:receive(needed)
+        receive_buffer = receive_buffer..(data or partial or "")
+        if data == nil then
+            return nil, err
+        end
+    end
+    local result = receive_buffer
+    receive_buffer = ""
+    return result
+end
+
+function receive_frame ()
+    if frame_header == nil then
+        local header, err = receive_bytes(12)
+        if header == nil then
+            return nil, err
+        end
+        frame_header = header
+    end
+
+    local json_size = decode_u32(frame_header, 5)
+    local body, err = receive_bytes(json_size + decode_u32(frame_header, 9))
+    if body == nil then
+        return nil, err
+    end
+
+    local request_id = decode_u32(frame_header, 1)
+    frame_header = nil
+    return {id = request_id, json = body:sub(1, json_size), data = body:sub(json_size + 1)}
+end
+
 request_handlers = {
     ["PING"] = function (req)
         local res = {}
@@ -397,7 +506,7 @@ request_handlers = {
 
     ["GUARD"] = function (req)
         local res = {}
-        local expected_data = base64.decode(req["expected_data"])
+        local expected_data = req["expected_data"]
         local actual_data = memory.read_bytes_as_array(req["address"], #expected_data, req["domain"])
 
         local data_is_validated = true
@@ -437,7 +546,7 @@ request_handlers = {
         local res = {}
 
         res["type"] = "READ_RESPONSE"
-        res["value"] = base64.encode(memory.read_bytes_as_array(req["address"], req["size"], req["domain"]))
+        res["value"] = memory.read_bytes_as_array(req["address"], req["size"], req["domain"])
 
         return res
     end,
@@ -446,7 +555,7 @@ request_handlers = {
         local res = {}
 
         res["type"] = "WRITE_RESPONSE"
-        memory.write_bytes_as_array(req["address"], base64.decode(req["value"]), req["domain"])
+        memory.write_bytes_as_array(req["address"], req["value"], req["domain"])
 
         return res
     end,
@@ -479,7 +588,13 @@ request_handlers = {
     end,
 }
 
-function process_request (req)
+-- read_data turns the value of a request's data field into a byte array
+function process_request (req, read_data)
+    local field = DATA_FIELDS[req["type"]]
+    if field ~= nil and req[field] ~= nil then
+        req[field] = read_data(req[field])
+    end
+
     if request_handlers[req["type"]] then
         return request_handlers[req["type"]](req)
     else
@@ -487,24 +602,101 @@ function process_request (req)
     end
 end
 
--- Receive data from AP client and send message back
-function send_receive ()
-    local message, err = client_socket:receive()
+-- Processes a list of requests, returning their responses, with the byte
+-- arrays in their data fields turned into what write_data returns for them
+function process_requests (data, read_data, write_data)
+    local res = {}
+    local failed_guard_response = nil
+    for i, req in ipairs(data) do
+        if failed_guard_response ~= nil then
+            res[i] = failed_guard_response
+        else
+            -- An error is more likely to cause an NLua exception than to return an error here
+            local status, response = pcall(process_request, req, read_data)
+            if status then
+                res[i] = response
+
+                -- If the GUARD validation failed, skip the remaining commands
+                if response["type"] == "GUARD_RESPONSE" and not response["value"] then
+                    failed_guard_response = response
+                end
 
-    -- Handle errors
+                local field = DATA_FIELDS[response["type"]]
+                if field ~= nil then
+                    response[field] = write_data(response[field])
+                end
+            else
+                if type(response) ~= "string" then response = "Unknown error" end
+                res[i] = {type = "ERROR", err = response}
+            end
+        end
+    end
+    return res
+end
+
+function process_frame (frame)
+    local data_offset = 1
+    local function read_data (size)
+        local first = data_offset
+        data_offset = data_offset + size
+        return string_to_bytes(frame.data, first, data_offset - 1)
+    end
+
+    local data_parts = {}
+    local data_size = 0
+    local function write_data (bytes)
+        data_parts[#data_parts + 1] = bytes_to_string(bytes)
+        data_size = data_size + #bytes
+        return #bytes
+    end
+
+    local res = json.encode(process_requests(json.decode(frame.json), read_data, write_data))
+    return send_all(encode_u32(frame.id)..encode_u32(#res)..encode_u32(data_size)..res..table.concat(data_parts))
+end
+
+function handle_receive_error (err)
     if err == "closed" then
         if current_state == STATE_CONNECTED then
             print("Connection to client closed")
         end
         current_state = STATE_NOT_CONNECTED
-        return
     elseif err == "timeout" then
         unlock()
-        return
-    elseif err ~= nil then
+    else
         print(err)
         current_state = STATE_NOT_CONNECTED
         unlock()
+    end
+end
+
+-- Receive data from AP client and send message back
+function send_receive ()
+    if binary_mode then
+        -- Answer every frame that arrived, so pipelined frames don't wait for the next emulator frame each
+        while true do
+            local frame, err = receive_frame()
+            if frame == nil then
+                handle_receive_error(err)
+                return
+            end
+
+            timeout_timer = 5
+            if DEBUG then
+                print("Received Frame ["..emu.framecount().."]: "..'"'..frame.json..'"')
+            end
+            err = process_frame(frame)
+            if err ~= nil then
+                handle_receive_error(err)
+                return
+            end
+        end
+    end
+
+    local message, err = client_socket:receive()
+
+    -- Handle errors
+    if err ~= nil then
+        handle_receive_error(err)
         return
     end
 
@@ -518,30 +710,11 @@ function send_receive ()
 
     if message == "VERSION" then
         client_socket:send(tostring(SCRIPT_VERSION).."\n")
+    elseif message == "BINARY" then
+        client_socket:send("BINARY\n")
+        binary_mode = true
     else
-        local res = {}
-        local data = json.decode(message)
-        local failed_guard_response = nil
-        for i, req in ipairs(data) do
-            if failed_guard_response ~= nil then
-                res[i] = failed_guard_response
-            else
-                -- An error is more likely to cause an NLua exception than to return an error here
-                local status, response = pcall(process_request, req)
-                if status then
-                    res[i] = response
-
-                    -- If the GUARD validation failed, skip the remaining commands
-                    if response["type"] == "GUARD_RESPONSE" and not response["value"] then
-                        failed_guard_response = response
-                    end
-                else
-                    if type(response) ~= "string" then response = "Unknown error" end
-                    res[i] = {type = "ERROR", err = response}
-                end
-            end
-        end
-
+        local res = process_requests(json.decode(message), base64.decode, base64.encode)
         client_socket:send(json.encode(res).."\n")
     end
 end
@@ -603,6 +776,9 @@ function main ()
                     print("Client connected")
                     current_state = STATE_CONNECTED
                     client_socket = client
+                    binary_mode = false
+                    receive_buffer = ""
+                    frame_header = nil
                     server:close()
                     server = nil
                     client_socket:settimeout(0)
@@ -5,7 +5,7 @@ import time
 from collections import deque
 from collections.abc import Callable, Iterable
 
-from BaseClasses import CollectionState, Entrance, Region, EntranceType
+from BaseClasses import CollectionState, Entrance, EntranceType, Location, Region
 from Options import Accessibility
 from worlds.AutoWorld import World
 
@@ -17,16 +17,22 @@ class EntranceRandomizationError(RuntimeError):
 class EntranceLookup:
     class GroupLookup:
         _lookup: dict[int, list[Entrance]]
+        _indices: dict[Entrance, int]
+        """position of each entrance in the list of its group, so it can be removed without searching the list"""
 
         def __init__(self):
             self._lookup = {}
+            self._indices = {}
 
         def __len__(self):
-            return sum(map(len, self._lookup.values()))
+            return len(self._indices)
 
         def __bool__(self):
             return bool(self._lookup)
 
+        def __contains__(self, entrance: Entrance) -> bool:
+            return entrance in self._indices
+
         def __getitem__(self, item: int) -> list[Entrance]:
             return self._lookup.get(item, [])
 
@@ -37,20 +43,35 @@ class EntranceLookup:
             return str(self._lookup)
 
         def add(self, entrance: Entrance) -> None:
-            self._lookup.setdefault(entrance.randomization_group, []).append(entrance)
+            group = self._lookup.setdefault(entrance.randomization_group, [])
+            self._indices[entrance] = len(group)
+            group.append(entrance)
 
         def remove(self, entrance: Entrance) -> None:
             group = self._lookup[entrance.randomization_group]
-            group.remove(entrance)
+            index = self._indices.pop(entrance)
+            # move the last entrance into the gap instead of shifting all entrances after it
+            last = group.pop()
+            if last is not entrance:
+                group[index] = last
+                self._indices[last] = index
             if not group:
                 del self._lookup[entrance.randomization_group]
 
+        def shuffle(self, group: int, rng: random.Random) -> None:
+            entrances = self._lookup.get(group)
+            if entrances:
+                rng.shuffle(entrances)
+                for index, entrance in enumerate(entrances):
+                    self._indices[entrance] = index
+
     dead_ends: GroupLookup
     others: GroupLookup
     _random: random.Random
     _expands_graph_cache: dict[Entrance, bool]
     _coupled: bool
     _usable_exits: set[Entrance]
+    _targets_by_name: dict[str, list[Entrance]]
 
     def __init__(self, rng: random.Random, coupled: bool, usable_exits: set[Entrance], targets: Iterable[Entrance]):
         self.dead_ends = EntranceLookup.GroupLookup()
@@ -59,6 +80,7 @@ class EntranceLookup:
         self._expands_graph_cache = {}
         self._coupled = coupled
         self._usable_exits = usable_exits
+        self._targets_by_name = {}
         for target in targets:
             self.add(target)
 
@@ -112,10 +134,15 @@ class EntranceLookup:
     def add(self, entrance: Entrance) -> None:
         lookup = self.others if self._can_expand_graph(entrance) else self.dead_ends
         lookup.add(entrance)
+        self._targets_by_name.setdefault(entrance.name, []).append(entrance)
 
     def remove(self, entrance: Entrance) -> None:
         lookup = self.others if self._can_expand_graph(entrance) else self.dead_ends
         lookup.remove(entrance)
+        targets = self._targets_by_name[entrance.name]
+        targets.remove(entrance)  # almost always the only target of that name
+        if not targets:
+            del self._targets_by_name[entrance.name]
 
     def get_targets(
             self,
@@ -134,7 +161,7 @@ class EntranceLookup:
         lookup = self.dead_ends if dead_end else self.others
         if preserve_group_order:
             for group in groups:
-                self._random.shuffle(lookup[group])
+                lookup.shuffle(group, self._random)
             ret = [entrance for group in groups for entrance in lookup[group]]
         else:
             ret = [entrance for group in groups for entrance in lookup[group]]
@@ -146,21 +173,22 @@ class EntranceLookup:
         Finds a specific target in the lookup, if it is present.
 
         :param name: The name of the target
-        :param group: The target's group. Providing this will make the lookup faster, but can be omitted if it is not
-                      known ahead of time for some reason.
-        :param dead_end: Whether the target is a dead end. Providing this will make the lookup faster, but can be
-                         omitted if this is not known ahead of time (much more likely)
+        :param group: The target's group, if only a target of that group should be found.
+        :param dead_end: Whether the target is a dead end, if only a target of that kind should be found. If omitted,
+                         dead ends are preferred.
         """
-        if dead_end is None:
-            return (found
-                    if (found := self.find_target(name, group, True))
-                    else self.find_target(name, group, False))
-        lookup = self.dead_ends if dead_end else self.others
-        targets_to_check = lookup if group is None else lookup[group]
-        for target in targets_to_check:
-            if target.name == name:
+        found = None
+        for target in self._targets_by_name.get(name, ()):
+            if group is not None and target.randomization_group != group:
+                continue
+            is_dead_end = target in self.dead_ends
+            if dead_end is not None and is_dead_end != dead_end:
+                continue
+            if is_dead_end or dead_end is not None:
                 return target
-        return None
+            # without dead_end given, dead ends are preferred, so keep looking for one
+            found = found or target
+        return found
 
     def __len__(self):
         return len(self.dead_ends) + len(self.others)
@@ -180,6 +208,8 @@ class ERPlacementState:
     """A lookup table of all unconnected ER targets"""
     coupled: bool
     """Whether entrance randomization is operating in coupled mode"""
+    _pending_advancements: list[Location]
+    """Advancement locations of the world that have not been collected into collection_state yet"""
 
     def __init__(self, world: World, entrance_lookup: EntranceLookup, coupled: bool):
         self.placements = []
@@ -188,11 +218,38 @@ class ERPlacementState:
         self.coupled = coupled
         self.collection_state = world.multiworld.get_all_state(False, True)
         self.entrance_lookup = entrance_lookup
+        self.find_pending_advancements()
 
     @property
     def placed_regions(self) -> set[Region]:
         return self.collection_state.reachable_regions[self.world.player]
 
+    def find_pending_advancements(self) -> None:
+        """Find the advancement locations of the world to sweep, needed again after items were placed"""
+        self._pending_advancements = [location for location in self.world.multiworld.get_locations(self.world.player)
+                                      if location.advancement and location not in self.collection_state.advancements]
+
+    def update_reachable_regions(self, new_exits: list[Entrance] | None = None) -> None:
+        """
+        Updates the reachable regions of the world after a placement.
+
+        :param new_exits: The exits that were connected, if the state was up to date before connecting them. Then only
+                          the regions behind them are searched instead of retrying every blocked connection.
+        """
+        if new_exits is None:
+            self.collection_state.update_reachable_regions(self.world.player)
+        else:
+            self.collection_state.update_reachable_regions_from(self.world.player, new_exits)
+
+    def sweep_for_advancements(self) -> None:
+        """
+        Sweeps the advancement locations of the world. Changing connections only changes what this world can reach, so
+        the locations of other worlds don't have to be checked again.
+        """
+        self.collection_state.sweep_for_advancements(self._pending_advancements)
+        self._pending_advancements = [location for location in self._pending_advancements
+                                      if location not in self.collection_state.advancements]
+
     def find_placeable_exits(self, check_validity: bool, usable_exits: list[Entrance]) -> list[Entrance]:
         if check_validity:
             blocked_connections = self.collection_state.blocked_connections[self.world.player]
@@ -219,16 +276,22 @@ class ERPlacementState:
 
     def test_speculative_connection(self, source_exit: Entrance, target_entrance: Entrance,
                                     usable_exits: set[Entrance]) -> bool:
+        player = self.world.player
+        if self.collection_state.stale[player]:
+            self.collection_state.update_reachable_regions(player)
+        target_region = target_entrance.connected_region
         copied_state = self.collection_state.copy()
         # simulated connection. A real connection is unsafe because the region graph is shallow-copied and would
-        # propagate back to the real multiworld.
-        copied_state.reachable_regions[self.world.player].add(target_entrance.connected_region)
-        copied_state.blocked_connections[self.world.player].remove(source_exit)
-        copied_state.blocked_connections[self.world.player].update(target_entrance.connected_region.exits)
-        copied_state.update_reachable_regions(self.world.player)
-        copied_state.sweep_for_advancements()
+        # propagate back to the real multiworld. The copy was up to date before, so only the regions behind the new
+        # connection and the world's pending advancements have to be searched.
+        copied_state.reachable_regions[player].add(target_region)
+        copied_state.blocked_connections[player].remove(source_exit)
+        copied_state.blocked_connections[player].update(target_region.exits)
+        copied_state.update_reachable_regions_from(player, [
+            *target_region.exits, *copied_state.multiworld.indirect_connections.get(target_region, ())])
+        copied_state.sweep_for_advancements(self._pending_advancements)
         # test that at there are newly reachable randomized exits that are ACTUALLY reachable
-        available_randomized_exits = copied_state.blocked_connections[self.world.player]
+        available_randomized_exits = copied_state.blocked_connections[player]
         for _exit in available_randomized_exits:
             if _exit.connected_region:
                 continue
@@ -399,15 +462,17 @@ def randomize_entrances(
     er_state.collection_state.update_reachable_regions(world.player)
 
     def do_placement(source_exit: Entrance, target_entrance: Entrance) -> None:
+        up_to_date = not er_state.collection_state.stale[world.player]
         placed_exits, paired_entrances = er_state.connect(source_exit, target_entrance)
-        # propagate new connections
-        er_state.collection_state.update_reachable_regions(world.player)
-        er_state.collection_state.sweep_for_advancements()
+        # propagate new connections, only searching from them if nothing else changed
+        er_state.update_reachable_regions(placed_exits if up_to_date else None)
+        er_state.sweep_for_advancements()
         if on_connect:
             change = on_connect(er_state, placed_exits, paired_entrances)
             if change:
-                er_state.collection_state.update_reachable_regions(world.player)
-                er_state.collection_state.sweep_for_advancements()
+                er_state.find_pending_advancements()
+                er_state.update_reachable_regions()
+                er_state.sweep_for_advancements()
 
     def needs_speculative_sweep(dead_end: bool, require_new_exits: bool, placeable_exits: list[Entrance]) -> bool:
         # speculative sweep is expensive. We currently only do it as a last resort, if we might cap off the graph
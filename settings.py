@@ -36,6 +36,13 @@ def _update_cache() -> None:
         return
 
     try:
+        import worlds
+        if worlds.lazy_world_loading:
+            # the world index knows which worlds have settings, so they only get imported when their settings are used
+            for indexed_world in worlds.world_index.values():
+                if indexed_world["settings_key"]:
+                    _world_settings_name_cache[indexed_world["settings_key"]] = indexed_world["world_class"]
+            return
         from worlds.AutoWorld import AutoWorldRegister
         for world in AutoWorldRegister.world_types.values():
             annotation = world.__annotations__.get("settings", None)
@@ -679,6 +686,49 @@ class GeneratorOptions(Group):
         OFF = 0
         ON = 1
 
+    class YamlWorkers(int):
+        """
+        Number of processes to read player files and roll their options with, 0 for one per CPU core.
+        Starting processes takes a while, so this only speeds up generating with many player files.
+        With more than one, each player's options are rolled from their own seed, so a seed rolls differently than
+        with a single one.
+        """
+
+    class StageWorkers(int):
+        """
+        Number of threads to run generation steps in, for worlds that declare them to only touch their own slot.
+        0 for one per CPU core. Only speeds up steps that wait on files or C code, unless Python runs without the GIL.
+        """
+
+    class OutputWorkers(int):
+        """
+        Number of worlds to create output files for at the same time, 0 for one per CPU core.
+        """
+
+    class OutputMemoryBudget(int):
+        """
+        Memory in MiB that output of worlds may use at the same time, going by what worlds estimate they need.
+        0 for no limit.
+        """
+
+    class ForkOutput(Bool):
+        """
+        Create output files of worlds that allow it in forked processes, so they don't compete with other threads.
+        Only used on systems that can fork, and if no other threads run yet when output starts.
+        """
+
+    class MultidataCompression(str):
+        """
+        How to compress the multidata (.archipelago) file.
+        zlib -> can be read by all servers (Default)
+        lzma -> smaller, but slower and only read by servers that support it
+        """
+
+    class MultidataCompressionLevel(int):
+        """
+        Compression level of the multidata, from 0 (fastest) to 9 (smallest).
+        """
+
     class PanicMethod(str):
         """
         What to do if the current item placements appear unsolvable.
@@ -696,6 +746,13 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    yaml_workers: YamlWorkers = YamlWorkers(1)
+    stage_workers: StageWorkers = StageWorkers(1)
+    output_workers: OutputWorkers = OutputWorkers(0)
+    output_memory_budget: OutputMemoryBudget = OutputMemoryBudget(0)
+    fork_output: ForkOutput | bool = False
+    multidata_compression: MultidataCompression = MultidataCompression("zlib")
+    multidata_compression_level: MultidataCompressionLevel = MultidataCompressionLevel(9)
     loglevel: str = "info"
     logtime: bool = False
 
@@ -0,0 +1,80 @@
+def run_entrance_lookup_benchmark(grid_side_length: int = 40) -> None:
+    """
+    Benchmark EntranceLookup on a grid of regions like the entrance rando tests use, which for the default side length
+    of 40 has over 6000 randomizable entrances. Times finding every target by name, emptying the lookup the way
+    placements do, and a full randomize_entrances.
+    """
+    import argparse
+    import logging
+
+    from time_it import TimeIt
+
+    from BaseClasses import CollectionState, EntranceType, MultiWorld, Region
+    from Utils import init_logging
+    from entrance_rando import EntranceLookup, randomize_entrances
+    from worlds import AutoWorld
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    multiworld = MultiWorld(1)
+    multiworld.game[1] = "Archipelago"
+    multiworld.player_name = {1: "Tester"}
+    multiworld.set_seed(0)
+    args = argparse.Namespace()
+    for name, option in AutoWorld.AutoWorldRegister.world_types["Archipelago"].options_dataclass.type_hints.items():
+        setattr(args, name, {1: option.from_any(option.default)})
+    multiworld.set_options(args)
+    multiworld.state = CollectionState(multiworld)
+    world = multiworld.worlds[1]
+    world.explicit_indirect_conditions = True
+    menu = Region("Menu", 1, multiworld)
+    multiworld.regions.append(menu)
+
+    # same grid as in test_entrance_rando, with each region having a two-way entrance to its neighbours
+    # groups are 1 left, 2 right, 3 top, 4 bottom
+    def add_entrance_pair(region: Region, direction: str, group: int) -> None:
+        for entrance in (region.create_exit(f"{region.name}_{direction}"),
+                         region.create_er_target(f"{region.name}_{direction}")):
+            entrance.randomization_group = group
+            entrance.randomization_type = EntranceType.TWO_WAY
+
+    for row in range(grid_side_length):
+        for col in range(grid_side_length):
+            region = Region(f"region{row * grid_side_length + col}", 1, multiworld)
+            multiworld.regions.append(region)
+            if row == 0 and col == 0:
+                menu.connect(region)
+            for direction, group, has_neighbour in (("left", 1, col != 0), ("right", 2, col != grid_side_length - 1),
+                                                    ("top", 3, row != 0), ("bottom", 4, row != grid_side_length - 1)):
+                if has_neighbour:
+                    add_entrance_pair(region, direction, group)
+    directionally_matched_group_lookup = {1: [2], 2: [1], 3: [4], 4: [3]}
+
+    exits = {ex for region in multiworld.get_regions(1) for ex in region.exits if not ex.connected_region}
+    er_targets = sorted((entrance for region in multiworld.get_regions(1)
+                         for entrance in region.entrances if not entrance.parent_region), key=lambda x: x.name)
+    logger.info(f"Benchmarking EntranceLookup with {len(er_targets)} targets.")
+
+    with TimeIt("creating EntranceLookup", logger):
+        lookup = EntranceLookup(world.random, coupled=True, usable_exits=exits, targets=er_targets)
+    with TimeIt("find_target by name", logger):
+        for target in er_targets:
+            lookup.find_target(target.name)
+    with TimeIt("find_target by name, group and dead end", logger):
+        for target in er_targets:
+            lookup.find_target(target.name, target.randomization_group, False)
+    removal_order = list(er_targets)
+    world.random.shuffle(removal_order)
+    with TimeIt("removing all targets", logger):
+        for target in removal_order:
+            lookup.remove(target)
+
+    with TimeIt("randomize_entrances", logger):
+        randomize_entrances(world, True, directionally_matched_group_lookup)
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_entrance_lookup_benchmark()
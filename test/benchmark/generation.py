@@ -0,0 +1,196 @@
+"""
+Benchmark full generations through Main.main, for a matrix of player counts and game mixes, with and without output.
+Each generation runs in its own process, so peak memory is measured per generation.
+Results can be stored as a baseline and later runs compared against it, to catch regressions before release.
+Timings depend on the machine, so only compare against baselines written on the same machine.
+"""
+from __future__ import annotations
+
+import typing
+
+default_player_counts = (1, 10, 50, 200)
+
+# worlds without base ROMs, so output can be created without any user files
+game_mixes: dict[str, tuple[str, ...]] = {
+    "light": ("ChecksFinder", "VVVVVV", "A Short Hike", "Meritous"),
+    "mixed": ("Hollow Knight", "Subnautica", "Timespinner", "The Witness", "Stardew Valley", "TUNIC"),
+}
+
+# kinds of Profiler sections kept in results, fill is kept by name of the fill step
+kept_section_kinds = ("step", "fill", "sweep", "balancing", "phase")
+
+SEED = 1
+
+
+class GenerationResult(typing.TypedDict):
+    wall: float
+    peak_rss: int | None
+    """peak resident memory of the generating process in bytes, if it could be measured"""
+    sections: dict[str, float]
+    """wall time of Profiler sections, by kind/name"""
+
+
+def get_run_key(mix: str, players: int, output: bool) -> str:
+    return f"{mix}/{players}/{'output' if output else 'skip_output'}"
+
+
+def _get_peak_rss() -> int | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports kiB
+
+
+def _make_args(games: list[str], output: bool, output_directory: str) -> typing.Any:
+    from Generate import mystery_argparse
+    from worlds.AutoWorld import AutoWorldRegister
+
+    args = mystery_argparse([])
+    player_ids = range(1, len(games) + 1)
+    args.multi = len(games)
+    args.game = dict(zip(player_ids, games))
+    args.name = {player: f"Player{player}" for player in player_ids}
+    args.sprite = dict.fromkeys(player_ids)
+    args.sprite_pool = dict.fromkeys(player_ids)
+    args.outputname = None
+    args.outputpath = output_directory
+    args.race = False
+    args.spoiler = 1 if output else 0
+    args.skip_prog_balancing = False
+    args.skip_output = not output
+    args.spoiler_only = False
+    args.csv_output = False
+    for player, game in args.game.items():
+        for name, option in AutoWorldRegister.world_types[game].options_dataclass.type_hints.items():
+            if not hasattr(args, name):
+                setattr(args, name, {})
+            getattr(args, name)[player] = option.from_any(option.default)
+    return args
+
+
+def run_generation(games: list[str], output: bool) -> GenerationResult:
+    """Generate a multiworld with default options of games, returning its timings. Meant to run in a new process."""
+    import logging
+    import tempfile
+
+    import Main
+    from Profiler import GenerationProfiler
+
+    logging.basicConfig(level=logging.WARNING)
+    with tempfile.TemporaryDirectory() as output_directory:
+        args = _make_args(games, output, output_directory)
+        with GenerationProfiler() as profiler:
+            Main.main(args, SEED)
+    sections: dict[str, float] = {}
+    for section in profiler.get_report()["sections"]:
+        if section["kind"] in kept_section_kinds and "player" not in section:
+            key = f"{section['kind']}/{section['name']}"
+            sections[key] = sections.get(key, 0) + section["wall"]
+    return {"wall": profiler.wall, "peak_rss": _get_peak_rss(), "sections": sections}
+
+
+def compare_to_baseline(results: dict[str, GenerationResult], baseline: dict[str, GenerationResult],
+                        tolerance: float = 1.25, min_difference: float = 0.1) -> list[str]:
+    """Describe runs and their sections that took tolerance times longer than in baseline,
+    ignoring differences below min_difference seconds as noise."""
+    regressions: list[str] = []
+
+    def check(name: str, current: float, previous: float) -> None:
+        if current > previous * tolerance and current - previous > min_difference:
+            regressions.append(f"{name} took {current:.2f}s, was {previous:.2f}s ({current / previous:.2f}x)")
+
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        previous_result = baseline[key]
+        check(key, result["wall"], previous_result["wall"])
+        for section, wall in result["sections"].items():
+            if section in previous_result["sections"]:
+                check(f"{key} {section}", wall, previous_result["sections"][section])
+        if result["peak_rss"] and previous_result["peak_rss"] \
+                and result["peak_rss"] > previous_result["peak_rss"] * tolerance:
+            regressions.append(f"{key} peak memory {result['peak_rss'] / 2 ** 20:.0f} MiB, "
+                               f"was {previous_result['peak_rss'] / 2 ** 20:.0f} MiB")
+    return regressions
+
+
+def run_generation_benchmark(player_counts: typing.Iterable[int] = default_player_counts,
+                             mixes: typing.Iterable[str] = tuple(game_mixes),
+                             baseline_path: str | None = None, write_baseline: bool = False,
+                             tolerance: float = 1.25) -> list[str]:
+    """Run generations for each combination of mix, player count and output, log their timings and
+    compare them to the baseline at baseline_path, if it exists. Returns the found regressions."""
+    import concurrent.futures
+    import json
+    import logging
+    import multiprocessing
+    import os
+
+    from Utils import init_logging
+    from worlds.AutoWorld import AutoWorldRegister
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    results: dict[str, GenerationResult] = {}
+    for mix in mixes:
+        mix_games = [game for game in game_mixes[mix] if game in AutoWorldRegister.world_types]
+        if not mix_games:
+            logger.warning(f"Skipping mix {mix}, as none of its games are installed.")
+            continue
+        for players in player_counts:
+            games = [mix_games[player % len(mix_games)] for player in range(players)]
+            for output in (False, True):
+                key = get_run_key(mix, players, output)
+                # a fresh process for each generation, so worlds start cold and peak memory is its own
+                with concurrent.futures.ProcessPoolExecutor(1, multiprocessing.get_context("spawn")) as pool:
+                    try:
+                        result = pool.submit(run_generation, games, output).result()
+                    except Exception as e:
+                        logger.exception(f"{key} failed: {e}")
+                        continue
+                results[key] = result
+                rss = f"{result['peak_rss'] / 2 ** 20:.0f} MiB" if result["peak_rss"] else "unknown"
+                slowest = sorted(result["sections"].items(), key=lambda section: section[1], reverse=True)[:5]
+                logger.info(f"{key} took {result['wall']:.2f} seconds, peak memory {rss}. Slowest sections:\n" +
+                            "\n".join(f"  {wall:.4f} in {section}" for section, wall in slowest))
+
+    regressions: list[str] = []
+    if baseline_path and os.path.exists(baseline_path) and not write_baseline:
+        with open(baseline_path, encoding="utf-8") as f:
+            regressions = compare_to_baseline(results, json.load(f), tolerance)
+        if regressions:
+            logger.warning("Regressions compared to baseline:\n" + "\n".join(regressions))
+        else:
+            logger.info("No regressions compared to baseline.")
+    if baseline_path and write_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        logger.info(f"Wrote baseline to {baseline_path}.")
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+
+    from path_change import change_home
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, nargs="+", default=default_player_counts)
+    parser.add_argument("--mixes", nargs="+", choices=tuple(game_mixes), default=tuple(game_mixes))
+    parser.add_argument("--baseline", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           "generation_baseline.json"),
+                        help="Baseline file to compare to, or to write with --write_baseline.")
+    parser.add_argument("--write_baseline", action="store_true", help="Store the results as new baseline.")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="Factor by which a run or section has to be slower than its baseline to be reported.")
+    arguments = parser.parse_args()
+
+    change_home()
+    sys.exit(1 if run_generation_benchmark(arguments.players, arguments.mixes, arguments.baseline,
+                                           arguments.write_baseline, arguments.tolerance) else 0)
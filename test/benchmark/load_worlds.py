@@ -20,6 +20,28 @@ def run_load_worlds_benchmark():
     for module in world_sources:
         logger.info(f"{module} took {module.time_taken:.4f} seconds.")
 
+    run_manifest_lookup_benchmark()
+
+
+def run_manifest_lookup_benchmark():
+    """Compare finding world folder manifests through the manifest index against walking every world folder."""
+    import logging
+
+    from time_it import TimeIt
+    from worlds import world_sources, find_world_manifest, _walk_for_manifest
+
+    logger = logging.getLogger("Benchmark")
+    folders = [world_source for world_source in world_sources if not world_source.is_zip]
+
+    with TimeIt("walking world folders for manifests", logger) as walk_timer:
+        for world_source in folders:
+            _walk_for_manifest(world_source.resolved_path)
+    with TimeIt("manifest lookup", logger) as lookup_timer:
+        for world_source in folders:
+            find_world_manifest(world_source)
+    logger.info(f"Manifest lookup saved {walk_timer.dif - lookup_timer.dif:.4f} seconds "
+                f"for {len(folders)} world folders.")
+
 
 if __name__ == "__main__":
     from path_change import change_home
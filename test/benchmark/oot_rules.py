@@ -0,0 +1,60 @@
+def run_oot_rules_benchmark(players: int = 4) -> None:
+    """
+    Benchmark creating the regions and rules of an OoT-only multiworld, which parses and compiles every logic rule.
+    Compares an empty compiled rule cache, a cache warmed by an earlier generation in the same process,
+    and a cache loaded from disk like a new generator process would with the rule_cache setting.
+    """
+    import argparse
+    import logging
+    import os
+    import tempfile
+
+    from time_it import TimeIt
+
+    from BaseClasses import CollectionState, MultiWorld
+    from Utils import init_logging
+    from worlds import AutoWorld
+    from worlds.oot import RuleParser
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+    game = "Ocarina of Time"
+
+    def create_multiworld() -> None:
+        multiworld = MultiWorld(players)
+        multiworld.game = {player: game for player in multiworld.player_ids}
+        multiworld.player_name = {player: f"Tester{player}" for player in multiworld.player_ids}
+        multiworld.set_seed(0)
+        args = argparse.Namespace()
+        for name, option in AutoWorld.AutoWorldRegister.world_types[game].options_dataclass.type_hints.items():
+            setattr(args, name, {player: option.from_any(option.default) for player in multiworld.player_ids})
+        multiworld.set_options(args)
+        multiworld.state = CollectionState(multiworld)
+        for step in ("generate_early", "create_regions", "create_items", "set_rules"):
+            AutoWorld.call_all(multiworld, step)
+
+    # the first generation also loads data files and aliases, which later ones don't have to
+    create_multiworld()
+    logger.info(f"Benchmarking OoT rules for {players} players, {len(RuleParser.compiled_rules)} distinct rules.")
+
+    RuleParser.compiled_rules.clear()
+    with TimeIt(f"{players} players, empty rule cache", logger):
+        create_multiworld()
+    with TimeIt(f"{players} players, warm rule cache", logger):
+        create_multiworld()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "rules.bin")
+        with TimeIt("saving rule cache", logger):
+            RuleParser.save_rule_cache(path)
+        RuleParser.compiled_rules.clear()
+        with TimeIt("loading rule cache", logger):
+            RuleParser.load_rule_cache(path)
+    with TimeIt(f"{players} players, rule cache loaded from disk", logger):
+        create_multiworld()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_oot_rules_benchmark()
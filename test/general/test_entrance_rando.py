@@ -173,6 +173,29 @@ class TestEntranceLookup(unittest.TestCase):
         # wrong deadendedness
         self.assertIsNone(lookup.find_target("region0_right", ERTestGroups.RIGHT, True))
 
+    def test_remove(self):
+        """Tests that removing targets in any order keeps the remaining targets findable"""
+        multiworld = generate_test_multiworld()
+        generate_disconnected_region_grid(multiworld, 5)
+        exits_set = set([ex for region in multiworld.get_regions(1)
+                        for ex in region.exits if not ex.connected_region])
+
+        er_targets = [entrance for region in multiworld.get_regions(1)
+                      for entrance in region.entrances if not entrance.parent_region]
+        lookup = EntranceLookup(multiworld.worlds[1].random, coupled=True, usable_exits=exits_set, targets=er_targets)
+        remaining = list(er_targets)
+        multiworld.worlds[1].random.shuffle(remaining)
+        while remaining:
+            lookup.get_targets([ERTestGroups.TOP, ERTestGroups.BOTTOM], False, True)
+            removed = remaining.pop()
+            lookup.remove(removed)
+            self.assertIsNone(lookup.find_target(removed.name))
+            self.assertEqual(len(remaining), len(lookup))
+            self.assertCountEqual(remaining, [*lookup.dead_ends, *lookup.others])
+            for target in remaining:
+                self.assertIs(target, lookup.find_target(target.name, target.randomization_group))
+
+
 class TestBakeTargetGroupLookup(unittest.TestCase):
     def test_lookup_generation(self):
         multiworld = generate_test_multiworld()
@@ -367,6 +390,60 @@ class TestRandomizeEntrances(unittest.TestCase):
         # if we didn't visit every placement the verification on_connect doesn't really mean much
         self.assertEqual(len(result.placements), seen_placement_count)
 
+    def test_speculative_connection_unchanged_state(self):
+        """tests that testing a connection leaves the collection state as it was"""
+        multiworld = generate_test_multiworld()
+        generate_disconnected_region_grid(multiworld, 3, 1)
+        for location, item in zip(multiworld.get_locations(1), generate_items(9, 1, True)):
+            location.place_locked_item(item)
+        exits = {ex for region in multiworld.get_regions(1) for ex in region.exits if not ex.connected_region}
+        er_targets = [entrance for region in multiworld.get_regions(1)
+                      for entrance in region.entrances if not entrance.parent_region]
+        lookup = EntranceLookup(multiworld.worlds[1].random, coupled=True, usable_exits=exits, targets=er_targets)
+        er_state = ERPlacementState(multiworld.worlds[1], lookup, coupled=True)
+        state = er_state.collection_state
+        state.update_reachable_regions(1)
+        er_state.sweep_for_advancements()
+
+        def snapshot():
+            return (set(state.reachable_regions[1]), set(state.blocked_connections[1]), set(state.advancements),
+                    set(state.locations_checked), dict(state.prog_items[1]), dict(state.path), dict(state.stale))
+
+        before = snapshot()
+        self.assertTrue(er_state.test_speculative_connection(multiworld.get_entrance("region0_right", 1),
+                                                             lookup.find_target("region1_left"), exits))
+        self.assertEqual(before, snapshot())
+        self.assertFalse(state.stale[1])
+        self.assertNotIn(multiworld.get_region("region1", 1), er_state.placed_regions)
+
+    def test_connections_without_explicit_indirect_conditions(self):
+        """tests that placing and testing connections finds regions behind unregistered indirect conditions"""
+        multiworld = generate_test_multiworld()
+        multiworld.worlds[1].explicit_indirect_conditions = False
+        generate_disconnected_region_grid(multiworld, 3, 1)
+        for location, item in zip(multiworld.get_locations(1), generate_items(9, 1, True)):
+            location.place_locked_item(item)
+        behind = Region("behind", 1, multiworld)
+        multiworld.regions.append(behind)
+        multiworld.get_region("Menu", 1).connect(behind, rule=lambda state: state.can_reach_region("region1", 1))
+        exits = {ex for region in multiworld.get_regions(1) for ex in region.exits if not ex.connected_region}
+        er_targets = [entrance for region in multiworld.get_regions(1)
+                      for entrance in region.entrances if not entrance.parent_region]
+        lookup = EntranceLookup(multiworld.worlds[1].random, coupled=True, usable_exits=exits, targets=er_targets)
+        er_state = ERPlacementState(multiworld.worlds[1], lookup, coupled=True)
+        er_state.collection_state.update_reachable_regions(1)
+        er_state.sweep_for_advancements()
+
+        self.assertTrue(er_state.test_speculative_connection(multiworld.get_entrance("region0_right", 1),
+                                                             lookup.find_target("region1_left"), exits))
+        self.assertNotIn(behind, er_state.placed_regions)
+
+        placed_exits, _ = er_state.connect(multiworld.get_entrance("region0_right", 1),
+                                           lookup.find_target("region1_left"))
+        er_state.update_reachable_regions(placed_exits)
+        self.assertIn(multiworld.get_region("region1", 1), er_state.placed_regions)
+        self.assertIn(behind, er_state.placed_regions)
+
     def test_oneway_twoway_pairing(self):
         """tests that 1 ways are only paired to 1 ways and 2 ways are only paired to 2 ways"""
         multiworld = generate_test_multiworld()
@@ -0,0 +1,155 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from Main import OutputScheduler
+from worlds.AutoWorld import AutoWorldRegister
+from . import setup_multiworld
+
+
+class TestOutputScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = setup_multiworld([AutoWorldRegister.world_types["ChecksFinder"]] * 4, ())
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def set_output(self, player: int, memory: int) -> None:
+        def generate_output(output_directory: str) -> None:
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            time.sleep(0.05)
+            with self.lock:
+                self.active -= 1
+            with open(os.path.join(output_directory, f"{player}.txt"), "w") as f:
+                f.write(str(os.getpid()))
+
+        world = self.multiworld.worlds[player]
+        world.generate_output = generate_output  # type: ignore[method-assign]
+        world.output_memory = memory  # type: ignore[misc]
+
+    def test_limits(self) -> None:
+        """Verify output stays within the worker and memory limits, and still runs when a world is over budget"""
+        for player, memory in zip(self.multiworld.player_ids, (10, 10, 10, 30)):
+            self.set_output(player, memory)
+        scheduler = OutputScheduler(self.multiworld, self.temp_dir.name, 3, memory_budget=20)
+        scheduler.run(list(self.multiworld.player_ids))
+        self.assertEqual(2, self.max_active)
+        self.assertEqual(set(self.multiworld.player_ids), scheduler.timings.keys())
+        self.assertEqual(sorted(f"{player}.txt" for player in self.multiworld.player_ids),
+                         sorted(os.listdir(self.temp_dir.name)))
+
+        self.max_active = 0
+        OutputScheduler(self.multiworld, self.temp_dir.name, 3).run(list(self.multiworld.player_ids))
+        self.assertEqual(3, self.max_active)
+
+    def test_error(self) -> None:
+        """Verify an error in output is raised and no further output is started"""
+        started: list[int] = []
+
+        def failing_output(output_directory: str) -> None:
+            raise ValueError("broken output")
+
+        for player in self.multiworld.player_ids:
+            self.multiworld.worlds[player].generate_output = \
+                lambda output_directory, player=player: started.append(player)  # type: ignore[method-assign]
+        self.multiworld.worlds[1].generate_output = failing_output  # type: ignore[method-assign]
+        with self.assertRaises(ValueError):
+            OutputScheduler(self.multiworld, self.temp_dir.name, 1).run(list(self.multiworld.player_ids))
+        self.assertEqual([], started)
+
+    def skip_if_threads_running(self) -> None:
+        if threading.active_count() > 1:
+            self.skipTest("Other threads are running, for example those of pytest-xdist, so output is not forked.")
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork is not available")
+    def test_fork(self) -> None:
+        """Verify fork-safe worlds create their output in a child process and errors are passed back"""
+        self.skip_if_threads_running()
+        for player in self.multiworld.player_ids:
+            self.set_output(player, 0)
+        self.multiworld.worlds[1].fork_safe_output = True  # type: ignore[misc]
+        OutputScheduler(self.multiworld, self.temp_dir.name, 2, fork=True).run([1, 2])
+        with open(os.path.join(self.temp_dir.name, "1.txt")) as f:
+            self.assertNotEqual(str(os.getpid()), f.read())
+        with open(os.path.join(self.temp_dir.name, "2.txt")) as f:
+            self.assertEqual(str(os.getpid()), f.read())
+
+        def failing_output(output_directory: str) -> None:
+            raise ValueError("broken output")
+
+        self.multiworld.worlds[1].generate_output = failing_output  # type: ignore[method-assign]
+        with self.assertRaisesRegex(Exception, "broken output"):
+            OutputScheduler(self.multiworld, self.temp_dir.name, 1, fork=True).run([1])
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork is not available")
+    def test_fork_within_limits(self) -> None:
+        """Verify output processes are only forked once output gets started, within the worker and memory limits"""
+        self.skip_if_threads_running()
+        for player in self.multiworld.player_ids:
+            self.set_output(player, 10)
+            self.multiworld.worlds[player].fork_safe_output = True  # type: ignore[misc]
+        started: list[tuple[int, float, float]] = []
+
+        def generate_output(output_directory: str) -> None:
+            start = time.monotonic()
+            time.sleep(0.2)
+            with open(os.path.join(output_directory, f"{os.getpid()}.txt"), "w") as f:
+                f.write(f"{start} {time.monotonic()}")
+
+        for player in self.multiworld.player_ids:
+            self.multiworld.worlds[player].generate_output = generate_output  # type: ignore[method-assign]
+        OutputScheduler(self.multiworld, self.temp_dir.name, 4, memory_budget=20, fork=True).run(
+            list(self.multiworld.player_ids))
+        for file_name in os.listdir(self.temp_dir.name):
+            with open(os.path.join(self.temp_dir.name, file_name)) as f:
+                start, end = map(float, f.read().split())
+            started.append((int(file_name.split(".")[0]), start, end))
+        self.assertEqual(4, len({pid for pid, _, _ in started}))
+        for _, start, _ in started:
+            self.assertLessEqual(sum(other_start <= start < other_end for _, other_start, other_end in started), 2)
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork is not available")
+    def test_fork_killed(self) -> None:
+        """Verify a forked output process dying without a result raises instead of waiting for it forever"""
+        self.skip_if_threads_running()
+        self.multiworld.worlds[1].fork_safe_output = True  # type: ignore[misc]
+        self.multiworld.worlds[1].generate_output = lambda output_directory: os._exit(3)  # type: ignore[method-assign]
+        scheduler = OutputScheduler(self.multiworld, self.temp_dir.name, 1, fork=True)
+        with self.assertRaisesRegex(Exception, "ended unexpectedly"):
+            scheduler.run([1])
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork is not available")
+    def test_no_fork_with_threads(self) -> None:
+        """Verify output is not forked once other threads are running, and the fork server exits after output"""
+        self.skip_if_threads_running()
+        for player in self.multiworld.player_ids:
+            self.set_output(player, 0)
+            self.multiworld.worlds[player].fork_safe_output = True  # type: ignore[misc]
+        stop = threading.Event()
+        thread = threading.Thread(target=stop.wait)
+        thread.start()
+        try:
+            scheduler = OutputScheduler(self.multiworld, self.temp_dir.name, 1, fork=True)
+            scheduler.fork_outputs([1])
+            self.assertEqual({}, scheduler.forked)
+            self.assertIsNone(scheduler.fork_server)
+        finally:
+            stop.set()
+            thread.join()
+
+        scheduler = OutputScheduler(self.multiworld, self.temp_dir.name, 1, fork=True)
+        scheduler.fork_outputs([1, 2])
+        assert scheduler.fork_server
+        process = scheduler.fork_server.process
+        scheduler.run([1])
+        self.assertFalse(process.is_alive())
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, "2.txt")))
@@ -0,0 +1,59 @@
+import unittest
+
+from BaseClasses import MultiWorld
+from worlds.AutoWorld import AutoWorldRegister, World, call_all, parallel_stage_names
+from worlds.AutoWorld import _get_parallel_runs
+from . import gen_steps, setup_multiworld
+
+
+class TestParallelStages(unittest.TestCase):
+    game = "ChecksFinder"
+    serial_game = "A Link to the Past"
+    world_type: type[World]
+
+    def setUp(self) -> None:
+        self.world_type = AutoWorldRegister.world_types[self.game]
+        self.original_parallel_stages = self.world_type.parallel_stages
+        self.world_type.parallel_stages = parallel_stage_names
+
+    def tearDown(self) -> None:
+        self.world_type.parallel_stages = self.original_parallel_stages
+
+    def generate(self, stage_workers: int) -> MultiWorld:
+        serial_world_type = AutoWorldRegister.world_types[self.serial_game]
+        multiworld = setup_multiworld([self.world_type, self.world_type, serial_world_type,
+                                       self.world_type, self.world_type], (), seed=1)
+        multiworld.stage_workers = stage_workers
+        for step in gen_steps:
+            call_all(multiworld, step)
+        return multiworld
+
+    def test_same_result(self) -> None:
+        """Verify running opted-in steps in parallel yields the same multiworld as running them in order"""
+        serial = self.generate(1)
+        parallel = self.generate(3)
+        self.assertEqual([(item.name, item.player) for item in serial.itempool],
+                         [(item.name, item.player) for item in parallel.itempool])
+        self.assertEqual([(region.name, region.player) for region in serial.get_regions()],
+                         [(region.name, region.player) for region in parallel.get_regions()])
+        self.assertEqual([(location.name, location.player) for location in serial.get_locations()],
+                         [(location.name, location.player) for location in parallel.get_locations()])
+        self.assertEqual(serial.random.random(), parallel.random.random())
+
+    def test_runs_keep_order(self) -> None:
+        """Verify only consecutive opted-in players run together, so other players keep their place in the order"""
+        multiworld = self.generate(3)
+        self.assertEqual([[1, 2], [3], [4, 5]], _get_parallel_runs(multiworld, "create_items"))
+
+    def test_multiworld_random_blocked(self) -> None:
+        """Verify opted-in steps can't use the shared random, as the order of calls is not deterministic"""
+        multiworld = setup_multiworld([self.world_type] * 2, (), seed=1)
+        multiworld.stage_workers = 2
+        original_generate_early = self.world_type.generate_early
+        self.world_type.generate_early = lambda world: world.multiworld.random.random()  # type: ignore[method-assign]
+        try:
+            with self.assertRaises(RuntimeError):
+                call_all(multiworld, "generate_early")
+        finally:
+            self.world_type.generate_early = original_generate_early
+        multiworld.random.random()
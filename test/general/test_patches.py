@@ -1,6 +1,17 @@
-﻿import unittest
+﻿import hashlib
+import os
+import random
+import tempfile
+import unittest
+import zipfile
+from io import BytesIO
+from typing import ClassVar
+from unittest import mock
+
+import Patch
 from worlds.AutoWorld import AutoWorldRegister
-from worlds.Files import AutoPatchRegister
+from worlds.Files import APPatchExtension, APPlayerContainer, APProcedurePatch, APTokenMixin, APTokenTypes, \
+    AutoPatchRegister, _apply_compact_tokens, get_compressed_container_endings, source_data_cache
 
 
 class TestPatches(unittest.TestCase):
@@ -9,3 +20,168 @@ class TestPatches(unittest.TestCase):
             with self.subTest(game=game_name):
                 self.assertIn(game_name, AutoWorldRegister.world_types.keys(),
                               f"Patch '{game_name}' does not match the name of any world.")
+
+
+class TestSourceData(unittest.TestCase):
+    def test_shared_source_data(self) -> None:
+        """Verify base data is loaded once for all patch classes that accept its checksum"""
+        base = b"base data of the source data test"
+        loads: list[type] = []
+
+        class FirstPatch(APProcedurePatch):
+            hash = "0" * 32
+
+            @classmethod
+            def get_source_data(cls) -> bytes:
+                loads.append(cls)
+                return base
+
+        class SecondPatch(FirstPatch):
+            hash: ClassVar[list[str]] = ["1" * 32, hashlib.md5(base).hexdigest()]
+
+        with mock.patch.dict(source_data_cache):
+            self.assertIs(base, FirstPatch.get_source_data_with_cache())
+            self.assertIs(base, SecondPatch.get_source_data_with_cache())
+            self.assertIs(base, FirstPatch.get_source_data_with_cache())
+        self.assertEqual([FirstPatch], loads)
+
+    def test_batch_duplicate_targets(self) -> None:
+        """Verify a batch refuses to write several patches to the same file"""
+        self.assertEqual([], Patch.create_rom_files([]))
+        handlers = list(AutoPatchRegister.file_endings.items())
+        if len(handlers) < 2:
+            self.skipTest("needs two patch handlers")
+        (first_ending, first), (second_ending, second) = handlers[:2]
+        with mock.patch.object(second, "result_file_ending", first.result_file_ending):
+            with self.assertRaises(ValueError):
+                Patch.create_rom_files([f"seed{first_ending}", f"seed{second_ending}"])
+
+
+class TestContainerFiles(unittest.TestCase):
+    def test_streamed_files(self) -> None:
+        """Verify files can be streamed into a container and are only read from it when needed"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source_path = os.path.join(temp_dir, "source.bin")
+            with open(source_path, "wb") as f:
+                f.write(bytes(range(256)) * 1000)
+            container_path = os.path.join(temp_dir, "container.zip")
+            patch = APProcedurePatch(container_path)
+            patch.hash = None
+            patch.procedure = [("apply_bsdiff4", ["delta.bsdiff4"])]
+            patch.write_file("small.bin", b"small")
+            patch.write_file_from("delta.bsdiff4", source_path)
+            stream = BytesIO(b"skipped streamed")
+            stream.seek(8)
+            patch.write_file_from("stream.bin", stream)
+            patch.write()
+
+            patch = APProcedurePatch(container_path)
+            patch.read()
+            self.assertEqual({}, patch.files)
+            self.assertEqual(b"small", patch.get_file("small.bin"))
+            self.assertEqual(b"streamed", patch.get_file("stream.bin"))
+            with patch.open_file("delta.bsdiff4") as f:
+                self.assertEqual(bytes(range(256)), f.read(256))
+            with self.assertRaises(KeyError):
+                patch.get_file("missing.bin")
+
+            # writing over the container it was read from keeps what wasn't read yet
+            patch.hash = None
+            patch.write_file("small.bin", b"changed")
+            patch.write()
+            patch = APProcedurePatch(container_path)
+            self.assertEqual(b"changed", patch.get_file("small.bin"))
+            self.assertEqual(b"streamed", patch.get_file("stream.bin"))
+            with open(source_path, "rb") as f:
+                self.assertEqual(f.read(), patch.get_file("delta.bsdiff4"))
+
+    def test_compressed_container_endings(self) -> None:
+        """Verify only file endings of containers that compress their contents count as compressed"""
+        class CompressedContainer(APPlayerContainer):
+            patch_file_ending = ".apcompressedtest"
+
+        class StoredContainer(APPlayerContainer):
+            compression_method = zipfile.ZIP_STORED
+            patch_file_ending = ".apstoredtest"
+
+        endings = get_compressed_container_endings()
+        self.assertIn(CompressedContainer.patch_file_ending, endings)
+        self.assertNotIn(StoredContainer.patch_file_ending, endings)
+        self.assertNotIn("", endings)
+
+
+class TestTokens(unittest.TestCase):
+    def make_tokens(self) -> APTokenMixin:
+        rng = random.Random(46)
+        tokens = APTokenMixin()
+        for _ in range(2000):
+            offset = rng.randrange(0x1000)
+            roll = rng.random()
+            if roll < 0.8:
+                tokens.write_token(APTokenTypes.WRITE, offset, rng.randbytes(rng.randint(1, 8)))
+            elif roll < 0.85:
+                tokens.write_token(APTokenTypes.COPY, offset, (rng.randint(0, 16), rng.randrange(0xF00)))
+            elif roll < 0.9:
+                tokens.write_token(APTokenTypes.RLE, offset, (rng.randint(0, 16), rng.randrange(0x100)))
+            else:
+                tokens.write_token(rng.choice((APTokenTypes.AND_8, APTokenTypes.OR_8, APTokenTypes.XOR_8)),
+                                   offset, rng.randrange(0x100))
+        return tokens
+
+    def test_compact_tokens(self) -> None:
+        """Verify compact tokens patch the same as the original token format, with fewer and smaller tokens"""
+        tokens = self.make_tokens()
+        patch = APProcedurePatch()
+        patch.write_file("tokens.bin", tokens.get_token_binary())
+        patch.write_file("compact_tokens.bin", tokens.get_compact_token_binary())
+        self.assertLess(len(patch.files["compact_tokens.bin"]), len(patch.files["tokens.bin"]))
+
+        rom = bytes(range(256)) * 0x11
+        expected = APPatchExtension.apply_tokens(patch, rom, "tokens.bin")
+        self.assertEqual(expected, APPatchExtension.apply_compact_tokens(patch, rom, "compact_tokens.bin"))
+        rom_data = bytearray(rom)
+        _apply_compact_tokens(rom_data, patch.files["compact_tokens.bin"])
+        self.assertEqual(expected, rom_data)
+
+    def test_compact_writes_merged(self) -> None:
+        """Verify touching and overlapping writes are merged, with later writes winning"""
+        tokens = APTokenMixin()
+        tokens.write_token(APTokenTypes.WRITE, 0x12, b"\x01\x02")
+        tokens.write_token(APTokenTypes.WRITE, 0x10, b"\x03\x04\x05")
+        tokens.write_token(APTokenTypes.WRITE, 0x14, b"\x06")
+        tokens.write_token(APTokenTypes.XOR_8, 0x10, 0xFF)
+        tokens.write_token(APTokenTypes.WRITE, 0x10, b"\x07")
+        tokens.write_token(APTokenTypes.WRITE, 0x20, b"\x08")
+        token_data = tokens.get_compact_token_binary()
+        self.assertEqual(4, int.from_bytes(token_data[5:9], "little"))
+        rom_data = bytearray(0x18)
+        _apply_compact_tokens(rom_data, token_data)
+        self.assertEqual(b"\x07\x04\x05\x02\x06", rom_data[0x10:0x15])
+        self.assertEqual(b"\x08", rom_data[0x20:])
+
+    def test_broken_compact_tokens(self) -> None:
+        """Verify broken token files are rejected"""
+        token_data = self.make_tokens().get_compact_token_binary()
+        patch = APProcedurePatch()
+        for broken in (b"", token_data[:-1], token_data + b"\x00", b"APTK\x02" + token_data[5:],
+                       token_data[:9] + b"\x06" + token_data[10:]):
+            patch.write_file("tokens.bin", broken)
+            with self.subTest(length=len(broken)), self.assertRaises(ValueError):
+                _apply_compact_tokens(bytearray(0x1000), broken)
+            with self.subTest(length=len(broken), step=True), self.assertRaises(ValueError):
+                APPatchExtension.apply_compact_tokens(patch, bytes(0x1000), "tokens.bin")
+
+    def test_compact_tokens_unchanged_on_error(self) -> None:
+        """Verify a token file reading past the end is rejected before any token is applied"""
+        tokens = APTokenMixin()
+        tokens.write_token(APTokenTypes.WRITE, 0x10, b"\x01")
+        tokens.write_token(APTokenTypes.COPY, 0x20, (0x800, 0xFFF))
+        token_data = tokens.get_compact_token_binary()
+        patch = APProcedurePatch()
+        patch.write_file("tokens.bin", token_data)
+        rom_data = bytearray(0x1000)
+        with self.assertRaisesRegex(ValueError, "past the end"):
+            _apply_compact_tokens(rom_data, token_data)
+        self.assertEqual(bytes(0x1000), rom_data)
+        with self.assertRaisesRegex(ValueError, "past the end"):
+            APPatchExtension.apply_compact_tokens(patch, bytes(0x1000), "tokens.bin")
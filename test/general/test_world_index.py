@@ -0,0 +1,240 @@
+"""Check the world index used for lazy world loading"""
+
+import json
+import os
+import tempfile
+import unittest
+from typing import Any
+from unittest import mock
+
+import worlds
+from Utils import Version, cache_path
+from worlds.AutoWorld import AutoWorldRegister, LazyWorldTypes
+
+
+class TestWorldIndex(unittest.TestCase):
+    def test_index_matches_worlds(self) -> None:
+        """Verify the index describes the imported worlds"""
+        for game, indexed_world in worlds.world_index.items():
+            with self.subTest(game=game):
+                world_type = AutoWorldRegister.world_types[game]
+                self.assertEqual(f"{world_type.__module__}.{world_type.__name__}", indexed_world["world_class"])
+                self.assertEqual(list(world_type.world_version), indexed_world["world_version"])
+                self.assertEqual(worlds.network_data_package["games"][game]["checksum"], indexed_world["checksum"])
+        self.assertIn("A Link to the Past", worlds.world_index)
+
+    def test_index_invalidation(self) -> None:
+        """Verify a written index is read back, unless it is outdated"""
+        original_path = worlds.world_index_path
+        with tempfile.TemporaryDirectory() as temp_dir:
+            worlds.world_index_path = os.path.join(temp_dir, "world_index.json")
+            try:
+                worlds._write_world_index()
+                index = worlds._read_world_index()
+                self.assertIsNotNone(index)
+                self.assertEqual(worlds.world_index, index["worlds"])
+
+                with open(worlds.world_index_path, encoding="utf-8") as f:
+                    index = json.load(f)
+                index["sources"][worlds.world_sources[0].path] -= 1
+                with open(worlds.world_index_path, "w", encoding="utf-8") as f:
+                    json.dump(index, f)
+                self.assertIsNone(worlds._read_world_index())
+
+                with open(worlds.world_index_path, "w", encoding="utf-8") as f:
+                    f.write("{")
+                self.assertIsNone(worlds._read_world_index())
+            finally:
+                worlds.world_index_path = original_path
+
+    def test_nested_change_invalidates(self) -> None:
+        """Verify changing a file deep inside a world folder outdates the index"""
+        original_path = worlds.world_index_path
+        with tempfile.TemporaryDirectory() as temp_dir:
+            worlds.world_index_path = os.path.join(temp_dir, "world_index.json")
+            nested_file = os.path.join(temp_dir, "nested_world", "data", "nested", "logic.py")
+            os.makedirs(os.path.dirname(nested_file))
+            with open(nested_file, "w", encoding="utf-8"):
+                pass
+            worlds.world_sources.append(worlds.WorldSource(os.path.join(temp_dir, "nested_world"), relative=False))
+            try:
+                worlds._write_world_index()
+                self.assertIsNotNone(worlds._read_world_index())
+                mtime = os.stat(nested_file).st_mtime + 10
+                os.utime(nested_file, (mtime, mtime))
+                self.assertIsNone(worlds._read_world_index())
+            finally:
+                worlds.world_sources.pop()
+                worlds.world_index_path = original_path
+
+
+class TestManifestLookup(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_index_path = worlds.manifest_index_path
+        worlds.manifest_index_path = os.path.join(self.temp_dir.name, "world_manifests.json")
+        worlds._manifest_index = None
+
+    def tearDown(self) -> None:
+        worlds.manifest_index_path = self.original_index_path
+        worlds._manifest_index = None
+        self.temp_dir.cleanup()
+
+    def make_world(self, name: str, manifest_folder: str | None) -> worlds.WorldSource:
+        folder = os.path.join(self.temp_dir.name, name)
+        os.makedirs(os.path.join(folder, "data", "nested"))
+        if manifest_folder is not None:
+            with open(os.path.join(folder, manifest_folder, "archipelago.json"), "w", encoding="utf-8") as f:
+                f.write('{"game": "Manifest Game"}')
+        return worlds.WorldSource(folder, relative=False)
+
+    def test_lookup(self) -> None:
+        """Verify manifests are found in the expected place or the index, without walking unchanged folders"""
+        expected = self.make_world("expected", "")
+        nested = self.make_world("nested", "data")
+        missing = self.make_world("missing", None)
+
+        self.assertEqual(os.path.join(expected.path, "archipelago.json"), worlds.find_world_manifest(expected))
+        self.assertEqual(os.path.join(nested.path, "data", "archipelago.json"), worlds.find_world_manifest(nested))
+        self.assertIsNone(worlds.find_world_manifest(missing))
+        self.assertEqual({nested.path, missing.path}, worlds._manifest_index.keys())
+
+        walked: list[str] = []
+        original_walk = worlds._walk_for_manifest
+        worlds._walk_for_manifest = lambda folder: walked.append(folder)  # type: ignore[assignment, func-returns-value]
+        try:
+            self.assertEqual(os.path.join(nested.path, "data", "archipelago.json"),
+                             worlds.find_world_manifest(nested))
+            self.assertIsNone(worlds.find_world_manifest(missing))
+        finally:
+            worlds._walk_for_manifest = original_walk
+        self.assertEqual([], walked)
+
+
+class TestAPWorldCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_cache_folder = worlds.apworld_cache_folder
+        worlds.apworld_cache_folder = os.path.join(self.temp_dir.name, "cache")
+
+    def tearDown(self) -> None:
+        worlds.apworld_cache_folder = self.original_cache_folder
+        self.temp_dir.cleanup()
+
+    def test_extract(self) -> None:
+        """Verify apworlds are extracted and compiled once, and broken ones are left to zipimport"""
+        import importlib.machinery
+        import zipfile
+
+        apworld_path = os.path.join(self.temp_dir.name, "cached_world.apworld")
+        with zipfile.ZipFile(apworld_path, "w") as zf:
+            zf.writestr("cached_world/__init__.py", "value = 1\n")
+        source = worlds.WorldSource(apworld_path, is_zip=True, relative=False)
+
+        folder = worlds._extract_apworld(source)
+        self.assertIsNotNone(folder)
+        package_folder = os.path.join(folder, "cached_world")
+        self.assertTrue(any(file.endswith(".pyc") for file in os.listdir(os.path.join(package_folder, "__pycache__"))))
+        spec = importlib.machinery.PathFinder.find_spec("worlds.cached_world", [folder])
+        self.assertEqual(os.path.join(package_folder, "__init__.py"), spec.origin)
+
+        os.remove(os.path.join(package_folder, "__init__.py"))
+        self.assertEqual(folder, worlds._extract_apworld(source))
+        self.assertFalse(os.path.exists(os.path.join(package_folder, "__init__.py")))
+
+        with zipfile.ZipFile(apworld_path, "a") as zf:
+            zf.writestr("cached_world/items.py", "")
+        new_folder = worlds._extract_apworld(source)
+        self.assertNotEqual(folder, new_folder)
+        self.assertEqual([os.path.basename(new_folder)], os.listdir(worlds.apworld_cache_folder))
+
+        with open(apworld_path, "wb") as f:
+            f.write(b"not a zip")
+        with self.assertLogs(level="WARNING"):
+            self.assertIsNone(worlds._extract_apworld(source))
+
+    def test_apworld_path(self) -> None:
+        """Verify modules imported from an extracted apworld still report the .apworld they came from"""
+        from pathlib import Path
+
+        apworld_path = Path(self.temp_dir.name, "cached_world.apworld")
+        worlds.extracted_apworlds["worlds.cached_world"] = apworld_path
+        try:
+            self.assertEqual(apworld_path, worlds.get_apworld_path("worlds.cached_world.items"))
+        finally:
+            del worlds.extracted_apworlds["worlds.cached_world"]
+        self.assertIsNone(worlds.get_apworld_path("worlds.generic"))
+
+
+class TestLazyWorldTypes(unittest.TestCase):
+    def test_loads_on_access(self) -> None:
+        """Verify worlds are only imported once they are looked up"""
+        loaded: list[str] = []
+
+        class FakeWorld:
+            world_version = Version(0, 0, 0)
+
+        def loader(game: str) -> None:
+            loaded.append(game)
+            if game != "Broken Game":
+                world_types[game] = FakeWorld  # type: ignore[assignment]
+
+        world_types = LazyWorldTypes({"Fake Game": Version(1, 2, 3), "Broken Game": None}, loader)
+        self.assertIn("Fake Game", world_types)
+        self.assertEqual(["Fake Game", "Broken Game"], list(world_types))
+        self.assertEqual([], loaded)
+
+        self.assertIs(FakeWorld, world_types["Fake Game"])
+        self.assertIs(FakeWorld, world_types["Fake Game"])
+        self.assertEqual(["Fake Game"], loaded)
+        self.assertEqual(Version(1, 2, 3), FakeWorld.world_version)
+
+        with self.assertRaises(KeyError):
+            _: Any = world_types["Broken Game"]
+        self.assertNotIn("Broken Game", world_types)
+        self.assertEqual({"Fake Game": FakeWorld}, world_types.loaded)
+
+
+class TestDataPackageCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_cache_path = cache_path("")
+        self.original_checksums_path = worlds.data_package_checksums_path
+        setattr(cache_path, "cached_path", self.temp_dir.name)
+        worlds.data_package_checksums_path = cache_path("datapackage_checksums.json")
+        worlds._data_package_checksums = None
+
+    def tearDown(self) -> None:
+        setattr(cache_path, "cached_path", self.original_cache_path)
+        worlds.data_package_checksums_path = self.original_checksums_path
+        worlds._data_package_checksums = None
+        self.temp_dir.cleanup()
+
+    def get_package(self) -> tuple[Any, bool]:
+        worlds._data_package_checksums = None  # forget what was loaded, like a new process
+        package, built = worlds.get_world_data_package(AutoWorldRegister.world_types["A Link to the Past"])
+        worlds._write_data_package_checksums()
+        return package, built
+
+    def test_cache(self) -> None:
+        """Verify data packages are only built on a cache miss and come out the same"""
+        expected = AutoWorldRegister.world_types["A Link to the Past"].get_data_package_data()
+        self.assertEqual((expected, True), self.get_package())
+        self.assertEqual((expected, False), self.get_package())
+
+        package_path = cache_path("datapackage", "A Link to the Past", f"{expected['checksum']}.json")
+        with open(package_path, "w", encoding="utf-8-sig") as f:
+            f.write('{"checksum": "broken"')
+        self.assertEqual((expected, True), self.get_package())
+
+        with open(worlds.data_package_checksums_path, "w", encoding="utf-8") as f:
+            f.write("[]")
+        self.assertEqual((expected, True), self.get_package())
+        self.assertEqual((expected, False), self.get_package())
+
+    def test_source_change(self) -> None:
+        """Verify a changed world source builds the data package again, without comparing it to the cached one"""
+        self.get_package()
+        with mock.patch.object(worlds, "_get_folder_mtime", return_value=0.0):
+            self.assertTrue(self.get_package()[1])
+            self.assertFalse(self.get_package()[1])
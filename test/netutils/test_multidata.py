@@ -0,0 +1,26 @@
+# Tests for compression of multidata (.archipelago) files
+import pickle
+import unittest
+import zlib
+
+from NetUtils import MultiDataFormat, compress_multidata, decompress_multidata
+from Utils import VersionException
+
+
+class TestMultiDataCompression(unittest.TestCase):
+    data = pickle.dumps({"slot_data": {1: {"goal": 1}}, "locations": {1: {i: (i, 1, 0) for i in range(100)}}})
+
+    def test_round_trip(self) -> None:
+        """Verify each codec and level reads back the same data, tagged with its format"""
+        for codec in ("zlib", "lzma"):
+            for level in (0, 6, 9):
+                with self.subTest(codec=codec, level=level):
+                    compressed = compress_multidata(self.data, codec, level)
+                    self.assertEqual(MultiDataFormat[codec.upper()], compressed[0])
+                    self.assertEqual(self.data, decompress_multidata(compressed))
+
+    def test_old_and_unknown_formats(self) -> None:
+        """Verify multidata of older generators is read and unknown formats are refused"""
+        self.assertEqual(self.data, decompress_multidata(bytes([3]) + zlib.compress(self.data, 9)))
+        with self.assertRaises(VersionException):
+            decompress_multidata(bytes([max(MultiDataFormat) + 1]) + zlib.compress(self.data))
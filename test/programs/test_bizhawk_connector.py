@@ -0,0 +1,152 @@
+import asyncio
+import base64
+import json
+import struct
+import unittest
+
+from worlds._bizhawk import BizHawkContext, ConnectionStatus, RequestFailedError, disconnect, \
+    enable_binary_protocol, get_script_version, guarded_read, ping, read, send_requests, write
+
+
+class FakeConnector:
+    """Answers requests like connector_bizhawk_generic.lua does, from a bytearray of memory."""
+
+    def __init__(self, version: int) -> None:
+        self.version = version
+        self.memory = bytearray(range(256)) * 4
+        self.frames_before_answer = 1
+        self.server: asyncio.Server | None = None
+
+    def process(self, requests: list[dict], read_data, write_data) -> list[dict]:
+        responses: list[dict] = []
+        for request in requests:
+            if responses and responses[-1]["type"] == "GUARD_RESPONSE" and not responses[-1]["value"]:
+                responses.append(responses[-1])
+            elif request["type"] == "PING":
+                responses.append({"type": "PONG"})
+            elif request["type"] == "GUARD":
+                expected = read_data(request["expected_data"])
+                address = request["address"]
+                responses.append({"type": "GUARD_RESPONSE", "address": address,
+                                  "value": self.memory[address:address + len(expected)] == expected})
+            elif request["type"] == "READ":
+                address = request["address"]
+                responses.append({"type": "READ_RESPONSE",
+                                  "value": write_data(bytes(self.memory[address:address + request["size"]]))})
+            elif request["type"] == "WRITE":
+                data = read_data(request["value"])
+                self.memory[request["address"]:request["address"] + len(data)] = data
+                responses.append({"type": "WRITE_RESPONSE"})
+            else:
+                responses.append({"type": "ERROR", "err": f"Unknown command: {request['type']}"})
+        return responses
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while line := await reader.readline():
+            message = line.decode("utf-8").strip()
+            if message == "VERSION":
+                writer.write(f"{self.version}\n".encode("utf-8"))
+            elif message == "BINARY" and self.version >= 2:
+                writer.write(b"BINARY\n")
+                await self.handle_frames(reader, writer)
+                return
+            else:
+                responses = self.process(json.loads(message), base64.b64decode,
+                                         lambda data: base64.b64encode(data).decode("ascii"))
+                writer.write(json.dumps(responses).encode("utf-8") + b"\n")
+        writer.close()
+
+    async def handle_frames(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        answers: list[bytes] = []
+        while True:
+            try:
+                request_id, message_size, data_size = struct.unpack("<III", await reader.readexactly(12))
+            except asyncio.IncompleteReadError:
+                break
+            message = json.loads(await reader.readexactly(message_size))
+            data = await reader.readexactly(data_size)
+            offset = 0
+            out: list[bytes] = []
+
+            def read_data(size: int) -> bytes:
+                nonlocal offset
+                offset += size
+                return data[offset - size:offset]
+
+            def write_data(value: bytes) -> int:
+                out.append(value)
+                return len(value)
+
+            response = json.dumps(self.process(message, read_data, write_data)).encode("utf-8")
+            answers.append(struct.pack("<III", request_id, len(response), len(b"".join(out)))
+                           + response + b"".join(out))
+            # hold answers back, so clients only get them if they pipeline frames
+            if len(answers) >= self.frames_before_answer:
+                writer.write(b"".join(answers))
+                answers.clear()
+        writer.close()
+
+    async def connect(self, ctx: BizHawkContext) -> None:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        ctx.streams = await asyncio.open_connection("127.0.0.1", port)
+        ctx.connection_status = ConnectionStatus.TENTATIVE
+
+    async def close(self) -> None:
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+
+class TestBizHawkConnector(unittest.IsolatedAsyncioTestCase):
+    async def check_requests(self, ctx: BizHawkContext, connector: FakeConnector) -> None:
+        await ping(ctx)
+        self.assertEqual(ConnectionStatus.CONNECTED, ctx.connection_status)
+        await write(ctx, [(0x10, b"\x00\xFF", "RAM")])
+        self.assertEqual([b"\x00\xFF\x12", connector.memory[:512]],
+                         await read(ctx, [(0x10, 3, "RAM"), (0, 512, "RAM")]))
+        self.assertIsNone(await guarded_read(ctx, [(0, 1, "RAM")], [(0x10, [1], "RAM")]))
+        self.assertEqual([b"\x03"], await guarded_read(ctx, [(3, 1, "RAM")], [(0x10, [0, 255], "RAM")]))
+        responses = await send_requests(ctx, [{"type": "WRITE", "address": 0, "value": "AQI=", "domain": "RAM"},
+                                              {"type": "READ", "address": 0, "size": 2, "domain": "RAM"}])
+        self.assertEqual("AQI=", responses[1]["value"])
+        self.assertEqual(b"\x01\x02", connector.memory[:2])
+
+    async def test_json_protocol(self) -> None:
+        """Verify requests work with connector scripts that don't support binary frames"""
+        ctx = BizHawkContext()
+        connector = FakeConnector(1)
+        await connector.connect(ctx)
+        try:
+            self.assertEqual(1, await get_script_version(ctx))
+            await self.check_requests(ctx, connector)
+        finally:
+            disconnect(ctx)
+            await connector.close()
+
+    async def test_binary_protocol(self) -> None:
+        """Verify requests work with binary frames, and several of them can be in flight at once"""
+        ctx = BizHawkContext()
+        connector = FakeConnector(2)
+        await connector.connect(ctx)
+        try:
+            self.assertEqual(2, await get_script_version(ctx))
+            await enable_binary_protocol(ctx)
+            self.assertTrue(ctx.binary_protocol)
+            await self.check_requests(ctx, connector)
+
+            connector.frames_before_answer = 3
+            self.assertEqual([[b"\x05"], [b"\x06"], [b"\x07"]],
+                             await asyncio.gather(*(read(ctx, [(address, 1, "RAM")]) for address in range(5, 8))))
+
+            # the connection dropping fails everything that waits for an answer
+            pending = asyncio.gather(read(ctx, [(0, 1, "RAM")]), read(ctx, [(1, 1, "RAM")]))
+            await asyncio.sleep(0)
+            ctx.streams[1].close()
+            with self.assertRaises(RequestFailedError):
+                await pending
+            self.assertEqual(ConnectionStatus.NOT_CONNECTED, ctx.connection_status)
+            self.assertFalse(ctx.binary_protocol)
+        finally:
+            disconnect(ctx)
+            await connector.close()
@@ -1,7 +1,9 @@
+import tempfile
 import unittest
 
 import NetUtils
-from CommonClient import CommonContext
+import Utils
+from CommonClient import ClientCommandProcessor, CommonContext, process_server_cmd
 
 
 class TestCommonContext(unittest.IsolatedAsyncioTestCase):
@@ -93,3 +95,88 @@ class TestCommonContext(unittest.IsolatedAsyncioTestCase):
         assert self.ctx.item_names.lookup_in_slot(-1, 3) == "Nothing"
         assert self.ctx.item_names.lookup_in_game(-1, "__TestGame1") == "Nothing"
         assert self.ctx.item_names.lookup_in_game(-1, "__TestGame2") == "Nothing"
+
+    async def test_cached_data_package_tables(self):
+        package = {
+            "location_name_to_id": {"Cached Location": 2**54 + 5},
+            "item_name_to_id": {"Cached Item": 2**54 + 5},
+            "checksum": "0123abcd",
+        }
+        original_cache_path = Utils.cache_path("")
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as temp_dir:  # tables stay mapped
+            setattr(Utils.cache_path, "cached_path", temp_dir)
+            try:
+                Utils.store_data_package_for_checksum("__TestGame3", package)
+                await self.ctx.prepare_data_package({"__TestGame3"}, {"__TestGame3": "0123abcd"})
+            finally:
+                setattr(Utils.cache_path, "cached_path", original_cache_path)
+
+        assert self.ctx.checksums["__TestGame3"] == "0123abcd"
+        assert self.ctx.item_names.lookup_in_game(2**54 + 5, "__TestGame3") == "Cached Item"
+        assert self.ctx.location_names.lookup_in_game(2**54 + 5, "__TestGame3") == "Cached Location"
+        assert self.ctx.item_names.lookup_in_game(2**54 + 6, "__TestGame3") == f"Unknown item (ID: {2**54 + 6})"
+        assert self.ctx.item_names.lookup_in_game(-1, "__TestGame3") == "Nothing"
+
+    async def test_received_items(self):
+        batches = []
+        self.ctx.items_received.subscribe(lambda index, items: batches.append((index, list(items))))
+        sync = []
+
+        async def send_msgs(msgs):
+            sync.extend(msgs)
+
+        self.ctx.send_msgs = send_msgs
+        first = NetUtils.NetworkItem(2**54 + 1, 2**54 + 1, 1, 0)
+        second = NetUtils.NetworkItem(2**54 + 2, 2**54 + 2, 2, 1)
+        await process_server_cmd(self.ctx, {"cmd": "ReceivedItems", "index": 0, "items": [first, second]})
+        await process_server_cmd(self.ctx, {"cmd": "ReceivedItems", "index": 2, "items": [first]})
+        assert self.ctx.items_received == [first, second, first]
+        assert self.ctx.items_received.count_item(2**54 + 1) == 2
+        assert self.ctx.items_received.has(2**54 + 2) and not self.ctx.items_received.has(2**54 + 2, 2)
+        assert self.ctx.items_received.since(2) == [first]
+        assert batches == [(0, []), (0, [first, second]), (2, [first])]
+
+        # out of order items are not applied, instead a resync is requested
+        await process_server_cmd(self.ctx, {"cmd": "ReceivedItems", "index": 5, "items": [second]})
+        assert self.ctx.items_received.index == 3
+        assert sync == [{"cmd": "Sync"}]
+        await process_server_cmd(self.ctx, {"cmd": "ReceivedItems", "index": 0, "items": [second]})
+        assert self.ctx.items_received == [second]
+        assert self.ctx.items_received.count_item(2**54 + 1) == 0
+        assert batches[-2:] == [(0, []), (0, [second])]
+
+    async def test_missing_command(self):
+        output = []
+        processor = ClientCommandProcessor(self.ctx)
+        processor.output = output.append
+        self.ctx.game = "__TestGame1"
+        self.ctx.missing_locations = {2**54 + 1, 2**54 + 2}
+        self.ctx.checked_locations = {2**54 + 3}
+        self.ctx.server_locations = self.ctx.missing_locations | self.ctx.checked_locations
+        self.ctx.locations_checked = {2**54 + 2}
+        processor("/missing")
+        assert output == ["Missing: Test Location 1 - Safe", f"Checked: Unknown location (ID: {2**54 + 3})",
+                          "Found 2 missing location checks. 1 location checks previously visited."]
+
+
+
+class TestLazyCommonContext(unittest.IsolatedAsyncioTestCase):
+    async def test_lazy_data_packages(self):
+        """Verify a client loading worlds lazily knows Archipelago and its own game, and survives an unknown game"""
+        from unittest import mock
+
+        import worlds
+
+        class KnownGameContext(CommonContext):
+            game = "A Link to the Past"
+
+        class UnknownGameContext(CommonContext):
+            game = "__Unknown Game"
+
+        with mock.patch.object(worlds, "lazy_world_loading", True):
+            ctx = KnownGameContext()
+            assert "Archipelago" in ctx.checksums and "A Link to the Past" in ctx.checksums
+            assert ctx.location_names["Archipelago"][-1] == "Cheat Console"
+
+            ctx = UnknownGameContext()
+            assert "Archipelago" in ctx.checksums and "__Unknown Game" not in ctx.checksums
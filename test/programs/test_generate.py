@@ -72,6 +72,23 @@ class TestGenerateMain(unittest.TestCase):
 
         self.assertOutput(self.output_tempdir.name)
 
+    def test_generate_profile(self):
+        sys.argv = [sys.argv[0], '--seed', '0',
+                    '--player_files_path', str(self.abs_input_dir),
+                    '--outputpath', self.output_tempdir.name,
+                    '--profile']
+        multiworld = Main.main(*Generate.main())
+
+        self.assertOutput(self.output_tempdir.name)
+        import json
+        with open(os.path.join(self.output_tempdir.name, f"AP_{multiworld.seed_name}_profile.json")) as f:
+            report = json.load(f)
+        sections = {(section["kind"], section["name"], section.get("player")) for section in report["sections"]}
+        for expected in (("step", "create_regions", None), ("world", "create_regions", 1),
+                         ("fill", "Progression", None), ("sweep", "sweep_for_advancements", None),
+                         ("phase", "create_playthrough", None), ("phase", "write_multidata", None)):
+            self.assertIn(expected, sections)
+
     def test_generate_yaml(self):
         # override host.yaml
         from settings import get_settings
@@ -108,6 +125,7 @@ class TestGenerateWeights(TestGenerateMain):
     # don't need to run these tests
     test_generate_absolute = None
     test_generate_relative = None
+    test_generate_profile = None
 
     def test_generate_yaml(self):
         from settings import get_settings
@@ -137,3 +155,26 @@ class TestGenerateWeights(TestGenerateMain):
                     result, getattr(namespace, option_name)[player].value,
                     "Generated results from weights file did not match expected value."
                 )
+
+    def test_yaml_workers(self):
+        """Tests rolling in processes gives the same results for any amount of them."""
+        from settings import get_settings
+        from Utils import user_path, local_path
+        settings = get_settings()
+        settings.generator.player_files_path = settings.generator.PlayerFilesPath(self.yaml_input_dir)
+        settings.generator.players = 5
+        settings._filename = None
+        user_path_backup = user_path.cached_path
+        user_path.cached_path = local_path()
+        results = []
+        try:
+            for workers in ("2", "3"):
+                sys.argv = [sys.argv[0], "--seed", "1", "--yaml_workers", workers]
+                namespace, seed = Generate.main()
+                results.append({player: (namespace.accessibility[player].value,
+                                         namespace.progression_balancing[player].value)
+                                for player in range(1, 6)})
+        finally:
+            user_path.cached_path = user_path_backup
+
+        self.assertEqual(results[0], results[1])
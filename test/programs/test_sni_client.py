@@ -0,0 +1,76 @@
+import json
+import unittest
+
+from SNIClient import SNESState, SNIContext, merge_read_ranges, snes_buffered_write, snes_flush_writes, snes_read, \
+    snes_read_ranges
+
+
+class FakeSNISocket:
+    """Stands in for the websocket to SNI, answering GetAddress and PutAddress from a bytearray of memory."""
+    open = True
+    closed = False
+
+    def __init__(self, ctx: SNIContext, memory: bytearray) -> None:
+        self.ctx = ctx
+        self.memory = memory
+        self.requests: list[dict] = []
+        self.pending_write: dict | None = None
+
+    async def send(self, message: str | bytes) -> None:
+        if isinstance(message, bytes):
+            assert self.pending_write, "got data without PutAddress"
+            address = int(self.pending_write["Operands"][0], 16)
+            self.memory[address:address + len(message)] = message
+            self.pending_write = None
+            return
+        request = json.loads(message)
+        self.requests.append(request)
+        address, size = (int(operand, 16) for operand in request["Operands"])
+        if request["Opcode"] == "GetAddress":
+            # SNI may split the answer into several messages
+            data = bytes(self.memory[address:address + size])
+            for start in range(0, size, 0x20):
+                self.ctx.snes_recv_queue.put_nowait(data[start:start + 0x20])
+        elif request["Opcode"] == "PutAddress":
+            self.pending_write = request
+
+    async def close(self) -> None:
+        self.closed = True
+        self.open = False
+
+
+class TestSNIReads(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.ctx = SNIContext("", "", "")
+        self.ctx.snes_state = SNESState.SNES_ATTACHED
+        self.memory = bytearray(i % 256 for i in range(0x1000))
+        self.socket = FakeSNISocket(self.ctx, self.memory)
+        self.ctx.snes_socket = self.socket  # type: ignore[assignment]
+
+    def test_merge_read_ranges(self) -> None:
+        self.assertEqual([], merge_read_ranges([]))
+        self.assertEqual([(0x10, 4), (0x100, 0x20)],
+                         merge_read_ranges([(0x100, 0x10), (0x10, 2), (0x12, 2), (0x118, 8), (0x104, 2)], 8))
+        self.assertEqual([(0x10, 2), (0x13, 1)], merge_read_ranges([(0x10, 2), (0x13, 1)], 0))
+
+    async def test_read(self) -> None:
+        self.assertEqual(bytes(self.memory[0x123:0x163]), await snes_read(self.ctx, 0x123, 0x40))
+        self.assertEqual(1, len(self.socket.requests))
+
+    async def test_read_ranges(self) -> None:
+        ranges = [(0x800, 2), (0x10, 1), (0x14, 4), (0x802, 0x30), (0x10, 8), (0x400, 1)]
+        self.assertEqual([bytes(self.memory[address:address + size]) for address, size in ranges],
+                         await snes_read_ranges(self.ctx, ranges))
+        self.assertEqual([["10", "8"], ["400", "1"], ["800", "32"]],
+                         [request["Operands"] for request in self.socket.requests])
+
+    async def test_read_after_write(self) -> None:
+        snes_buffered_write(self.ctx, 0x20, b"\xAA\xBB")
+        snes_buffered_write(self.ctx, 0x22, b"\xCC")
+        await snes_flush_writes(self.ctx)
+        self.assertEqual([b"\xAA\xBB\xCC", b"\x40"], await snes_read_ranges(self.ctx, [(0x20, 3), (0x40, 1)]))
+
+    async def test_failed_read(self) -> None:
+        self.ctx.snes_state = SNESState.SNES_DISCONNECTED
+        self.assertIsNone(await snes_read_ranges(self.ctx, [(0x10, 1)]))
+        self.assertEqual([], self.socket.requests)
@@ -0,0 +1,60 @@
+# Tests for the binary data package cache in DataPackageCache.py
+
+import os
+import tempfile
+import unittest
+from typing import Any
+
+import Utils
+from DataPackageCache import DataPackageTables, dump_data_package_tables, load_data_package_tables
+
+
+class TestDataPackageTables(unittest.TestCase):
+    package: dict[str, Any] = {
+        "item_name_to_id": {"Sword": 3, "Bow": 1, "Épée": 2**53, "Nothing": -1},
+        "location_name_to_id": {},
+        "checksum": "0123abcd",
+    }
+
+    def test_lookups(self) -> None:
+        """Verify names and ids can be looked up both ways, like in the data package"""
+        tables = DataPackageTables(dump_data_package_tables(self.package))
+        items = tables.item_names
+        self.assertEqual({code: name for name, code in self.package["item_name_to_id"].items()}, dict(items))
+        self.assertEqual(self.package["item_name_to_id"], items.name_to_id())
+        self.assertEqual("Épée", items[2**53])
+        self.assertNotIn(2, items)
+        self.assertEqual(3, items.get_id("Sword"))
+        self.assertEqual(-1, items.get_id("Nothing"))
+        self.assertIsNone(items.get_id("Shield"))
+        self.assertEqual(0, len(tables.location_names))
+        self.assertIsNone(tables.location_names.get(1))
+
+    def test_broken_file(self) -> None:
+        """Verify broken tables are rejected instead of returning wrong names"""
+        data = dump_data_package_tables(self.package)
+        for broken in (b"", data[:-8], data[:13], b"APDX" + data[4:]):
+            with self.subTest(length=len(broken)), self.assertRaises(ValueError):
+                DataPackageTables(broken)
+
+    def test_cache(self) -> None:
+        """Verify tables are stored with the data package, or created from its JSON when missing"""
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as temp_dir:  # tables stay mapped
+            original_cache_path = Utils.cache_path("")
+            setattr(Utils.cache_path, "cached_path", temp_dir)
+            try:
+                self.assertIsNone(Utils.load_data_package_tables_for_checksum("Test Game", "0123abcd"))
+                Utils.store_data_package_for_checksum("Test Game", self.package)
+                tables_path = Utils.cache_path("datapackage", "Test Game", "0123abcd.apdp")
+                tables = load_data_package_tables(tables_path)
+                self.assertEqual("Sword", tables.item_names[3])
+                del tables
+
+                os.remove(tables_path)
+                tables = Utils.load_data_package_tables_for_checksum("Test Game", "0123abcd")
+                self.assertIsNotNone(tables)
+                self.assertEqual("Bow", tables.item_names[1])
+                self.assertTrue(os.path.exists(tables_path))
+                self.assertIsNone(Utils.load_data_package_tables_for_checksum("Test Game", "4567cdef"))
+            finally:
+                setattr(Utils.cache_path, "cached_path", original_cache_path)
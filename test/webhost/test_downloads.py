@@ -0,0 +1,83 @@
+import io
+import json
+import unittest
+import zipfile
+from uuid import UUID, uuid4
+
+from flask import url_for
+
+from . import TestBase
+
+
+def make_patch(manifest: dict) -> bytes:
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as zf:
+        zf.writestr("archipelago.json", json.dumps(manifest), zipfile.ZIP_DEFLATED)
+        zf.writestr("stored.bin", bytes(range(256)) * 16, zipfile.ZIP_STORED)
+        zf.writestr("delta.bsdiff4", b"patch data" * 1000, zipfile.ZIP_DEFLATED, 9)
+    return data.getvalue()
+
+
+class TestReplaceZipMember(unittest.TestCase):
+    def test_members_copied_verbatim(self) -> None:
+        from WebHostLib.downloads import replace_zip_member
+
+        source = io.BytesIO(make_patch({"server": None}))
+        target = io.BytesIO()
+        replace_zip_member(source, target, "archipelago.json", b'{"server": "localhost:38281"}')
+
+        with zipfile.ZipFile(source) as old_zip, zipfile.ZipFile(target) as new_zip:
+            self.assertIsNone(new_zip.testzip())
+            self.assertEqual(sorted(old_zip.namelist()), sorted(new_zip.namelist()))
+            self.assertEqual({"server": "localhost:38281"}, json.loads(new_zip.read("archipelago.json")))
+            for name in ("stored.bin", "delta.bsdiff4"):
+                old_info, new_info = old_zip.getinfo(name), new_zip.getinfo(name)
+                self.assertEqual(old_zip.read(name), new_zip.read(name))
+                self.assertEqual((old_info.compress_type, old_info.compress_size, old_info.CRC),
+                                 (new_info.compress_type, new_info.compress_size, new_info.CRC))
+
+
+class TestDownloadPatch(TestBase):
+    room_id: UUID
+    slot_id: int
+
+    def setUp(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.models import Room, Seed, Slot
+
+        super().setUp()
+        with self.client.session_transaction() as session:
+            session["_id"] = uuid4()
+            with db_session:
+                seed = Seed(multidata=b"", owner=session["_id"])
+                slot = Slot(player_id=1, player_name="Player1", seed=seed, game="Archipelago",
+                            data=make_patch({"server": None, "patch_file_ending": ".aptest"}))
+                room = Room(seed=seed, owner=session["_id"], tracker=uuid4(), last_port=38281)
+        self.room_id = room.id
+        self.slot_id = slot.id
+
+    def tearDown(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+
+        with db_session:
+            room = Room.get(id=self.room_id)
+            seed = room.seed
+            room.delete()
+            seed.slots.clear()
+            seed.delete()
+
+    def test_download_patch(self) -> None:
+        """Verify the downloaded patch points at the room and repeated downloads are served from cache."""
+        from WebHostLib.downloads import patch_cache
+
+        with self.app.app_context(), self.app.test_request_context():
+            url = url_for("download_patch", room_id=self.room_id, patch_id=self.slot_id)
+            response = self.client.get(url)
+            self.assertEqual(200, response.status_code)
+            self.assertTrue(response.headers["Content-Disposition"].endswith(".aptest"))
+            with zipfile.ZipFile(io.BytesIO(response.data)) as zf:
+                manifest = json.loads(zf.read("archipelago.json"))
+            self.assertEqual(f"{self.app.config['HOST_ADDRESS']}:38281", manifest["server"])
+            self.assertIsNotNone(patch_cache.get((self.slot_id, 38281)))
+            self.assertEqual(response.data, self.client.get(url).data)
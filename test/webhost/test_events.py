@@ -0,0 +1,119 @@
+import os
+from unittest import mock
+from uuid import UUID, uuid4
+
+from flask import url_for
+
+from . import TestBase
+
+
+class TestRoomEvents(TestBase):
+    room_id: UUID
+    tracker_uuid: UUID
+
+    def setUp(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.models import Room, Seed
+
+        super().setUp()
+        with self.client.session_transaction() as session:
+            session["_id"] = uuid4()
+            self.tracker_uuid = uuid4()
+            with db_session:
+                seed = Seed(multidata=b"", owner=session["_id"])
+                room = Room(seed=seed, owner=session["_id"], tracker=self.tracker_uuid)
+                self.room_id = room.id
+        with self.app.test_request_context():
+            self.tracker_url = url_for("tracker_events", tracker=self.tracker_uuid)
+            self.room_url = url_for("room_events", room=self.room_id)
+
+    def tearDown(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.events import get_log_path, remove_events
+        from WebHostLib.models import Room
+
+        with db_session:
+            room: Room = Room.get(id=self.room_id)
+            room.seed.delete()
+            room.delete()
+        remove_events(self.room_id)
+        if os.path.exists(get_log_path(self.room_id)):
+            os.unlink(get_log_path(self.room_id))
+
+    def test_poll_events(self) -> None:
+        """Verify published events get returned after the polled cursor, and unchanged events answer 304."""
+        from WebHostLib.events import publish_event
+
+        publish_event(self.room_id, "status", {"team": 0, "player": 1, "status": 5})
+        response = self.client.get(self.tracker_url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([], response.json["events"])  # a new poller only gets what happens from now on
+        cursor = response.json["cursor"]
+        etag = response.headers["ETag"]
+
+        response = self.client.get(self.tracker_url, query_string={"cursor": cursor},
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(304, response.status_code)
+
+        publish_event(self.room_id, "check", {"team": 0, "player": 1, "locations": [1, 2], "checked": 2})
+        publish_event(self.room_id, "status", {"team": 0, "player": 1, "status": 30})
+        response = self.client.get(self.tracker_url, query_string={"cursor": cursor},
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(200, response.status_code)
+        self.assertFalse(response.json["reset"])
+        self.assertEqual([
+            {"event": "check", "data": {"team": 0, "player": 1, "locations": [1, 2], "checked": 2}},
+            {"event": "status", "data": {"team": 0, "player": 1, "status": 30}},
+        ], response.json["events"])
+        self.assertEqual(response.json["cursor"], response.headers["ETag"].strip('"'))
+
+    def test_removed_events(self) -> None:
+        """Verify pollers get told to reset after the room closed and its event file was removed."""
+        from WebHostLib.events import get_events_path, publish_event, remove_events
+
+        publish_event(self.room_id, "status", {"team": 0, "player": 1, "status": 5})
+        cursor = self.client.get(self.tracker_url).json["cursor"]
+
+        remove_events(self.room_id)
+        self.assertFalse(os.path.exists(get_events_path(self.room_id)))
+        response = self.client.get(self.tracker_url, query_string={"cursor": cursor})
+        self.assertEqual({"cursor": "0-0", "reset": True, "events": []}, response.json)
+
+    def test_rotated_events(self) -> None:
+        """Verify the event file stays below its size limit and pollers of the previous file get the new one."""
+        from WebHostLib import events
+
+        events.publish_event(self.room_id, "status", {"team": 0, "player": 1, "status": 5})
+        cursor = self.client.get(self.tracker_url).json["cursor"]
+        with mock.patch.object(events, "EVENTS_FILE_SIZE_LIMIT", 100):
+            for status in range(10):
+                events.publish_event(self.room_id, "status", {"team": 0, "player": 1, "status": status})
+                self.assertLess(os.path.getsize(events.get_events_path(self.room_id)), 200)
+
+        response = self.client.get(self.tracker_url, query_string={"cursor": cursor})
+        self.assertTrue(response.json["reset"])
+        self.assertTrue(response.json["events"])
+        self.assertEqual(9, response.json["events"][-1]["data"]["status"])
+
+    def test_room_log(self) -> None:
+        """Verify the room's owner gets new log lines from where the rendered log ended, others get no log."""
+        from WebHostLib.events import get_log_path
+
+        with open(get_log_path(self.room_id), "w", encoding="utf-8-sig") as f:
+            f.write("rendered\n")
+        with open(get_log_path(self.room_id), "a", encoding="utf-8-sig") as f:
+            f.write("new line\nunfinished")
+
+        response = self.client.get(self.room_url, query_string={"log_offset": len("rendered\n")})
+        self.assertEqual([{"event": "log", "data": "new line"}], response.json["events"])
+        cursor = response.json["cursor"]
+
+        with open(get_log_path(self.room_id), "a", encoding="utf-8-sig") as f:
+            f.write(" line\n")
+        response = self.client.get(self.room_url, query_string={"cursor": cursor})
+        self.assertEqual([{"event": "log", "data": "unfinished line"}], response.json["events"])
+
+        with self.client.session_transaction() as session:
+            session["_id"] = uuid4()
+        response = self.client.get(self.room_url, query_string={"log_offset": 0})
+        self.assertEqual([], response.json["events"])
@@ -0,0 +1,70 @@
+import unittest
+from uuid import uuid4
+
+from Utils import restricted_dumps
+from . import TestBase
+
+
+class FakeGeneration:
+    def __init__(self, *games: str) -> None:
+        self.id = uuid4()
+        self.options = restricted_dumps({f"Player{n}": {"game": game} for n, game in enumerate(games, 1)})
+
+
+class TestGenerationScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        from WebHostLib.scheduler import GenerationScheduler, Lane
+
+        self.fast = Lane("fast", None, 2, max_cost=10)  # type: ignore[arg-type]
+        self.large = Lane("large", None, 1)  # type: ignore[arg-type]
+        self.scheduler = GenerationScheduler([self.large, self.fast])
+
+    def test_estimate(self) -> None:
+        """Verify cost grows with player count and heavy games."""
+        from WebHostLib.scheduler import estimate_generation_cost
+
+        small = estimate_generation_cost({"1": {"game": "Archipelago"}, "2": {"game": "Archipelago"}})
+        heavy = estimate_generation_cost({"1": {"game": "Starcraft 2"}, "2": {"game": "Ocarina of Time"}})
+        large = estimate_generation_cost({str(n): {"game": "Archipelago"} for n in range(500)})
+        self.assertLess(small, heavy)
+        self.assertLess(heavy, large)
+
+    def test_large_does_not_block_fast(self) -> None:
+        """Verify large generations are put in their own lane and cheap ones start first."""
+        large = [FakeGeneration(*["Archipelago"] * 50) for _ in range(2)]
+        medium = FakeGeneration("Ocarina of Time", "Ocarina of Time")
+        small = FakeGeneration("Archipelago")
+        tiny = FakeGeneration()
+        launched = self.scheduler.schedule([*large, medium, small, tiny])
+        self.assertEqual([(self.fast, tiny), (self.fast, small), (self.large, large[0])], launched)
+
+        # no free slots, nothing should be started
+        self.assertEqual([], self.scheduler.schedule([large[1], medium]))
+
+        self.scheduler.finish(self.fast, tiny.id)
+        self.assertEqual([(self.fast, medium)], self.scheduler.schedule([large[1], medium]))
+
+        metrics = self.scheduler.get_metrics()
+        self.assertEqual(2, metrics["fast"]["running"])
+        self.assertEqual(0, metrics["fast"]["queued"])
+        self.assertEqual(1, metrics["large"]["running"])
+        self.assertEqual(1, metrics["large"]["queued"])
+
+    def test_forget_vanished(self) -> None:
+        """Verify generations that are no longer queued are dropped."""
+        self.scheduler.lanes[0].running.update((uuid4(), uuid4()))  # fill fast lane
+        generation = FakeGeneration("Archipelago")
+        self.scheduler.schedule([generation])
+        self.assertIn(generation.id, self.scheduler.queued)
+        self.scheduler.schedule([])
+        self.assertNotIn(generation.id, self.scheduler.queued)
+
+
+class TestGenerationQueueAPI(TestBase):
+    def test_generation_queue(self) -> None:
+        response = self.client.get("/api/generation_queue")
+        self.assertEqual(200, response.status_code)
+        json_data = response.get_json()
+        self.assertIn("queued", json_data)
+        self.assertIn("running", json_data)
+        self.assertEqual({}, json_data["lanes"])  # autogen is not running in tests
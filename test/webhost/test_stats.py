@@ -0,0 +1,107 @@
+from uuid import UUID, uuid4
+
+from flask import url_for
+
+from . import TestBase
+
+
+class TestStats(TestBase):
+    seed_id: UUID
+    owner: UUID
+
+    def setUp(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.models import Seed, Slot
+
+        super().setUp()
+        self.owner = uuid4()
+        with self.client.session_transaction() as session:
+            session["_id"] = self.owner
+        with db_session:
+            seed = Seed(multidata=b"", owner=self.owner)
+            for player_id, game in enumerate(("Archipelago", "Archipelago", "Unknown Game"), 1):
+                Slot(player_id=player_id, player_name=f"Player{player_id}", seed=seed, game=game)
+            self.seed_id = seed.id
+
+    def tearDown(self) -> None:
+        from pony.orm import db_session, delete
+        from WebHostLib.models import GamePlayStatistic, Room, Seed
+
+        with db_session:
+            delete(room for room in Room if room.seed.id == self.seed_id)
+            Seed[self.seed_id].slots.clear()
+            Seed[self.seed_id].delete()
+            delete(stat for stat in GamePlayStatistic)
+
+    def test_room_creation_updates_statistics(self) -> None:
+        """Verify creating rooms is counted without walking all rooms and that backfill yields the same result."""
+        from pony.orm import db_session, delete
+        from WebHostLib.models import GamePlayStatistic
+        from WebHostLib.stats import backfill_game_statistics, get_db_data
+
+        with self.app.app_context(), self.app.test_request_context():
+            for _ in range(2):
+                self.client.get(url_for("new_room", seed=self.seed_id))
+
+        with db_session:
+            total_games, games_played = get_db_data({"Archipelago"})
+        self.assertEqual({"Archipelago": 4, "Other": 2}, dict(total_games))
+        self.assertEqual(1, len(games_played))
+
+        with db_session:
+            delete(stat for stat in GamePlayStatistic)
+        backfill_game_statistics()
+        backfill_game_statistics()
+        with db_session:
+            self.assertEqual((total_games, games_played), get_db_data({"Archipelago"}))
+
+    def test_backfill_keeps_counted_days(self) -> None:
+        """Verify backfill doesn't overwrite counts of rooms that were since removed, and prunes old days."""
+        from datetime import date, timedelta
+
+        from pony.orm import db_session
+        from WebHostLib.models import GamePlayStatistic
+        from WebHostLib.stats import STATISTIC_DAYS, backfill_game_statistics
+
+        today = date.today()
+        old_day = today - timedelta(days=STATISTIC_DAYS + 1)
+        with db_session:
+            GamePlayStatistic(day=today, game="Archipelago", count=7)
+            GamePlayStatistic(day=old_day, game="Archipelago", count=1)
+        backfill_game_statistics()
+        with db_session:
+            self.assertEqual(7, GamePlayStatistic[today, "Archipelago"].count)
+            self.assertIsNone(GamePlayStatistic.get(day=old_day, game="Archipelago"))
+
+    def test_concurrent_statistic_creation(self) -> None:
+        """Verify a row created by another request between lookup and insert is updated instead of failing."""
+        from unittest import mock
+
+        from pony.orm import commit, db_session
+        from WebHostLib.models import GamePlayStatistic, Room, Seed
+        from WebHostLib.stats import add_room_statistics, get_db_data
+
+        with db_session:
+            room = Room(seed=Seed[self.seed_id], owner=self.owner)
+            commit()
+            room_id = room.id
+            GamePlayStatistic(day=room.creation_time.date(), game="Archipelago", count=3)
+
+        with db_session:
+            room = Room[room_id]
+            lookup = GamePlayStatistic.get
+            missed: set[str] = set()
+
+            def stale_get(**kwargs):
+                # the first lookup per game misses the row, as if it was inserted by another request right after
+                if kwargs["game"] not in missed:
+                    missed.add(kwargs["game"])
+                    return None
+                return lookup(**kwargs)
+
+            with mock.patch.object(GamePlayStatistic, "get", side_effect=stale_get):
+                add_room_statistics(room)
+
+        with db_session:
+            total_games, _ = get_db_data({"Archipelago"})
+        self.assertEqual({"Archipelago": 5, "Other": 1}, dict(total_games))
@@ -103,3 +103,56 @@ class TestTracker(TestBase):
                 self.assertEqual(response.status_code, 200)
             with self.client.open(url_for("api.tracker_slot_data", tracker=self.tracker_uuid)) as response:
                 self.assertEqual(response.status_code, 200)
+
+    def test_if_none_match(self) -> None:
+        """Verify that tracker pages and api answer 304 for the current ETag and 200 after the room saved."""
+        from unittest import mock
+
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+
+        with self.app.test_request_context():
+            urls = [
+                url_for("get_multiworld_tracker", tracker=self.tracker_uuid),
+                url_for("get_player_tracker", tracker=self.tracker_uuid, tracked_team=0, tracked_player=1),
+                url_for("api.tracker_data", tracker=self.tracker_uuid),
+                url_for("api.static_tracker_data", tracker=self.tracker_uuid),
+                url_for("api.tracker_slot_data", tracker=self.tracker_uuid),
+            ]
+        etags = {}
+        now = 1_000_000_000
+        clock = mock.patch("WebHostLib.tracker.time.time", side_effect=lambda: now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                etag = response.headers["ETag"]
+                response = self.client.get(url, headers={"If-None-Match": etag})
+                self.assertEqual(response.status_code, 304)
+                etags[url] = etag
+
+        with db_session:
+            Room[self.room_id].save_version += 1
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, headers={"If-None-Match": etags[url]})
+                if "static" in url or "slot_data" in url:
+                    self.assertEqual(response.status_code, 304)  # only depends on the seed
+                else:
+                    self.assertEqual(response.status_code, 200)
+
+        # rendered pages show time since last activity, so they expire even without a save
+        now += 60
+        for url in urls:
+            with self.subTest(url=url):
+                etags[url] = self.client.get(url).headers["ETag"]
+        now += 60
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, headers={"If-None-Match": etags[url]})
+                if "api" in url:
+                    self.assertEqual(response.status_code, 304)
+                else:
+                    self.assertEqual(response.status_code, 200)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import concurrent.futures
 import hashlib
 import logging
 import pathlib
@@ -7,9 +8,10 @@ import sys
 import time
 from random import Random
 from dataclasses import make_dataclass
-from typing import (Any, Callable, ClassVar, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, TextIO, Tuple,
-                    TYPE_CHECKING, Type, Union)
+from typing import (Any, Callable, ClassVar, Dict, FrozenSet, Iterable, Iterator, List, Mapping, MutableMapping,
+                    Optional, Set, TextIO, Tuple, TYPE_CHECKING, Type, Union)
 
+import Profiler
 from Options import item_and_loc_options, ItemsAccessibility, OptionGroup, PerGameCommonOptions
 from BaseClasses import CollectionState
 from Utils import Version
@@ -27,7 +29,7 @@ class InvalidItemError(KeyError):
 
 
 class AutoWorldRegister(type):
-    world_types: Dict[str, Type[World]] = {}
+    world_types: MutableMapping[str, Type[World]] = {}
     __file__: str
     zip_path: Optional[str]
     settings_key: str
@@ -88,13 +90,16 @@ class AutoWorldRegister(type):
         new_class = super().__new__(mcs, name, bases, dct)
         new_class.__file__ = sys.modules[new_class.__module__].__file__
         if "game" in dct:
-            if dct["game"] in AutoWorldRegister.world_types:
+            loaded_world_types = get_loaded_world_types()
+            if dct["game"] in loaded_world_types:
                 raise RuntimeError(f"""Game {dct["game"]} already registered in 
-                {AutoWorldRegister.world_types[dct["game"]].__file__} when attempting to register from
+                {loaded_world_types[dct["game"]].__file__} when attempting to register from
                 {new_class.__file__}.""")
             AutoWorldRegister.world_types[dct["game"]] = new_class
-        if ".apworld" in new_class.__file__:
-            new_class.zip_path = pathlib.Path(new_class.__file__).parents[1]
+        import worlds
+        zip_path = worlds.get_apworld_path(new_class.__module__)
+        if zip_path:
+            new_class.zip_path = zip_path
         if "settings_key" not in dct:
             mod_name = new_class.__module__
             world_folder_name = mod_name[7:].lower() if mod_name.startswith("worlds.") else mod_name.lower()
@@ -103,6 +108,52 @@ class AutoWorldRegister(type):
         return new_class
 
 
+class LazyWorldTypes(MutableMapping[str, Type["World"]]):
+    """World types of indexed games, importing each world the first time it is looked up.
+    Iterating and membership tests only use the index, so they don't import anything."""
+    loaded: Dict[str, Type[World]]
+    games: Dict[str, Optional[Version]]
+    """game -> world_version from the index"""
+
+    def __init__(self, games: Mapping[str, Optional[Version]], loader: Callable[[str], Any]) -> None:
+        self.loaded = {}
+        self.games = dict(games)
+        self.loader = loader
+
+    def __getitem__(self, game: str) -> Type[World]:
+        if game not in self.loaded and game in self.games:
+            self.loader(game)
+            if game not in self.loaded:
+                # world failed to import, don't try again
+                del self.games[game]
+        return self.loaded[game]
+
+    def __setitem__(self, game: str, world_type: Type[World]) -> None:
+        world_version = self.games.setdefault(game, None)
+        if world_version:
+            world_type.world_version = world_version
+        self.loaded[game] = world_type
+
+    def __delitem__(self, game: str) -> None:
+        self.loaded.pop(game, None)
+        del self.games[game]
+
+    def __contains__(self, game: object) -> bool:
+        return game in self.games
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.games)
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+
+def get_loaded_world_types() -> Mapping[str, Type[World]]:
+    """Registered world types that are already imported, which is all of them unless worlds are loaded lazily."""
+    world_types = AutoWorldRegister.world_types
+    return world_types.loaded if isinstance(world_types, LazyWorldTypes) else world_types
+
+
 class AutoLogicRegister(type):
     def __new__(mcs, name: str, bases: Tuple[type, ...], dct: Dict[str, Any]) -> AutoLogicRegister:
         new_class = super().__new__(mcs, name, bases, dct)
@@ -164,8 +215,13 @@ class WebWorldRegister(type):
 
 def _timed_call(method: Callable[..., Any], *args: Any,
                 multiworld: Optional["MultiWorld"] = None, player: Optional[int] = None) -> Any:
+    if player:
+        section = Profiler.section("world", method.__name__, player)
+    else:
+        section = Profiler.section("world_stage", method.__qualname__)
     start = time.perf_counter()
-    ret = method(*args)
+    with section:
+        ret = method(*args)
     taken = time.perf_counter() - start
     if taken > 1.0:
         if player and multiworld:
@@ -192,11 +248,73 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
 
 
 def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
-    world_types: Set[AutoWorldRegister] = set()
+    with Profiler.section("step", method_name):
+        _call_all(multiworld, method_name, *args)
+
+
+parallel_stage_names: FrozenSet[str] = frozenset(
+    ("generate_early", "create_regions", "create_items", "set_rules", "generate_basic"))
+"""steps that worlds can run in parallel, see World.parallel_stages"""
+
+
+def _get_parallel_runs(multiworld: "MultiWorld", method_name: str) -> List[List[int]]:
+    """Runs of consecutive players that may call method_name at the same time.
+    Only consecutive players are grouped, so the step of each player that didn't opt in still runs after those of
+    all players before it and before those of all players after it, as in a serial run."""
+    runs: List[List[int]] = []
+    parallel = False
     for player in multiworld.player_ids:
-        prev_item_count = len(multiworld.itempool)
-        world_types.add(multiworld.worlds[player].__class__)
-        call_single(multiworld, method_name, player, *args)
+        opted_in = method_name in multiworld.worlds[player].parallel_stages
+        if opted_in and parallel:
+            runs[-1].append(player)
+        else:
+            runs.append([player])
+        parallel = opted_in
+    return runs
+
+
+def call_parallel(multiworld: "MultiWorld", method_name: str, players: List[int], *args: Any) -> Dict[int, List[Item]]:
+    """Call method_name for players at the same time, using up to multiworld.stage_workers threads, and return once
+    all of them are done. Returns the items they added to the itempool, which are taken out again, by player."""
+    prev_item_count = len(multiworld.itempool)
+    multiworld.random.passthrough = False  # slot-isolated steps may only use their world's random
+    try:
+        with concurrent.futures.ThreadPoolExecutor(min(multiworld.stage_workers, len(players))) as pool:
+            futures = [pool.submit(call_single, multiworld, method_name, player, *args) for player in players]
+            concurrent.futures.wait(futures)
+        for future in futures:
+            future.result()  # raise the first exception, by player order
+    finally:
+        multiworld.random.passthrough = True
+
+    new_items: Dict[int, List[Item]] = {player: [] for player in players}
+    for item in multiworld.itempool[prev_item_count:]:
+        assert item.player in new_items, (
+            f"{multiworld.worlds[players[0]].game} or another world of {players} added item \"{item.name}\" "
+            f"of player {item.player} to the itempool in parallel {method_name}, which may only add its own items.")
+        new_items[item.player].append(item)
+    del multiworld.itempool[prev_item_count:]
+    return new_items
+
+
+def _call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
+    world_types: Set[AutoWorldRegister] = set()
+    parallel_items: Dict[int, List[Item]] = {}
+    if multiworld.stage_workers > 1 and method_name in parallel_stage_names:
+        runs = _get_parallel_runs(multiworld, method_name)
+    else:
+        runs = [[player] for player in multiworld.player_ids]
+    for run in runs:
+        if len(run) > 1:
+            parallel_items = call_parallel(multiworld, method_name, run, *args)
+        for player in run:
+            prev_item_count = len(multiworld.itempool)
+            world_types.add(multiworld.worlds[player].__class__)
+            if player in parallel_items:
+                # already called, put its items where they would have been if called in order
+                multiworld.itempool += parallel_items[player]
+            else:
+                call_single(multiworld, method_name, player, *args)
         if __debug__:
             new_items = multiworld.itempool[prev_item_count:]
             for i, item in enumerate(new_items):
@@ -318,6 +436,20 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    parallel_stages: ClassVar[FrozenSet[str]] = frozenset()
+    """Names of steps in which this world only touches its own slot, so they may run at the same time as the same
+    step of other worlds, see parallel_stage_names. Each step still starts after and ends before the previous and
+    next step of all worlds. In those steps the world has to use self.random instead of multiworld.random and may only
+    add items of its own player to the itempool."""
+
+    output_memory: ClassVar[int] = 0
+    """Rough peak memory in bytes generate_output needs, such as for a patched ROM. Used to keep output within
+    the generator's output_memory_budget."""
+
+    fork_safe_output: ClassVar[bool] = False
+    """If generate_output only writes files to output_directory and changes nothing used afterwards, such as slot
+    data or spoiler info, it may run in a forked process, see the generator's fork_output."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int
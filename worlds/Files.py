@@ -1,22 +1,21 @@
 from __future__ import annotations
 
 import abc
+import hashlib
 import json
+import struct
 import zipfile
 from enum import IntEnum
 import os
-import threading
-from io import BytesIO
+import shutil
+import time
+from io import BufferedReader, BytesIO
 
-from typing import (ClassVar, Dict, List, Literal, Tuple, Any, Optional, Union, BinaryIO, overload, Sequence,
-                    TYPE_CHECKING)
+from typing import (ClassVar, Dict, List, Literal, Set, Tuple, Type, Any, Optional, Union, BinaryIO, overload,
+                    Sequence, TYPE_CHECKING)
 
 import bsdiff4
 
-semaphore = threading.Semaphore(os.cpu_count() or 4)
-
-del threading
-
 if TYPE_CHECKING:
     from Utils import Version
 
@@ -93,7 +92,10 @@ class AutoPatchExtensionRegister(abc.ABCMeta):
             return handler
 
 
-container_version: int = 7
+container_version: int = 8
+
+source_data_cache: Dict[str, bytes] = {}
+"""Base data loaded by APProcedurePatch classes in this process, by the md5 checksum of its content."""
 
 
 def is_ap_player_container(game: str, data: bytes, player: int):
@@ -130,12 +132,10 @@ class APContainer:
         zip_file = file if file else self.path
         if not zip_file:
             raise FileNotFoundError(f"Cannot write {self.__class__.__name__} due to no path provided.")
-        with semaphore:  # TODO: remove semaphore once generate_output has a thread limit
-            with zipfile.ZipFile(
-                    zip_file, "w", self.compression_method, True, self.compression_level) as zf:
-                if file:
-                    self.path = zf.filename
-                self.write_contents(zf)
+        with zipfile.ZipFile(zip_file, "w", self.compression_method, True, self.compression_level) as zf:
+            if file:
+                self.path = zf.filename
+            self.write_contents(zf)
 
     def write_contents(self, opened_zipfile: zipfile.ZipFile) -> None:
         manifest = self.get_manifest()
@@ -253,6 +253,18 @@ class APPlayerContainer(APContainer):
         return manifest
 
 
+def get_compressed_container_endings() -> Set[str]:
+    """patch_file_ending of each APPlayerContainer type that compresses its contents."""
+    endings: Set[str] = set()
+    container_types: List[Type[APPlayerContainer]] = [APPlayerContainer]
+    while container_types:
+        container_type = container_types.pop()
+        container_types.extend(container_type.__subclasses__())
+        if container_type.patch_file_ending and container_type.compression_method != zipfile.ZIP_STORED:
+            endings.add(container_type.patch_file_ending)
+    return endings
+
+
 class APPatch(APPlayerContainer):
     """
     An `APPlayerContainer` that represents a patch file.
@@ -289,6 +301,8 @@ class APProcedurePatch(APAutoPatchInterface):
     hash: Optional[str]  # base checksum of source file
     source_data: bytes
     files: Dict[str, bytes]
+    file_sources: Dict[str, Union[str, BinaryIO]]  # files streamed into the container from a path or file object
+    _lazy_files: Dict[str, str]  # files not read yet, by the path of the container they are in
 
     @classmethod
     def get_source_data(cls) -> bytes:
@@ -297,13 +311,24 @@ class APProcedurePatch(APAutoPatchInterface):
 
     @classmethod
     def get_source_data_with_cache(cls) -> bytes:
+        """Get Base data, loading it only once per process, even if several patch classes share the same base."""
         if not hasattr(cls, "source_data"):
-            cls.source_data = cls.get_source_data()
+            checksums = getattr(cls, "hash", None) or []
+            if isinstance(checksums, str):
+                checksums = [checksums]
+            source_data = next((source_data_cache[checksum] for checksum in checksums
+                                if checksum in source_data_cache), None)
+            if source_data is None:
+                source_data = cls.get_source_data()
+                source_data_cache[hashlib.md5(source_data).hexdigest()] = source_data
+            cls.source_data = source_data
         return cls.source_data
 
     def __init__(self, *args: Any, **kwargs: Any):
         super(APProcedurePatch, self).__init__(*args, **kwargs)
         self.files = {}
+        self.file_sources = {}
+        self._lazy_files = {}
 
     def get_manifest(self) -> Dict[str, Any]:
         manifest = super(APProcedurePatch, self).get_manifest()
@@ -312,6 +337,8 @@ class APProcedurePatch(APAutoPatchInterface):
         manifest["procedure"] = self.procedure
         if self.procedure == APDeltaPatch.procedure:
             manifest["compatible_version"] = 5
+        elif any(step == "apply_compact_tokens" for step, _ in self.procedure):
+            manifest["compatible_version"] = 8
         return manifest
 
     def read_contents(self, opened_zipfile: zipfile.ZipFile) -> Dict[str, Any]:
@@ -321,27 +348,89 @@ class APProcedurePatch(APAutoPatchInterface):
             self.procedure = [("apply_bsdiff4", ["delta.bsdiff4"])]
         else:
             self.procedure = manifest["procedure"]
+        # files of a container on disk are only read when they are needed, as they can be as large as the result
+        container_path = None
+        if isinstance(opened_zipfile.fp, BufferedReader) and isinstance(opened_zipfile.filename, str):
+            container_path = os.path.abspath(opened_zipfile.filename)
         for file in opened_zipfile.namelist():
             if file not in ["archipelago.json"]:
-                self.files[file] = opened_zipfile.read(file)
+                if container_path:
+                    self._lazy_files[file] = container_path
+                else:
+                    self.files[file] = opened_zipfile.read(file)
         return manifest
 
+    def write(self, file: Optional[Union[str, BinaryIO]] = None) -> None:
+        target = file if file else self.path
+        for lazy_file, container_path in list(self._lazy_files.items()):
+            if isinstance(target, str) and os.path.exists(target) and os.path.exists(container_path) \
+                    and os.path.samefile(target, container_path):
+                # the container is about to be overwritten, so whatever wasn't read from it yet has to be now
+                if lazy_file not in self.files and lazy_file not in self.file_sources:
+                    self.files[lazy_file] = self.get_file(lazy_file)
+        super(APProcedurePatch, self).write(file)
+
     def write_contents(self, opened_zipfile: zipfile.ZipFile) -> None:
         super(APProcedurePatch, self).write_contents(opened_zipfile)
         for file in self.files:
             opened_zipfile.writestr(file, self.files[file],
                                     compress_type=zipfile.ZIP_STORED if file.endswith(".bsdiff4") else None)
+        for file in self._lazy_files.keys() - self.files.keys() - self.file_sources.keys():
+            with self.open_file(file) as source:
+                self._write_stream(opened_zipfile, file, source)
+        for file, source in self.file_sources.items():
+            if isinstance(source, str):
+                with open(source, "rb") as f:
+                    self._write_stream(opened_zipfile, file, f)
+            else:
+                self._write_stream(opened_zipfile, file, source)
+
+    @staticmethod
+    def _write_stream(opened_zipfile: zipfile.ZipFile, file: str, source: BinaryIO) -> None:
+        info = zipfile.ZipInfo(file, time.localtime(time.time())[:6])
+        info.compress_type = zipfile.ZIP_STORED if file.endswith(".bsdiff4") else opened_zipfile.compression
+        # without knowing the size up front, zip64 has to be used in case it turns out to be larger than 2 GiB
+        with opened_zipfile.open(info, "w", force_zip64=True) as member:
+            shutil.copyfileobj(source, member, 1024 * 1024)
 
     def get_file(self, file: str) -> bytes:
         """ Retrieves a file from the patch container."""
-        if file not in self.files:
+        if file in self.files:
+            return self.files[file]
+        with self.open_file(file) as f:
+            return f.read()
+
+    def open_file(self, file: str) -> BinaryIO:
+        """ Opens a file of the patch container for reading, without loading all of it into memory."""
+        if file in self.files:
+            return BytesIO(self.files[file])
+        if file in self.file_sources:
+            source = self.file_sources[file]
+            if isinstance(source, str):
+                return open(source, "rb")
+            raise ValueError(f"{file} is only available to be written into the container.")
+        if file not in self._lazy_files:
             self.read()
-        return self.files[file]
+        if file not in self._lazy_files:
+            return BytesIO(self.files[file])
+        with zipfile.ZipFile(self._lazy_files[file], "r") as zf:
+            # the member stays readable after the zip file is closed
+            return zf.open(file)  # type: ignore[return-value]
 
     def write_file(self, file_name: str, file: bytes) -> None:
         """ Writes a file to the patch container, to be retrieved upon patching. """
+        self.file_sources.pop(file_name, None)
         self.files[file_name] = file
 
+    def write_file_from(self, file_name: str, source: Union[str, BinaryIO]) -> None:
+        """
+        Writes a file to the patch container from a path or a binary file object, to be retrieved upon patching.
+        The source is only read when the container is written, and streamed into it instead of kept in memory.
+        File objects are read from their current position and have to stay open until then.
+        """
+        self.files.pop(file_name, None)
+        self.file_sources[file_name] = source
+
     def patch(self, target: str) -> None:
         self.read()
         base_data = self.get_source_data_with_cache()
@@ -426,6 +515,42 @@ class APTokenMixin:
                 raise ValueError(f"Unknown token type {token_type}")
         return bytes(data)
 
+    def get_compact_token_binary(self) -> bytes:
+        """
+        Returns the stored tokens in the compact token format, to be applied with the `apply_compact_tokens` step.
+        Consecutive WRITE tokens are sorted and merged where they touch or overlap, and tokens only store the size of
+        their arguments if it varies. Tokens reaching past the end of the file extend it with zeros.
+        :return: A bytes object representing the token data.
+        """
+        tokens: List[Tuple[int, int, Any]] = []
+        writes: List[Tuple[int, bytes]] = []
+        for token_type, offset, args in self._tokens:
+            if token_type == APTokenTypes.WRITE:
+                assert isinstance(args, bytes), f"Arguments to WRITE must be of type bytes, not {type(args)}"
+                writes.append((offset, args))
+                continue
+            if writes:
+                # other tokens may depend on what was written before them, so only merge up to them
+                tokens.extend((APTokenTypes.WRITE, start, merged) for start, merged in _merge_writes(writes))
+                writes = []
+            tokens.append((token_type, offset, args))
+        tokens.extend((APTokenTypes.WRITE, start, merged) for start, merged in _merge_writes(writes))
+
+        data = [_compact_tokens_header.pack(compact_tokens_magic, compact_tokens_version, len(tokens))]
+        for token_type, offset, args in tokens:
+            if token_type == APTokenTypes.WRITE:
+                data.append(_compact_write.pack(token_type, offset, len(args)))
+                data.append(args)
+            elif token_type in (APTokenTypes.AND_8, APTokenTypes.OR_8, APTokenTypes.XOR_8):
+                assert isinstance(args, int), f"Arguments to AND/OR/XOR must be of type int, not {type(args)}"
+                data.append(_compact_bitwise.pack(token_type, offset, args))
+            elif token_type in (APTokenTypes.COPY, APTokenTypes.RLE):
+                assert isinstance(args, tuple), f"Arguments to COPY/RLE must be of type tuple, not {type(args)}"
+                data.append(_compact_range.pack(token_type, offset, *args))
+            else:
+                raise ValueError(f"Unknown token type {token_type}")
+        return b"".join(data)
+
     @overload
     def write_token(self,
                     token_type: Literal[APTokenTypes.AND_8, APTokenTypes.OR_8, APTokenTypes.XOR_8],
@@ -457,6 +582,111 @@ class APTokenMixin:
         self._tokens.append((token_type, offset, data))
 
 
+compact_tokens_magic = b"APTK"
+compact_tokens_version = 1
+_compact_tokens_header = struct.Struct("<4sBI")
+_compact_write = struct.Struct("<BII")  # type, offset, size, followed by the data
+_compact_range = struct.Struct("<BIII")  # type, offset, length, source offset (COPY) or value (RLE)
+_compact_bitwise = struct.Struct("<BIB")  # type, offset, argument
+
+
+def _merge_writes(writes: List[Tuple[int, bytes]]) -> List[Tuple[int, bytes]]:
+    """
+    Merges WRITE tokens that touch or overlap into one write each, sorted by offset.
+    Where writes overlap, the later one wins, like it would when applying them in order.
+    """
+    merged: List[Tuple[int, bytes]] = []
+    group: List[int] = []
+    start = end = 0
+
+    def flush() -> None:
+        if len(group) == 1:
+            merged.append(writes[group[0]])
+            return
+        data = bytearray(end - start)
+        for index in sorted(group):
+            offset, args = writes[index]
+            data[offset - start:offset - start + len(args)] = args
+        merged.append((start, bytes(data)))
+
+    offsets = [offset for offset, _ in writes]
+    for index in sorted(range(len(writes)), key=offsets.__getitem__):
+        offset, args = writes[index]
+        if group and offset <= end:
+            end = max(end, offset + len(args))
+        else:
+            if group:
+                flush()
+            group = []
+            start, end = offset, offset + len(args)
+        group.append(index)
+    if group:
+        flush()
+    return merged
+
+
+def _apply_compact_tokens(rom_data: bytearray, token_data: bytes) -> None:
+    """
+    Applies a token binary from `APTokenMixin.get_compact_token_binary` onto rom_data in place.
+    Pure python version of `_speedups.apply_compact_tokens`.
+    """
+    view = memoryview(token_data)
+    tokens: List[Tuple[int, int, int, Any]] = []
+    end = len(rom_data)
+    try:
+        magic, version, token_count = _compact_tokens_header.unpack_from(view)
+        if magic != compact_tokens_magic or version != compact_tokens_version:
+            raise ValueError("Not a compact token file of a supported version")
+        position = _compact_tokens_header.size
+        for _ in range(token_count):
+            token_type = view[position]
+            args: Any
+            if token_type == APTokenTypes.WRITE:
+                _, offset, length = _compact_write.unpack_from(view, position)
+                position += _compact_write.size
+                args = view[position:position + length]
+                position += length
+                if len(args) != length:
+                    raise ValueError("Compact token file is incomplete")
+            elif token_type in (APTokenTypes.COPY, APTokenTypes.RLE):
+                _, offset, length, args = _compact_range.unpack_from(view, position)
+                position += _compact_range.size
+                if token_type == APTokenTypes.RLE and args > 0xFF:
+                    raise ValueError(f"RLE value {args} does not fit in a byte")
+            elif token_type in (APTokenTypes.AND_8, APTokenTypes.OR_8, APTokenTypes.XOR_8):
+                _, offset, args = _compact_bitwise.unpack_from(view, position)
+                position += _compact_bitwise.size
+                length = 1
+            else:
+                raise ValueError(f"Unknown token type {token_type}")
+            tokens.append((token_type, offset, length, args))
+            end = max(end, offset + length)
+    except (struct.error, IndexError) as e:
+        raise ValueError(f"Compact token file is incomplete: {e}") from e
+    if position != len(view):
+        raise ValueError("Compact token file has trailing data")
+
+    for token_type, offset, length, args in tokens:
+        if token_type == APTokenTypes.COPY and args + length > end:
+            raise ValueError(f"COPY from {args:#x} reads past the end of the file")
+
+    if end > len(rom_data):
+        rom_data.extend(bytes(end - len(rom_data)))
+    for token_type, offset, length, args in tokens:
+        if token_type == APTokenTypes.WRITE:
+            rom_data[offset:offset + length] = args
+        elif token_type == APTokenTypes.COPY:
+            rom_data[offset:offset + length] = rom_data[args:args + length]
+        elif token_type == APTokenTypes.RLE:
+            rom_data[offset:offset + length] = bytes((args,)) * length
+        elif token_type == APTokenTypes.AND_8:
+            rom_data[offset] &= args
+        elif token_type == APTokenTypes.OR_8:
+            rom_data[offset] |= args
+        else:
+            rom_data[offset] ^= args
+
+
 class APPatchExtension(metaclass=AutoPatchExtensionRegister):
     """Class that defines patch extension functions for a given game.
     Patch extension functions must have the following two arguments in the following order:
@@ -509,6 +739,17 @@ class APPatchExtension(metaclass=AutoPatchExtensionRegister):
             bpr += 9 + size
         return bytes(rom_data)
 
+    @staticmethod
+    def apply_compact_tokens(caller: APProcedurePatch, rom: bytes, token_file: str) -> bytes:
+        """Applies the given token file from `APTokenMixin.get_compact_token_binary` onto the current file."""
+        try:
+            from _speedups import apply_compact_tokens
+        except ImportError:
+            apply_compact_tokens = _apply_compact_tokens
+        rom_data = bytearray(rom)
+        apply_compact_tokens(rom_data, caller.get_file(token_file))
+        return bytes(rom_data)
+
     @staticmethod
     def calc_snes_crc(caller: APProcedurePatch, rom: bytes) -> bytes:
         """Calculates and applies a valid CRC for the SNES rom header."""
@@ -1,3 +1,4 @@
+import hashlib
 import importlib
 import importlib.abc
 import importlib.machinery
@@ -11,10 +12,11 @@ import dataclasses
 import json
 from pathlib import Path
 from types import ModuleType
-from typing import List, Sequence
+from typing import Any, List, Sequence, TypedDict
 
-from NetUtils import DataPackage
-from Utils import local_path, user_path, Version, version_tuple, tuplize_version
+from NetUtils import DataPackage, GamesPackage
+from Utils import (cache_path, local_path, user_path, Version, version_tuple, tuplize_version, __version__,
+                   load_data_package_for_checksum, store_data_package_for_checksum)
 
 local_folder = os.path.dirname(__file__)
 user_folder = user_path("worlds") if user_path() != local_path() else user_path("custom_worlds")
@@ -30,8 +32,17 @@ __all__ = {
     "local_folder",
     "user_folder",
     "failed_world_loads",
+    "lazy_world_loading",
+    "world_index",
+    "get_game_data_package",
 }
 
+lazy_world_loading: bool = os.environ.get("ARCHIPELAGO_LAZY_WORLDS", "").lower() in ("1", "true", "yes")
+"""Only import worlds once they are used, finding them through the world index. Off by default, as some tools rely
+on all worlds being imported, like Launcher components and LogicMixins registered by worlds."""
+world_index_path = cache_path("world_index.json")
+WORLD_INDEX_VERSION = 1
+
 
 failed_world_loads: List[str] = []
 
@@ -73,6 +84,234 @@ class WorldSource:
             return False
 
 
+class IndexedWorld(TypedDict):
+    source: str
+    """WorldSource.path of the world"""
+    world_class: str
+    world_version: list[int]
+    checksum: str
+    """data package checksum"""
+    settings_key: str | None
+    """settings_key, if the world has settings"""
+
+
+world_index: dict[str, IndexedWorld] = {}
+"""game -> indexed world, persisted to world_index_path when using lazy_world_loading"""
+
+
+def _get_folder_mtime(path: str) -> float:
+    """Last modification of any file or folder in a folder, skipping bytecode caches."""
+    mtime = os.stat(path).st_mtime
+    for entry in os.scandir(path):
+        if entry.is_dir():
+            if entry.name != "__pycache__":
+                mtime = max(mtime, _get_folder_mtime(entry.path))
+        else:
+            mtime = max(mtime, entry.stat().st_mtime)
+    return mtime
+
+
+def _get_source_mtime(source: WorldSource) -> float:
+    """Last modification of a world source, including every file in a world folder."""
+    path = source.resolved_path
+    if source.is_zip:
+        return os.stat(path).st_mtime
+    return _get_folder_mtime(path)
+
+
+def _get_source_mtimes() -> dict[str, float]:
+    return {source.path: _get_source_mtime(source) for source in world_sources}
+
+
+def _read_cache_file(path: str) -> Any:
+    """Returns the contents of a json cache file, or None if it can't be read."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache_file(path: str, data: Any) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logging.warning(f"Could not write {path}: {e}")
+
+
+def _read_world_index() -> dict[str, Any] | None:
+    """Return the persisted world index, or None if there is none or any world source changed since it was built."""
+    index = _read_cache_file(world_index_path)
+    try:
+        if index["version"] != WORLD_INDEX_VERSION or index["core_version"] != __version__:
+            return None
+        if index["sources"] != _get_source_mtimes():
+            return None
+    except (OSError, KeyError, TypeError):
+        return None
+    return index
+
+
+def _write_world_index() -> None:
+    try:
+        sources = _get_source_mtimes()
+    except OSError as e:
+        logging.warning(f"Could not write world index: {e}")
+        return
+    _write_cache_file(world_index_path, {
+        "version": WORLD_INDEX_VERSION,
+        "core_version": __version__,
+        "sources": sources,
+        "failed": failed_world_loads,
+        "worlds": world_index,
+    })
+
+
+manifest_index_path = cache_path("world_manifests.json")
+_manifest_index: dict[str, Any] | None = None
+"""world folder -> mtime and manifest path, for folders that don't have their manifest in the expected place"""
+_manifest_index_changed = False
+
+
+def _walk_for_manifest(folder: str) -> str | None:
+    """Look through all of a world folder for a manifest, returning its path relative to the folder."""
+    for dirpath, dirnames, filenames in os.walk(folder):
+        for file in filenames:
+            if file.endswith("archipelago.json"):
+                return os.path.relpath(os.path.join(dirpath, file), folder)
+    return None
+
+
+def find_world_manifest(world_source: WorldSource) -> str | None:
+    """Path of a world folder's manifest. Checks the expected place first, then the manifest index, and only walks
+    the folder if it changed since then."""
+    global _manifest_index, _manifest_index_changed
+    folder = world_source.resolved_path
+    expected_path = os.path.join(folder, "archipelago.json")
+    if os.path.isfile(expected_path):
+        return expected_path
+
+    if _manifest_index is None:
+        _manifest_index = _read_cache_file(manifest_index_path)
+        if not isinstance(_manifest_index, dict):
+            _manifest_index = {}
+    mtime = os.stat(folder).st_mtime
+    indexed = _manifest_index.get(world_source.path)
+    if isinstance(indexed, dict) and indexed.get("mtime") == mtime:
+        manifest = indexed.get("manifest")
+        if manifest is None:
+            return None
+        if isinstance(manifest, str) and os.path.isfile(os.path.join(folder, manifest)):
+            return os.path.join(folder, manifest)
+
+    manifest = _walk_for_manifest(folder)
+    _manifest_index[world_source.path] = {"mtime": mtime, "manifest": manifest}
+    _manifest_index_changed = True
+    return os.path.join(folder, manifest) if manifest else None
+
+
+apworld_module_specs: dict[str, importlib.machinery.ModuleSpec | None] = {}
+pending_apworlds: dict[str, WorldSource] = {}
+"""module name -> apworld that may be imported, but did not get its module spec created yet"""
+
+
+class APWorldModuleFinder(importlib.abc.MetaPathFinder):
+    def find_spec(
+            self, fullname: str, _path: Sequence[str] | None, _target: ModuleType = None
+    ) -> importlib.machinery.ModuleSpec | None:
+        if fullname in pending_apworlds:
+            register_apworld(pending_apworlds.pop(fullname))
+        return apworld_module_specs.get(fullname)
+
+
+apworld_cache_folder = cache_path("apworlds")
+"""extracted and compiled .apworld files, as zipimport can't use or write bytecode caches"""
+extracted_apworlds: dict[str, Path] = {}
+"""module name -> .apworld that got imported from its extracted copy, used as the world's zip_path"""
+
+
+def _extract_apworld(apworld_source: WorldSource) -> str | None:
+    """Extract and compile the .apworld into the apworld cache, unless that was done before for the same file.
+    Returns the folder to import it from, or None if it has to be imported from the zip."""
+    import compileall
+    import shutil
+    import zipfile
+
+    module_name = Path(apworld_source.path).stem
+    try:
+        with open(apworld_source.resolved_path, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        folder = os.path.join(apworld_cache_folder, f"{module_name}-{digest[:32]}")
+        if not os.path.isdir(folder):
+            temp_folder = f"{folder}.{os.getpid()}.tmp"
+            shutil.rmtree(temp_folder, ignore_errors=True)
+            with zipfile.ZipFile(apworld_source.resolved_path) as zf:
+                zf.extractall(temp_folder)
+            compileall.compile_dir(temp_folder, quiet=2)
+            try:
+                os.rename(temp_folder, folder)
+            except OSError:
+                # another process finished extracting it first
+                shutil.rmtree(temp_folder, ignore_errors=True)
+                if not os.path.isdir(folder):
+                    raise
+            _prune_extracted_apworld(module_name, folder)
+    except (OSError, zipfile.BadZipFile) as e:
+        logging.warning(f"Could not cache {apworld_source.path}, importing it from the zip: {e}")
+        return None
+    return folder
+
+
+def _prune_extracted_apworld(module_name: str, keep: str) -> None:
+    """Remove extracted copies of other versions of the .apworld, which got replaced by the one in keep."""
+    import re
+    import shutil
+
+    pattern = re.compile(rf"{re.escape(module_name)}-[0-9a-f]{{32}}(\.\d+\.tmp)?")
+    for entry in os.scandir(apworld_cache_folder):
+        # temporary folders of the kept version may be another process extracting it right now
+        if entry.is_dir() and not entry.name.startswith(os.path.basename(keep)) and pattern.fullmatch(entry.name):
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def get_apworld_path(module_name: str) -> Path | None:
+    """The .apworld file the worlds.<name> package of the module was imported from, whether it got imported from the
+    zip or from its extracted copy in the apworld cache. None if it was not imported from an .apworld."""
+    package_name = ".".join(module_name.split(".")[:2])
+    if package_name in extracted_apworlds:
+        return extracted_apworlds[package_name]
+    package = sys.modules.get(package_name)
+    file = getattr(package, "__file__", None) or ""
+    if ".apworld" in file:
+        return Path(file).parents[1]
+    return None
+
+
+def _install_apworld_finder() -> None:
+    if not any(isinstance(finder, APWorldModuleFinder) for finder in sys.meta_path):
+        sys.meta_path.insert(0, APWorldModuleFinder())
+
+
+def register_apworld(apworld_source: WorldSource) -> None:
+    """Make the .apworld importable as its worlds.<name> module, preferably from the apworld cache."""
+    _install_apworld_finder()
+    module_name = f"worlds.{Path(apworld_source.path).stem}"
+    spec = None
+    folder = _extract_apworld(apworld_source)
+    if folder:
+        spec = importlib.machinery.PathFinder.find_spec(module_name, [folder])
+        if spec:
+            extracted_apworlds[module_name] = Path(apworld_source.resolved_path)
+    if spec is None:
+        importer = zipimport.zipimporter(apworld_source.resolved_path)
+        spec = importer.find_spec(module_name)
+    apworld_module_specs[module_name] = spec
+
+
 # find potential world containers, currently folders and zip-importable .apworld's
 world_sources: List[WorldSource] = []
 for folder in (folder for folder in (user_folder, local_folder) if folder):
@@ -91,112 +330,238 @@ for folder in (folder for folder in (user_folder, local_folder) if folder):
             elif entry.is_file() and entry.name.endswith(".apworld"):
                 world_sources.append(WorldSource(file_name, is_zip=True, relative=relative))
 
-# import all submodules to trigger AutoWorldRegister
+
+
+def _get_world_source(world_type: type) -> WorldSource | None:
+    module_parts = world_type.__module__.split(".")
+    if len(module_parts) < 2 or module_parts[0] != "worlds":
+        return None
+    zip_path = getattr(world_type, "zip_path", None)
+    for source in world_sources:
+        if Path(source.path).stem == module_parts[1] and source.is_zip == bool(zip_path):
+            if not zip_path or Path(source.resolved_path) == zip_path:
+                return source
+    return None
+
+
+def _index_world(world_type: Any) -> IndexedWorld:
+    settings_annotation = world_type.__annotations__.get("settings", None)
+    has_settings = settings_annotation is not None and settings_annotation != "ClassVar[Optional['Group']]"
+    return {
+        "source": _get_world_source(world_type).path,
+        "world_class": f"{world_type.__module__}.{world_type.__name__}",
+        "world_version": list(world_type.world_version),
+        "checksum": network_data_package["games"][world_type.game]["checksum"],
+        "settings_key": world_type.settings_key if has_settings else None,
+    }
+
+
+data_package_checksums_path = cache_path("datapackage_checksums.json")
+"""world data package key -> checksum of the package last built for it, which is stored in the data package cache"""
+_data_package_checksums: dict[str, str] | None = None
+
+
+def _get_data_package_key(world_type: Any) -> str | None:
+    """Identifies the world's code, so a cached package can be used without comparing it to the world's names.
+    None if the world isn't loaded from a world source, in which case its package is not cached."""
+    source = _get_world_source(world_type)
+    if not source:
+        return None
+    try:
+        if source.is_zip:
+            stat = os.stat(source.resolved_path)
+            modified = f"{stat.st_mtime}:{stat.st_size}"
+        else:
+            modified = str(_get_folder_mtime(source.resolved_path))
+    except OSError:
+        return None
+    world = f"{world_type.__module__}.{world_type.__name__}@{world_type.world_version.as_simple_string()}"
+    return hashlib.sha1(f"{world}@{__version__}@{source.path}@{modified}".encode()).hexdigest()
+
+
+def _load_data_package_checksums() -> dict[str, str]:
+    checksums = _read_cache_file(data_package_checksums_path)
+    return checksums if isinstance(checksums, dict) else {}
+
+
+def _write_data_package_checksums() -> None:
+    _write_cache_file(data_package_checksums_path, _data_package_checksums)
+
+
+def get_world_data_package(world_type: Any) -> tuple[GamesPackage, bool]:
+    """world_type.get_data_package_data(), but read from the data package cache if the world's source is unchanged.
+    Returns the package and whether it had to be built."""
+    global _data_package_checksums
+    if _data_package_checksums is None:
+        _data_package_checksums = _load_data_package_checksums()
+    key = _get_data_package_key(world_type)
+    if key is None:
+        return world_type.get_data_package_data(), False
+    checksum = _data_package_checksums.get(key)
+    if isinstance(checksum, str):
+        try:
+            package = load_data_package_for_checksum(world_type.game, checksum)
+        except ValueError:  # bad symbols in checksum
+            package = {}
+        if package.get("checksum") == checksum:
+            return package, False
+
+    package = world_type.get_data_package_data()
+    store_data_package_for_checksum(world_type.game, package)
+    _data_package_checksums[key] = package["checksum"]
+    return package, True
+
+
+def get_game_data_package(game: str) -> GamesPackage | None:
+    """Data package of a single game. Unlike network_data_package, this only imports the one world when lazy."""
+    if "network_data_package" in globals():
+        return network_data_package["games"].get(game)
+    if game not in _game_data_packages:
+        try:
+            world_type = AutoWorldRegister.world_types[game]
+        except KeyError:
+            return None
+        _game_data_packages[game], built = get_world_data_package(world_type)
+        if built:
+            _write_data_package_checksums()
+    return _game_data_packages[game]
+
+
+_game_data_packages: dict[str, GamesPackage] = {}
+
+
+def __getattr__(name: str) -> Any:
+    # when loading lazily, only build network_data_package for all worlds once something asks for it
+    if name == "network_data_package":
+        global network_data_package
+        games = {game: get_game_data_package(game) for game in AutoWorldRegister.world_types}
+        network_data_package = {"games": {game: package for game, package in games.items() if package is not None}}
+        return network_data_package
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# import all submodules to trigger AutoWorldRegister, or only set up lazy imports from an up-to-date world index
 world_sources.sort()
-apworlds: list[WorldSource] = []
-for world_source in world_sources:
-    # load all loose files first:
-    if world_source.is_zip:
-        apworlds.append(world_source)
-    else:
-        world_source.load()
-
-from .AutoWorld import AutoWorldRegister
-
-for world_source in world_sources:
-    if not world_source.is_zip:
-        # look for manifest
-        manifest = {}
-        for dirpath, dirnames, filenames in os.walk(world_source.resolved_path):
-            for file in filenames:
-                if file.endswith("archipelago.json"):
-                    with open(os.path.join(dirpath, file), mode="r", encoding="utf-8") as manifest_file:
-                        manifest = json.load(manifest_file)
-                    break
-            if manifest:
-                break
-        game = manifest.get("game")
-        if game in AutoWorldRegister.world_types:
-            AutoWorldRegister.world_types[game].world_version = tuplize_version(manifest.get("world_version", "0.0.0"))
-
-if apworlds:
-    # encapsulation for namespace / gc purposes
-    def load_apworlds() -> None:
-        global apworlds
-        from .Files import APWorldContainer, InvalidDataError
-        core_compatible: list[tuple[WorldSource, APWorldContainer]] = []
-
-        def fail_world(game_name: str, reason: str, add_as_failed_to_load: bool = True) -> None:
-            if add_as_failed_to_load:
-                failed_world_loads.append(game_name)
-            logging.warning(reason)
-
-        for apworld_source in apworlds:
-            apworld: APWorldContainer = APWorldContainer(apworld_source.resolved_path)
-            # populate metadata
-            try:
-                apworld.read()
-            except InvalidDataError as e:
-                if version_tuple < (0, 7, 0):
-                    logging.error(
-                        f"Invalid or missing manifest file for {apworld_source.resolved_path}. "
-                        "This apworld will stop working with Archipelago 0.7.0."
-                    )
-                    logging.error(e)
+lazy_index = _read_world_index() if lazy_world_loading else None
+if lazy_index:
+    from .AutoWorld import AutoWorldRegister, LazyWorldTypes
+
+    world_index = lazy_index["worlds"]
+    failed_world_loads.extend(lazy_index["failed"])
+    sources_by_path = {world_source.path: world_source for world_source in world_sources}
+    for indexed_world in world_index.values():
+        world_source = sources_by_path[indexed_world["source"]]
+        if world_source.is_zip:
+            pending_apworlds[f"worlds.{Path(world_source.path).stem}"] = world_source
+    if pending_apworlds:
+        _install_apworld_finder()
+
+    def load_indexed_world(game: str) -> None:
+        sources_by_path[world_index[game]["source"]].load()
+
+    AutoWorldRegister.world_types = LazyWorldTypes(
+        {game: Version(*indexed_world["world_version"]) for game, indexed_world in world_index.items()},
+        load_indexed_world)
+else:
+    apworlds: list[WorldSource] = []
+    for world_source in world_sources:
+        # load all loose files first:
+        if world_source.is_zip:
+            apworlds.append(world_source)
+        else:
+            world_source.load()
+
+    from .AutoWorld import AutoWorldRegister
+
+    for world_source in world_sources:
+        if not world_source.is_zip:
+            # look for manifest
+            manifest = {}
+            manifest_path = find_world_manifest(world_source)
+            if manifest_path:
+                with open(manifest_path, mode="r", encoding="utf-8") as manifest_file:
+                    manifest = json.load(manifest_file)
+            game = manifest.get("game")
+            if game in AutoWorldRegister.world_types:
+                AutoWorldRegister.world_types[game].world_version = \
+                    tuplize_version(manifest.get("world_version", "0.0.0"))
+    if _manifest_index_changed:
+        _write_cache_file(manifest_index_path, _manifest_index)
+
+    if apworlds:
+        # encapsulation for namespace / gc purposes
+        def load_apworlds() -> None:
+            global apworlds
+            from .Files import APWorldContainer, InvalidDataError
+            core_compatible: list[tuple[WorldSource, APWorldContainer]] = []
+
+            def fail_world(game_name: str, reason: str, add_as_failed_to_load: bool = True) -> None:
+                if add_as_failed_to_load:
+                    failed_world_loads.append(game_name)
+                logging.warning(reason)
+
+            for apworld_source in apworlds:
+                apworld: APWorldContainer = APWorldContainer(apworld_source.resolved_path)
+                # populate metadata
+                try:
+                    apworld.read()
+                except InvalidDataError as e:
+                    if version_tuple < (0, 7, 0):
+                        logging.error(
+                            f"Invalid or missing manifest file for {apworld_source.resolved_path}. "
+                            "This apworld will stop working with Archipelago 0.7.0."
+                        )
+                        logging.error(e)
+                    else:
+                        raise e
+
+                if apworld.minimum_ap_version and apworld.minimum_ap_version > version_tuple:
+                    fail_world(apworld.game,
+                               f"Did not load {apworld_source.path} "
+                               f"as its minimum core version {apworld.minimum_ap_version} "
+                               f"is higher than current core version {version_tuple}.")
+                elif apworld.maximum_ap_version and apworld.maximum_ap_version < version_tuple:
+                    fail_world(apworld.game,
+                               f"Did not load {apworld_source.path} "
+                               f"as its maximum core version {apworld.maximum_ap_version} "
+                               f"is lower than current core version {version_tuple}.")
                 else:
-                    raise e
-
-            if apworld.minimum_ap_version and apworld.minimum_ap_version > version_tuple:
-                fail_world(apworld.game,
-                           f"Did not load {apworld_source.path} "
-                           f"as its minimum core version {apworld.minimum_ap_version} "
-                           f"is higher than current core version {version_tuple}.")
-            elif apworld.maximum_ap_version and apworld.maximum_ap_version < version_tuple:
-                fail_world(apworld.game,
-                           f"Did not load {apworld_source.path} "
-                           f"as its maximum core version {apworld.maximum_ap_version} "
-                           f"is lower than current core version {version_tuple}.")
-            else:
-                core_compatible.append((apworld_source, apworld))
-        # load highest version first
-        core_compatible.sort(
-            key=lambda element: element[1].world_version if element[1].world_version else Version(0, 0, 0),
-            reverse=True)
-
-        apworld_module_specs = {}
-        class APWorldModuleFinder(importlib.abc.MetaPathFinder):
-            def find_spec(
-                    self, fullname: str, _path: Sequence[str] | None, _target: ModuleType = None
-            ) -> importlib.machinery.ModuleSpec | None:
-                return apworld_module_specs.get(fullname)
+                    core_compatible.append((apworld_source, apworld))
+            # load highest version first
+            core_compatible.sort(
+                key=lambda element: element[1].world_version if element[1].world_version else Version(0, 0, 0),
+                reverse=True)
 
-        sys.meta_path.insert(0, APWorldModuleFinder())
+            for apworld_source, apworld in core_compatible:
+                if apworld.game and apworld.game in AutoWorldRegister.world_types:
+                    fail_world(apworld.game,
+                               f"Did not load {apworld_source.path} "
+                               f"as its game {apworld.game} is already loaded.",
+                               add_as_failed_to_load=False)
+                else:
+                    register_apworld(apworld_source)
+                    apworld_source.load()
+                    if apworld.game in AutoWorldRegister.world_types:
+                        # world could fail to load at this point
+                        if apworld.world_version:
+                            AutoWorldRegister.world_types[apworld.game].world_version = apworld.world_version
+        load_apworlds()
+        del load_apworlds
 
-        for apworld_source, apworld in core_compatible:
-            if apworld.game and apworld.game in AutoWorldRegister.world_types:
-                fail_world(apworld.game,
-                           f"Did not load {apworld_source.path} "
-                           f"as its game {apworld.game} is already loaded.",
-                           add_as_failed_to_load=False)
-            else:
-                importer = zipimport.zipimporter(apworld_source.resolved_path)
-                world_name = Path(apworld.path).stem
-
-                spec = importer.find_spec(f"worlds.{world_name}")
-                apworld_module_specs[f"worlds.{world_name}"] = spec
-
-                apworld_source.load()
-                if apworld.game in AutoWorldRegister.world_types:
-                    # world could fail to load at this point
-                    if apworld.world_version:
-                        AutoWorldRegister.world_types[apworld.game].world_version = apworld.world_version
-    load_apworlds()
-    del load_apworlds
-
-del apworlds
-
-# Build the data package for each game.
-network_data_package: DataPackage = {
-    "games": {world_name: world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
-}
+    del apworlds
+
+    # Build the data package for each game.
+    network_data_package: DataPackage = {"games": {}}
+    any_built = False
+    for world_name, world in AutoWorldRegister.world_types.items():
+        network_data_package["games"][world_name], built = get_world_data_package(world)
+        any_built |= built
+    if any_built:
+        _write_data_package_checksums()
+    del any_built
+    world_index = {game: _index_world(world_type) for game, world_type in AutoWorldRegister.world_types.items()
+                   if _get_world_source(world_type)}
+    if lazy_world_loading:
+        _write_world_index()
 
+del lazy_index
@@ -9,6 +9,7 @@ import asyncio
 import base64
 import enum
 import json
+import struct
 import sys
 from typing import Any, Sequence
 
@@ -16,6 +17,16 @@ from typing import Any, Sequence
 BIZHAWK_SOCKET_PORT_RANGE_START = 43055
 BIZHAWK_SOCKET_PORT_RANGE_SIZE = 5
 
+BINARY_PROTOCOL_VERSION = 2
+"""The first connector script version which supports binary frames"""
+
+# request id, size of the JSON part and size of the data part of a binary frame
+_frame_header = struct.Struct("<III")
+
+# request and response fields with memory contents, which are base64 strings in JSON messages and sizes of raw bytes in
+# the data part of binary frames
+_data_fields = {"GUARD": "expected_data", "WRITE": "value", "READ_RESPONSE": "value"}
+
 
 class ConnectionStatus(enum.IntEnum):
     NOT_CONNECTED = 1
@@ -46,14 +57,39 @@ class SyncError(Exception):
 class BizHawkContext:
     streams: tuple[asyncio.StreamReader, asyncio.StreamWriter] | None
     connection_status: ConnectionStatus
+    binary_protocol: bool
+    """Whether the connection uses binary frames instead of lines of JSON, see `enable_binary_protocol`"""
     _lock: asyncio.Lock
     _port: int | None
+    _next_request_id: int
+    _pending_frames: dict[int, asyncio.Future[tuple[bytes, bytes]]]
+    _receive_task: asyncio.Task[None] | None
 
     def __init__(self) -> None:
         self.streams = None
         self.connection_status = ConnectionStatus.NOT_CONNECTED
+        self.binary_protocol = False
         self._lock = asyncio.Lock()
         self._port = None
+        self._next_request_id = 0
+        self._pending_frames = {}
+        self._receive_task = None
+
+    def _close(self, reason: str = "Connection closed") -> None:
+        """Closes the connection, failing requests that are still waiting for a response."""
+        if self.streams is not None:
+            self.streams[1].close()
+            self.streams = None
+        self.connection_status = ConnectionStatus.NOT_CONNECTED
+        self.binary_protocol = False
+        for response in self._pending_frames.values():
+            if not response.done():
+                response.set_exception(RequestFailedError(reason))
+        self._pending_frames.clear()
+        if self._receive_task is not None:
+            if self._receive_task is not asyncio.current_task():
+                self._receive_task.cancel()
+            self._receive_task = None
 
     async def _send_message(self, message: str):
         async with self._lock:
@@ -68,9 +104,7 @@ class BizHawkContext:
                 res = await asyncio.wait_for(reader.readline(), timeout=5)
 
                 if res == b"":
-                    writer.close()
-                    self.streams = None
-                    self.connection_status = ConnectionStatus.NOT_CONNECTED
+                    self._close()
                     raise RequestFailedError("Connection closed")
 
                 if self.connection_status == ConnectionStatus.TENTATIVE:
@@ -78,16 +112,59 @@ class BizHawkContext:
 
                 return res.decode("utf-8")
             except asyncio.TimeoutError as exc:
-                writer.close()
-                self.streams = None
-                self.connection_status = ConnectionStatus.NOT_CONNECTED
+                self._close()
                 raise RequestFailedError("Connection timed out") from exc
             except ConnectionResetError as exc:
-                writer.close()
-                self.streams = None
-                self.connection_status = ConnectionStatus.NOT_CONNECTED
+                self._close()
                 raise RequestFailedError("Connection reset") from exc
 
+    async def _send_frame(self, message: bytes, data: bytes) -> tuple[bytes, bytes]:
+        """Sends a binary frame and returns the JSON and data parts of the frame answering it. Unlike `_send_message`,
+        frames of several callers can be waiting for their response at the same time."""
+        if self.streams is None:
+            raise NotConnectedError("You tried to send a request before a connection to BizHawk was made")
+
+        reader, writer = self.streams
+        request_id = self._next_request_id
+        self._next_request_id = (request_id + 1) % 2 ** 32
+        response = asyncio.get_running_loop().create_future()
+        self._pending_frames[request_id] = response
+        if self._receive_task is None:
+            self._receive_task = asyncio.create_task(self._receive_frames(reader), name="BizHawkReceiveFrames")
+
+        try:
+            writer.write(_frame_header.pack(request_id, len(message), len(data)) + message + data)
+            await asyncio.wait_for(writer.drain(), timeout=5)
+            return await asyncio.wait_for(response, timeout=5)
+        except asyncio.TimeoutError as exc:
+            self._close()
+            raise RequestFailedError("Connection timed out") from exc
+        except ConnectionResetError as exc:
+            self._close()
+            raise RequestFailedError("Connection reset") from exc
+        finally:
+            self._pending_frames.pop(request_id, None)
+
+    async def _receive_frames(self, reader: asyncio.StreamReader) -> None:
+        """Hands received frames to the requests waiting for them, by request id."""
+        try:
+            while True:
+                request_id, message_size, data_size = _frame_header.unpack(
+                    await reader.readexactly(_frame_header.size))
+                message = await reader.readexactly(message_size)
+                data = await reader.readexactly(data_size)
+
+                if self.connection_status == ConnectionStatus.TENTATIVE:
+                    self.connection_status = ConnectionStatus.CONNECTED
+
+                response = self._pending_frames.get(request_id)
+                if response is not None and not response.done():
+                    response.set_result((message, data))
+        except asyncio.IncompleteReadError:
+            self._close("Connection closed")
+        except ConnectionResetError:
+            self._close("Connection reset")
+
 
 async def connect(ctx: BizHawkContext) -> bool:
     """Attempts to establish a connection with a connector script. Returns True if successful."""
@@ -112,21 +189,54 @@ async def connect(ctx: BizHawkContext) -> bool:
 
 def disconnect(ctx: BizHawkContext) -> None:
     """Closes the connection to the connector script."""
-    if ctx.streams is not None:
-        ctx.streams[1].close()
-        ctx.streams = None
-    ctx.connection_status = ConnectionStatus.NOT_CONNECTED
+    ctx._close()
 
 
 async def get_script_version(ctx: BizHawkContext) -> int:
     return int(await ctx._send_message("VERSION"))
 
 
-async def send_requests(ctx: BizHawkContext, req_list: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    """Sends a list of requests to the BizHawk connector and returns their responses.
+async def enable_binary_protocol(ctx: BizHawkContext) -> None:
+    """Switches the connection to binary frames, which carry memory contents as raw bytes instead of base64 and let
+    several requests be in flight at once. Only supported by connector scripts since `BINARY_PROTOCOL_VERSION`, check
+    `get_script_version` first. The JSON protocol stays in use for older scripts."""
+    res = await ctx._send_message("BINARY")
+    if res.strip() != "BINARY":
+        raise SyncError(f"Expected BINARY to switch to binary frames but got {res.strip()}")
+    ctx.binary_protocol = True
+
+
+async def _send_requests_raw(ctx: BizHawkContext, req_list: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Like `send_requests`, but memory contents of requests and responses are bytes instead of base64 strings."""
+    if ctx.binary_protocol:
+        data_parts: list[bytes] = []
+        frame_requests: list[dict[str, Any]] = []
+        for request in req_list:
+            field = _data_fields.get(request["type"])
+            if field in request:
+                data_parts.append(bytes(request[field]))
+                request = {**request, field: len(data_parts[-1])}
+            frame_requests.append(request)
+        message, data = await ctx._send_frame(json.dumps(frame_requests).encode("utf-8"), b"".join(data_parts))
+        responses = json.loads(message)
+        offset = 0
+        for response in responses:
+            field = _data_fields.get(response["type"])
+            if field in response:
+                size = response[field]
+                response[field] = data[offset:offset + size]
+                offset += size
+    else:
+        responses = json.loads(await ctx._send_message(json.dumps([
+            {**request, field: base64.b64encode(bytes(request[field])).decode("ascii")}
+            if (field := _data_fields.get(request["type"])) in request else request
+            for request in req_list
+        ])))
+        for response in responses:
+            field = _data_fields.get(response["type"])
+            if field in response:
+                response[field] = base64.b64decode(response[field])
 
-    It's likely you want to use the wrapper functions instead of this."""
-    responses = json.loads(await ctx._send_message(json.dumps(req_list)))
     errors: list[ConnectorError] = []
 
     for response in responses:
@@ -142,6 +252,25 @@ async def send_requests(ctx: BizHawkContext, req_list: list[dict[str, Any]]) ->
     return responses
 
 
+async def send_requests(ctx: BizHawkContext, req_list: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Sends a list of requests to the BizHawk connector and returns their responses.
+
+    Requests and responses are in the format of the connector script's JSON protocol, with memory contents as base64
+    strings, no matter which protocol the connection uses.
+
+    It's likely you want to use the wrapper functions instead of this."""
+    responses = await _send_requests_raw(ctx, [
+        {**request, field: base64.b64decode(request[field])}
+        if (field := _data_fields.get(request["type"])) in request else request
+        for request in req_list
+    ])
+    for response in responses:
+        field = _data_fields.get(response["type"])
+        if field in response:
+            response[field] = base64.b64encode(response[field]).decode("ascii")
+    return responses
+
+
 async def ping(ctx: BizHawkContext) -> None:
     """Sends a PING request and receives a PONG response."""
     res = (await send_requests(ctx, [{"type": "PING"}]))[0]
@@ -250,10 +379,10 @@ async def guarded_read(ctx: BizHawkContext, read_list: Sequence[tuple[int, int,
 
     Returns None if any item in guard_list failed to validate. Otherwise returns a list of bytes in the order they
     were requested."""
-    res = await send_requests(ctx, [{
+    res = await _send_requests_raw(ctx, [{
         "type": "GUARD",
         "address": address,
-        "expected_data": base64.b64encode(bytes(expected_data)).decode("ascii"),
+        "expected_data": bytes(expected_data),
         "domain": domain
     } for address, expected_data, domain in guard_list] + [{
         "type": "READ",
@@ -271,7 +400,7 @@ async def guarded_read(ctx: BizHawkContext, read_list: Sequence[tuple[int, int,
             if item["type"] != "READ_RESPONSE":
                 raise SyncError(f"Expected response of type READ_RESPONSE or GUARD_RESPONSE but got {item['type']}")
 
-            ret.append(base64.b64decode(item["value"]))
+            ret.append(item["value"])
 
     return ret
 
@@ -303,15 +432,15 @@ async def guarded_write(ctx: BizHawkContext, write_list: Sequence[tuple[int, Seq
     - `domain` is the name of the region of memory the address corresponds to
 
     Returns False if any item in guard_list failed to validate. Otherwise returns True."""
-    res = await send_requests(ctx, [{
+    res = await _send_requests_raw(ctx, [{
         "type": "GUARD",
         "address": address,
-        "expected_data": base64.b64encode(bytes(expected_data)).decode("ascii"),
+        "expected_data": bytes(expected_data),
         "domain": domain
     } for address, expected_data, domain in guard_list] + [{
         "type": "WRITE",
         "address": address,
-        "value": base64.b64encode(bytes(value)).decode("ascii"),
+        "value": bytes(value),
         "domain": domain
     } for address, value, domain in write_list])
 
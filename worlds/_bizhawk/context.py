@@ -14,12 +14,14 @@ from CommonClient import CommonContext, ClientCommandProcessor, get_base_parser,
 import Patch
 import Utils
 
-from . import BizHawkContext, ConnectionStatus, NotConnectedError, RequestFailedError, connect, disconnect, get_hash, \
-    get_script_version, get_system, ping, display_message
+from . import BINARY_PROTOCOL_VERSION, BizHawkContext, ConnectionStatus, NotConnectedError, RequestFailedError, \
+    connect, disconnect, enable_binary_protocol, get_hash, get_script_version, get_system, ping, display_message
 from .client import BizHawkClient, AutoBizHawkClientRegister
 
 
-EXPECTED_SCRIPT_VERSION = 1
+EXPECTED_SCRIPT_VERSION = 2
+COMPATIBLE_SCRIPT_VERSIONS = {1, 2}
+"""Connector script versions that can be used, older ones only through the JSON protocol"""
 
 
 class AuthStatus(enum.IntEnum):
@@ -246,12 +248,15 @@ async def _game_watcher(ctx: BizHawkClientContext):
 
                 script_version = await get_script_version(ctx.bizhawk_ctx)
 
-                if script_version != EXPECTED_SCRIPT_VERSION:
+                if script_version not in COMPATIBLE_SCRIPT_VERSIONS:
                     logger.info(f"Connector script is incompatible. Expected version {EXPECTED_SCRIPT_VERSION} but "
                                 f"got {script_version}. Disconnecting.")
                     disconnect(ctx.bizhawk_ctx)
                     continue
 
+                if script_version >= BINARY_PROTOCOL_VERSION:
+                    await enable_binary_protocol(ctx.bizhawk_ctx)
+
             showed_connecting_message = False
 
             await ping(ctx.bizhawk_ctx)
@@ -11,6 +11,7 @@ from ..logic.smbool import SMBool
 
 
 # support for AP world
+# only true when imported from the zip, copies extracted to the apworld cache read their files from disk
 isAPWorld = ".apworld" in sys.modules[__name__].__file__
 
 def getZipFile():
@@ -40,6 +40,7 @@ class V6World(World):
     music_map: typing.Dict[int,int]
 
     options_dataclass = V6Options
+    fork_safe_output = True
 
     def create_regions(self):
         create_regions(self.multiworld, self.player)